@@ -0,0 +1,84 @@
+"""
+Per call overhead of call_a2a_agent with a fresh httpx client per call vs the pooled connections and card cache.
+
+Serves a local A2A agent that answers at once (same middlewares as the remote servers, agent card ETags included)
+and sends `--calls` sequential messages with:
+
+* fresh client per call: the previous call path, new client + agent card GET + message, every call
+* pooled, card ttl 0: pooled keep-alive client, the card is revalidated with its ETag on every call (304)
+* pooled, card cached: pooled keep-alive client, the card comes from memory
+
+Prints p50/p95 per call, HTTP requests and TCP connections per call seen by the server.
+
+uv run python -m benchmarks.a2a_pool --calls 200
+"""
+import asyncio
+import tempfile
+import time
+import click
+import httpx
+from benchmarks.a2a_servers import agent_app, free_port, serve
+from benchmarks.harness import percentile
+from benchmarks.offline_settings import load_offline_settings
+
+AGENT = 'cinema_agent'
+
+async def fresh_client_call(base_url:str, message:str)->str:
+    """ Call path before the pool: a new client, the agent card and then the message """
+    from uuid import uuid4
+    from a2a.client import A2ACardResolver, A2AClient
+    from a2a.types import MessageSendParams, SendMessageRequest
+    async with httpx.AsyncClient(timeout=5.0) as httpx_client:
+        card = await A2ACardResolver(httpx_client=httpx_client,base_url=base_url).get_agent_card()
+        client = A2AClient(httpx_client=httpx_client,agent_card=card)
+        request = SendMessageRequest(id=str(uuid4()),params=MessageSendParams(message={
+            'role': 'user','parts': [{'kind': 'text','text': message}],'message_id': uuid4().hex
+        }))
+        response = await client.send_message(request,http_kwargs={"timeout": 30.0})
+        return str(response.model_dump(mode='json',exclude_none=True))
+
+async def run(calls:int):
+    load_offline_settings()
+    from modules.util.a2a_calls import A2AConnectionPool, call_a2a_agent
+    from modules.util.agent_registry import AgentRegistry
+    port = free_port()
+    counter = agent_app(port)
+    server = serve(counter,port)
+    base_url = f"http://127.0.0.1:{port}/"
+    AgentRegistry().load({AGENT: [base_url]})
+    AgentRegistry().health_interval_seconds = 0
+    pool = A2AConnectionPool()
+    pool.cards.path = f"{tempfile.mkdtemp()}/agent_cards.json"
+
+    async def pooled(ttl:float):
+        pool.cards.ttl_seconds = ttl
+        return await call_a2a_agent(AGENT,"Which movies are on Sunday?")
+
+    scenarios = {
+        "fresh client per call": lambda: fresh_client_call(base_url,"Which movies are on Sunday?"),
+        "pooled, card ttl 0": lambda: pooled(0),
+        "pooled, card cached": lambda: pooled(300),
+    }
+    print(f"{calls} sequential calls per row to a local A2A agent that answers at once")
+    try:
+        for label, call in scenarios.items():
+            await call()
+            counter.requests, counter.peers = 0, set()
+            latencies = []
+            for _ in range(calls):
+                start = time.perf_counter()
+                await call()
+                latencies.append(time.perf_counter() - start)
+            print(f"{label:<22} p50={percentile(latencies,50)*1000:6.2f} ms p95={percentile(latencies,95)*1000:6.2f} ms "
+                  f"| HTTP requests per call {counter.requests / calls:4.2f} | TCP connections per call {len(counter.peers) / calls:4.2f}")
+    finally:
+        await pool.aclose()
+        server.should_exit = True
+
+@click.command()
+@click.option("--calls","calls",default=200)
+def main(calls):
+    asyncio.run(run(calls))
+
+if __name__ == "__main__":
+    main()
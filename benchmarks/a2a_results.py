@@ -0,0 +1,76 @@
+"""
+Executor prompt tokens with the full A2A response dump as tool result vs the compact result.
+
+Local stand-in agents answer like the remote servers: a task whose history holds the "Calling agent:" and
+"Tool call:" updates (with a `--items` long tool listing), then a short final artifact. The benchmark workers
+send their task to the agent and relay its result to the react executor. The same queries run with
+`a2a.results.compact` off (the previous str() of the response) and on, over message/send; the last row adds
+message/stream. Prints the executor prompt tokens per request (4 characters per token), the A2A result size per
+call and the p50 latency.
+
+uv run python -m benchmarks.a2a_results --items 20 --requests 5
+"""
+import asyncio
+import json
+import time
+import click
+from benchmarks.a2a_servers import agent_app, free_port, serve, stop
+from benchmarks.harness import ToolCallingModel, use_benchmark_model, percentile
+
+ANSWER = "Booked a table for two at Casa Verde on Sunday 19:00, a 120 USD budget was reserved, confirmation ABC123."
+
+def agent_updates(agent_name:str, items:int)->list[str]:
+    """ Status updates of a remote agent run: model turn with the tool call, tool output, final model turn """
+    listing = [{"name": f"{agent_name} option {index}","address": f"{index} Main Street","rating": 4.5,"price": 20 + index,"available": True} for index in range(items)]
+    return ["Calling agent: ",f"Tool call: {json.dumps(listing)}",f"Calling agent: {ANSWER}"]
+
+async def run(latency:float, items:int, requests:int):
+    model = ToolCallingModel(latency=latency,relay_agents=True)
+    use_benchmark_model(model)
+    from modules.chain.warmup import warm_up
+    from modules.util.a2a_calls import A2AConnectionPool, a2a_settings
+    from modules.util.a2a_results import A2A_RESULT_CHARS
+    from modules.util.agent_registry import AgentRegistry
+    chain = warm_up()
+    chain._graph = chain._build_chain(topology="react")
+    servers, urls = [], {}
+    for agent_name in chain._worker_names:
+        port = free_port()
+        servers.append(serve(agent_app(port,name=agent_name,streaming=True,updates=agent_updates(agent_name,items),answer=ANSWER),port))
+        urls[agent_name] = [f"http://127.0.0.1:{port}/"]
+    AgentRegistry().load(urls)
+    AgentRegistry().health_interval_seconds = 0
+    config = a2a_settings()
+    results, streaming = config.setdefault('results',{}), config.setdefault('streaming',{})
+    print(f"model latency {latency*1000:.0f} ms, {len(servers)} agents, tool listing of {items} items, {requests} requests per row")
+    try:
+        for label, compact, stream in [("full dump",False,False),("compact",True,False),("compact, streamed",True,True)]:
+            results['compact'], streaming['enabled'] = compact, stream
+            A2A_RESULT_CHARS._series.clear()
+            executor_chars = len(model.executor_prompt_chars)
+            latencies:list[float] = []
+            for index in range(requests):
+                start = time.perf_counter()
+                await chain.call_main_graph(f"Plan a dinner on Sunday #{index}")
+                latencies.append(time.perf_counter() - start)
+            tokens = sum(model.executor_prompt_chars[executor_chars:]) / 4 / requests
+            part = "result" if compact else "dump"
+            sizes = [series for key, series in A2A_RESULT_CHARS._series.items() if key[1] == part]
+            per_call = sum(series[1] for series in sizes) / max(1,sum(series[2] for series in sizes))
+            print(f"{label:<18} executor prompt tokens per request {tokens:8.0f} | A2A result {per_call:7.0f} chars per call "
+                  f"| p50 {percentile(latencies,50)*1000:7.1f} ms")
+            await A2AConnectionPool().aclose()
+    finally:
+        await A2AConnectionPool().aclose()
+        for server in servers:
+            stop(server)
+
+@click.command()
+@click.option("--latency","latency",default=0.02,help="Model latency per call in seconds")
+@click.option("--items","items",default=20,help="Items in the tool listing every agent reports while it works")
+@click.option("--requests","requests",default=5)
+def main(latency,items,requests):
+    asyncio.run(run(latency,items,requests))
+
+if __name__ == "__main__":
+    main()
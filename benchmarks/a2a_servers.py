@@ -0,0 +1,105 @@
+""" Local stand-in A2A agents for the benchmarks: same middlewares as the remote servers, served by uvicorn in a thread """
+import asyncio
+import socket
+import threading
+import time
+from typing import Callable
+import uvicorn
+
+class RequestCounter:
+    """ ASGI wrapper counting the requests, the messages (POST) and the client connections (peer address) that reach the agent """
+
+    def __init__(self, app):
+        self.app = app
+        self.requests = 0
+        self.messages = 0
+        self.peers:set = set()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            self.requests += 1
+            self.messages += scope["method"] == "POST"
+            self.peers.add(tuple(scope.get("client") or ()))
+        await self.app(scope,receive,send)
+
+def agent_app(port:int, name:str="Cinema agent", delay:float|Callable[[],float]=0.0, capacity:int=0, streaming:bool=False, chunks:int=4,
+              updates:list[str]|None=None, answer:str|None=None, error:str|None=None)->RequestCounter:
+    """
+    A2A agent that answers every message after `delay` seconds (a callable is read per message), `capacity` messages at a time (0 = no limit)
+
+    * With `streaming` it works like the remote agents: a task, `chunks` working updates spread over the delay, one artifact, completed
+    * `updates` replaces the text of the working updates (one update each), `answer` the artifact text
+    * With `error` every message is answered with a JSON-RPC internal error with that text
+    """
+    from a2a.server.agent_execution import AgentExecutor
+    from a2a.server.apps import A2AStarletteApplication
+    from a2a.server.request_handlers import DefaultRequestHandler
+    from a2a.server.tasks import InMemoryTaskStore, TaskUpdater
+    from a2a.types import AgentCapabilities, AgentCard, AgentSkill, InternalError, Part, TaskState, TextPart
+    from a2a.utils import new_agent_text_message, new_task
+    from a2a.utils.errors import ServerError
+    from remote.util.routes import add_monitoring_routes
+
+    slots = asyncio.Semaphore(capacity) if capacity else None
+    seconds = delay if callable(delay) else lambda: delay
+
+    async def stream(context, event_queue):
+        task = context.current_task or new_task(context.message)
+        await event_queue.enqueue_event(task)
+        updater = TaskUpdater(event_queue,task.id,task.context_id)
+        texts = updates if updates is not None else [f"step {chunk + 1} of {chunks} on {port}" for chunk in range(chunks)]
+        step = seconds() / (len(texts) + 1)
+        for text in texts:
+            await asyncio.sleep(step)
+            await updater.update_status(TaskState.working,new_agent_text_message(text,task.context_id,task.id))
+        await asyncio.sleep(step)
+        await updater.add_artifact([Part(root=TextPart(text=answer or f"done on {port}: {context.get_user_input()}"))],name="result")
+        await updater.complete()
+
+    class EchoExecutor(AgentExecutor):
+        async def execute(self, context, event_queue):
+            if error is not None:
+                raise ServerError(error=InternalError(message=error))
+            if streaming:
+                await stream(context,event_queue)
+            elif slots is None:
+                await asyncio.sleep(seconds())
+            else:
+                async with slots:
+                    await asyncio.sleep(seconds())
+            await event_queue.enqueue_event(new_agent_text_message(f"done on {port}: {context.get_user_input()}"))
+
+        async def cancel(self, context, event_queue):
+            raise NotImplementedError
+
+    card = AgentCard(
+        name=name,description="Benchmark agent",url=f"http://127.0.0.1:{port}/",version="1.0.0",
+        default_input_modes=["text"],default_output_modes=["text"],capabilities=AgentCapabilities(streaming=streaming),
+        skills=[AgentSkill(id="echo",name="Echo",description="Answers after a fixed delay",tags=["benchmark"])]
+    )
+    handler = DefaultRequestHandler(agent_executor=EchoExecutor(),task_store=InMemoryTaskStore())
+    return RequestCounter(add_monitoring_routes(A2AStarletteApplication(agent_card=card,http_handler=handler).build()))
+
+def free_port()->int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1",0))
+        return probe.getsockname()[1]
+
+def serve(app, port:int)->uvicorn.Server:
+    """ Starts the app in a daemon thread, set `should_exit` on the returned server to stop it """
+    server = uvicorn.Server(uvicorn.Config(app,host="127.0.0.1",port=port,log_level="warning"))
+    threading.Thread(target=server.run,daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+def stop(server:uvicorn.Server):
+    """ Stops the server and waits until its port refuses connections """
+    server.should_exit = True
+    port = server.config.port
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1",port),timeout=0.05).close()
+            time.sleep(0.01)
+        except OSError:
+            return
@@ -0,0 +1,77 @@
+"""
+Time to the first agent update with message/send vs message/stream.
+
+Local stand-in agents (one per worker) work for `--delay` seconds and send `--chunks` status updates on the way,
+then one artifact. The five agents are called together, like the executor fan-out, with the streaming section of
+the yaml turned off (blocking) and on (streaming). Per mode prints p50 of the time to the first progress event the
+portal would send, of the whole call, and the progress events per call.
+
+uv run python -m benchmarks.a2a_streaming --delay 1 --chunks 4
+"""
+import asyncio
+import time
+import click
+from benchmarks.a2a_servers import agent_app, free_port, serve, stop
+from benchmarks.harness import percentile
+from benchmarks.offline_settings import load_offline_settings
+
+AGENTS = ['cinema_agent','decoration_agent','food_agent','weather_agent','file_agent']
+
+async def fan_out(rounds:int)->tuple[list[float],list[float],int,list[str]]:
+    """ `rounds` concurrent calls to every agent: first progress event and total per call, events and results """
+    from modules.util.a2a_calls import call_a2a_agent
+    firsts, totals, events, results = [], [], 0, []
+
+    async def call(agent_name:str):
+        start, first = time.perf_counter(), []
+
+        def progress(event:dict):
+            nonlocal events
+            events += 1
+            if not first:
+                first.append(time.perf_counter() - start)
+
+        results.append(await call_a2a_agent(agent_name,"Plan for Sunday",progress=progress))
+        totals.append(time.perf_counter() - start)
+        firsts.append(first[0] if first else totals[-1])
+
+    for _ in range(rounds):
+        await asyncio.gather(*(call(agent_name) for agent_name in AGENTS))
+    return firsts, totals, events, results
+
+async def run(delay:float, chunks:int, rounds:int):
+    load_offline_settings()
+    from modules.util.a2a_calls import A2AConnectionPool, a2a_settings
+    from modules.util.agent_registry import AgentRegistry
+    servers, urls = [], {}
+    for agent_name in AGENTS:
+        port = free_port()
+        servers.append(serve(agent_app(port,name=agent_name,delay=delay,streaming=True,chunks=chunks),port))
+        urls[agent_name] = [f"http://127.0.0.1:{port}/"]
+    AgentRegistry().load(urls)
+    AgentRegistry().health_interval_seconds = 0
+    streaming = a2a_settings().setdefault('streaming',{})
+    print(f"{len(AGENTS)} agents called together x {rounds} rounds, {delay*1000:.0f} ms per message, {chunks} status updates")
+    try:
+        for label, enabled in [("blocking",False),("streaming",True)]:
+            streaming['enabled'] = enabled
+            await fan_out(1)
+            firsts, totals, events, results = await fan_out(rounds)
+            calls = len(totals)
+            print(f"{label:<10} first update p50 {percentile(firsts,50)*1000:7.1f} ms | call p50 {percentile(totals,50)*1000:7.1f} ms "
+                  f"| progress events per call {events / calls:4.1f} | results with the agent answer {sum('done on' in result for result in results)}/{calls}")
+            await A2AConnectionPool().aclose()
+    finally:
+        await A2AConnectionPool().aclose()
+        for server in servers:
+            stop(server)
+
+@click.command()
+@click.option("--delay","delay",default=1.0,help="Seconds every agent works on a message")
+@click.option("--chunks","chunks",default=4,help="Status updates the agent sends while it works")
+@click.option("--rounds","rounds",default=3)
+def main(delay,chunks,rounds):
+    asyncio.run(run(delay,chunks,rounds))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Load spreading and failover of the agent registry with local stand-in replicas of the food agent.
+
+Every replica handles one message at a time (`--delay` seconds each), like an agent busy with its model call.
+`--concurrency` clients send `--calls` messages each, one after the other, for:
+
+* 1 replica / N replicas: wall time and messages per replica
+* N replicas, one slow (4x delay): least outstanding requests sends it fewer messages
+* failover: one replica is stopped, calls move to the others (retries, ejection, health check)
+
+uv run python -m benchmarks.agent_registry --replicas 3 --concurrency 12
+"""
+import asyncio
+import time
+import click
+from benchmarks.a2a_servers import agent_app, free_port, serve, stop
+from benchmarks.offline_settings import load_offline_settings
+
+AGENT = 'food_agent'
+
+def start_replicas(delays:list[float])->list[tuple]:
+    replicas = []
+    for delay in delays:
+        port = free_port()
+        app = agent_app(port,name="Food agent",delay=delay,capacity=1)
+        replicas.append((f"http://127.0.0.1:{port}/",app,serve(app,port)))
+    return replicas
+
+async def send_calls(concurrency:int, calls:int)->tuple[float,int]:
+    """ `concurrency` clients sending `calls` messages each, one after the other """
+    from modules.util.a2a_calls import call_a2a_agent
+    errors, start = 0, time.perf_counter()
+
+    async def client():
+        nonlocal errors
+        for _ in range(calls):
+            try:
+                await call_a2a_agent(AGENT,"Which dishes are available?")
+            except Exception:
+                errors += 1
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return time.perf_counter() - start, errors
+
+async def run(replicas:int, delay:float, concurrency:int, calls:int):
+    load_offline_settings()
+    from modules.util.a2a_calls import A2AConnectionPool
+    from modules.util.agent_registry import AgentRegistry, REPLICA_EJECTIONS
+    registry = AgentRegistry()
+    registry.health_interval_seconds = 0
+    print(f"{concurrency} clients x {calls} calls each, {delay*1000:.0f} ms per message, one message at a time per replica")
+
+    scenarios = {
+        "1 replica": [delay],
+        f"{replicas} replicas": [delay]*replicas,
+        f"{replicas} replicas, one slow": [delay*4] + [delay]*(replicas-1),
+    }
+    for label, delays in scenarios.items():
+        servers = start_replicas(delays)
+        registry.load({AGENT: [url for url, _, _ in servers]})
+        await send_calls(len(servers),1)
+        for _, app, _ in servers:
+            app.messages = 0
+        wall, errors = await send_calls(concurrency,calls)
+        spread = " ".join(f"{app.messages:3d}" for _, app, _ in servers)
+        print(f"{label:<26} wall {wall*1000:8.1f} ms | errors {errors} | messages per replica {spread}")
+        for _, _, server in servers:
+            stop(server)
+        await A2AConnectionPool().aclose()
+
+    servers = start_replicas([delay]*replicas)
+    urls = [url for url, _, _ in servers]
+    registry.load({AGENT: urls})
+    await send_calls(len(servers),1)
+    stop(servers[0][2])
+    for _, app, _ in servers:
+        app.messages = 0
+    wall, errors = await send_calls(concurrency,calls)
+    spread = " ".join(f"{app.messages:3d}" for _, app, _ in servers)
+    dead = registry.replicas[AGENT][0]
+    print(f"{'failover (replica 1 down)':<26} wall {wall*1000:8.1f} ms | errors {errors} | messages per replica {spread} "
+          f"| replica 1 failures {dead.failures}, ejected {not dead.available}")
+    await registry.check()
+    print(f"health check: {[replica.healthy for replica in registry.replicas[AGENT]]}")
+    print(f"ejections: {REPLICA_EJECTIONS.render()[2:]}")
+    for _, _, server in servers[1:]:
+        stop(server)
+    await A2AConnectionPool().aclose()
+
+@click.command()
+@click.option("--replicas","replicas",default=3)
+@click.option("--delay","delay",default=0.05,help="Seconds per message on every replica")
+@click.option("--concurrency","concurrency",default=12)
+@click.option("--calls","calls",default=5,help="Calls per client")
+def main(replicas,delay,concurrency,calls):
+    asyncio.run(run(replicas,delay,concurrency,calls))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Calls to a hung remote agent with a fixed timeout vs the adaptive timeout and the circuit breaker.
+
+A local stand-in weather agent answers in `--latency` seconds for `--warm` calls (the latency window fills), then
+hangs. `--calls` sequential calls are sent to the hung agent with:
+
+* fixed timeout: every call waits `--fixed` seconds (the previous 30 s, scaled down) and fails
+* adaptive + breaker: p99 x factor timeout, the circuit opens after failure_threshold failures, the next calls fail fast
+
+Then the agent recovers and, after reset_seconds, one half open trial call closes the circuit again. Last, an agent
+that answers every message with a JSON-RPC error must open the circuit like a failing one, the script exits with 1
+when it does not.
+
+uv run python -m benchmarks.circuit_breaker --fixed 3 --calls 8
+"""
+import asyncio
+import sys
+import time
+import click
+from benchmarks.a2a_servers import agent_app, free_port, serve, stop
+from benchmarks.offline_settings import load_offline_settings
+
+AGENT = 'weather_agent'
+
+async def timed_calls(calls:int)->tuple[list[float],list[str]]:
+    from modules.util.a2a_calls import call_a2a_agent
+    durations, results = [], []
+    for _ in range(calls):
+        start = time.perf_counter()
+        try:
+            result = await call_a2a_agent(AGENT,"Forecast for CA")
+        except Exception as e:
+            result = f"{type(e).__name__}"
+        durations.append(time.perf_counter() - start)
+        results.append(result[:40])
+    return durations, results
+
+async def error_answers(calls:int, reset:float)->bool:
+    """ Calls to an agent that answers with JSON-RPC errors, True when its circuit opened and its replica counted the failures """
+    from modules.util.a2a_calls import A2AConnectionPool
+    from modules.util.agent_registry import AgentRegistry
+    from modules.util.circuit_breaker import AgentGuard, AgentGuards
+    port = free_port()
+    server = serve(agent_app(port,name="Weather agent",error="forecast service down"),port)
+    AgentRegistry().load({AGENT: [f"http://127.0.0.1:{port}/"]})
+    AgentRegistry().max_failures = calls + 1
+    guard = AgentGuard(AGENT,failure_threshold=3,reset_seconds=reset)
+    AgentGuards()._guards[AGENT] = guard
+    try:
+        _, results = await timed_calls(calls)
+    finally:
+        await A2AConnectionPool().aclose()
+        stop(server)
+    replica = AgentRegistry().replicas[AGENT][0]
+    print(f"{'JSON-RPC errors':<19} circuit {guard.breaker.state} | replica failures {replica.failures} | latency samples {len(guard.latency)}")
+    print(f"{'':<19} results: {sorted(set(results))}")
+    return guard.breaker.state == "open" and replica.failures > 0
+
+async def run(latency:float, warm:int, calls:int, fixed:float, reset:float)->bool:
+    load_offline_settings()
+    from modules.util.a2a_calls import A2AConnectionPool
+    from modules.util.agent_registry import AgentRegistry
+    from modules.util.circuit_breaker import AgentGuard, AgentGuards, BREAKER_TRANSITIONS
+    state = {'delay': latency}
+    port = free_port()
+    server = serve(agent_app(port,name="Weather agent",delay=lambda: state['delay']),port)
+    AgentRegistry().load({AGENT: [f"http://127.0.0.1:{port}/"]})
+    AgentRegistry().health_interval_seconds = 0
+    guards = AgentGuards()
+
+    modes = {
+        "fixed timeout": AgentGuard(AGENT,min_seconds=fixed,max_seconds=fixed,failure_threshold=10**6),
+        "adaptive + breaker": AgentGuard(AGENT,min_seconds=0.05,max_seconds=fixed,min_samples=10,failure_threshold=3,reset_seconds=reset),
+    }
+    print(f"agent latency {latency*1000:.0f} ms for {warm} calls, then hung; {calls} calls to the hung agent per row")
+    try:
+        for label, guard in modes.items():
+            guards._guards[AGENT] = guard
+            state['delay'] = latency
+            await timed_calls(warm)
+            state['delay'] = 3600
+            durations, results = await timed_calls(calls)
+            print(f"{label:<19} timeout {guard.timeout():5.2f} s | total {sum(durations):6.2f} s | per call "
+                  f"{' '.join(f'{duration:.2f}' for duration in durations)} s | circuit {guard.breaker.state}")
+            print(f"{'':<19} results: {sorted(set(results))}")
+            await A2AConnectionPool().aclose()
+
+        state['delay'] = latency
+        await asyncio.sleep(reset)
+        durations, results = await timed_calls(2)
+        print(f"{'recovered':<19} after {reset:.1f} s: per call {' '.join(f'{duration:.3f}' for duration in durations)} s | circuit {guard.breaker.state}")
+        print(f"transitions: {BREAKER_TRANSITIONS.render()[2:]}")
+    finally:
+        await A2AConnectionPool().aclose()
+        stop(server)
+    return await error_answers(calls,reset)
+
+@click.command()
+@click.option("--latency","latency",default=0.02,help="Seconds per message while the agent is healthy")
+@click.option("--warm","warm",default=30,help="Healthy calls before the agent hangs")
+@click.option("--calls","calls",default=8,help="Calls to the hung agent")
+@click.option("--fixed","fixed",default=3.0,help="Fixed timeout in seconds (max_seconds of the adaptive one)")
+@click.option("--reset","reset",default=1.0,help="Seconds the circuit stays open")
+def main(latency,warm,calls,fixed,reset):
+    sys.exit(0 if asyncio.run(run(latency,warm,calls,fixed,reset)) else 1)
+
+if __name__ == "__main__":
+    main()
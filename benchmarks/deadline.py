@@ -0,0 +1,66 @@
+"""
+End-to-end latency with one slow worker agent, without and with the request deadline.
+
+The executor asks every worker agent in one step, the food worker takes `--slow` seconds to execute its task. Without
+deadline the request waits for it; with `--budget` seconds the worker is cut, the executor reports the finished
+agents and the layout renders them with a "timed out" card for the slow one.
+
+The report and layout reserves come from the yaml (scaled to the budget) unless `--report-reserve`/`--layout-reserve`
+are given. A last run with a `--check-budget` seconds deadline and no slow agent must not cut any agent, the script
+exits with 1 when it does.
+
+uv run python -m benchmarks.deadline --budget 3 --slow 10
+"""
+import asyncio
+import json
+import sys
+import time
+import click
+from benchmarks.harness import ToolCallingModel, use_benchmark_model
+
+def card_titles(response:str)->list[str]:
+    try:
+        return [component["props"]["title"] for component in json.loads(response)]
+    except (json.JSONDecodeError, TypeError, KeyError):
+        return ["layout from the model"]
+
+async def run(latency:float, slow:float, budget:float, report_reserve:float|None, layout_reserve:float|None, check_budget:float)->bool:
+    model = ToolCallingModel(latency=latency,slow=slow)
+    use_benchmark_model(model)
+    from modules.chain.warmup import warm_up
+    from modules.util.deadline import TIMED_OUT, deadline_settings, new_deadline, reserve
+    chain = warm_up()
+    config = deadline_settings()
+    if report_reserve is not None:
+        config.report_reserve = report_reserve
+    if layout_reserve is not None:
+        config.layout_reserve = layout_reserve
+    print(f"model latency {latency*1000:.0f} ms, {model.slow_agent} agent answers after {slow:.1f} s, yaml reserves report {config.report_reserve} s layout {config.layout_reserve} s")
+    for label, seconds in [("no deadline",0),(f"deadline {budget:.1f} s",budget)]:
+        deadline = new_deadline(seconds)
+        start = time.perf_counter()
+        response = await chain.call_main_graph("Plan a movie date on Sunday with dinner",deadline=deadline)
+        elapsed = time.perf_counter() - start
+        reserved = f"reserves {reserve('report_reserve','layout_reserve',budget=seconds):.2f} s" if deadline else "no reserves"
+        print(f"{label:<15} {elapsed*1000:9.1f} ms | {reserved} | {', '.join(card_titles(response))}")
+
+    # A short budget must still leave the agents time to run, the reserves shrink with it
+    model.slow = 0.0
+    deadline = new_deadline(check_budget)
+    response = await chain.call_main_graph("Plan a movie date on Sunday with dinner",deadline=deadline)
+    cut = TIMED_OUT in response
+    print(f"check: deadline {check_budget:.1f} s, reserves {reserve('report_reserve','layout_reserve',budget=check_budget):.2f} s, agents cut: {cut}")
+    return not cut
+
+@click.command()
+@click.option("--latency","latency",default=0.05,help="Model latency per call in seconds")
+@click.option("--slow","slow",default=10.0,help="Extra seconds of the slow worker agent")
+@click.option("--budget","budget",default=3.0,help="Request deadline in seconds")
+@click.option("--report-reserve","report_reserve",default=None,type=float,help="Overrides deadline.report_reserve")
+@click.option("--layout-reserve","layout_reserve",default=None,type=float,help="Overrides deadline.layout_reserve")
+@click.option("--check-budget","check_budget",default=10.0,help="Deadline of the run that must not cut any agent")
+def main(latency,slow,budget,report_reserve,layout_reserve,check_budget):
+    sys.exit(0 if asyncio.run(run(latency,slow,budget,report_reserve,layout_reserve,check_budget)) else 1)
+
+if __name__ == "__main__":
+    main()
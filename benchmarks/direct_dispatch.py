@@ -0,0 +1,72 @@
+"""
+Worker tasks through the local proxy worker agents vs direct A2A dispatch from the executor tools.
+
+Local stand-in remote agents answer in `--agent` seconds; the benchmark model answers in `--latency` seconds and its
+workers send their task to the remote agent, then relay the result (two model turns per task in proxy mode). Per
+`workers.mode` prints:
+
+* per task: model calls and p50 latency of one executor tool call (`call_<agent>`), for every worker
+* per request: model calls and p50 latency of the whole react graph with every worker selected
+
+uv run python -m benchmarks.direct_dispatch --latency 0.3 --agent 0.5
+"""
+import asyncio
+import time
+import click
+from benchmarks.a2a_servers import agent_app, free_port, serve, stop
+from benchmarks.harness import ToolCallingModel, use_benchmark_model, percentile
+
+async def run(latency:float, agent:float, tasks:int, requests:int):
+    model = ToolCallingModel(latency=latency,relay_agents=True)
+    use_benchmark_model(model)
+    from modules.chain.warmup import warm_up
+    from modules.cluster.worker_manager import WorkerManager
+    from modules.util.a2a_calls import A2AConnectionPool
+    from modules.util.agent_registry import AgentRegistry
+    from modules.util.config.config import Settings
+    chain = warm_up()
+    chain._graph = chain._build_chain(topology="react")
+    tools = WorkerManager().tools_by_agent
+    servers, urls = [], {}
+    for agent_name in chain._worker_names:
+        port = free_port()
+        servers.append(serve(agent_app(port,name=agent_name,delay=agent,streaming=True),port))
+        urls[agent_name] = [f"http://127.0.0.1:{port}/"]
+    AgentRegistry().load(urls)
+    AgentRegistry().health_interval_seconds = 0
+    workers = Settings._instance._config.setdefault('workers',{})
+    print(f"model latency {latency*1000:.0f} ms, remote agent {agent*1000:.0f} ms, {tasks} tasks per agent, {requests} requests per row")
+    try:
+        for mode in ["proxy","direct"]:
+            workers['mode'] = mode
+            calls, latencies, answered = model.calls, [], 0
+            for index in range(tasks):
+                for agent_name, worker_tool in tools.items():
+                    start = time.perf_counter()
+                    result = await worker_tool.ainvoke({"instruction": f"book option {index}","context": "dinner on Sunday"})
+                    latencies.append(time.perf_counter() - start)
+                    answered += "done on" in result
+            task_calls = (model.calls - calls) / len(latencies)
+            print(f"{mode:<6} per task    | model calls {task_calls:4.1f} | p50 {percentile(latencies,50)*1000:7.1f} ms | remote answers {answered}/{len(latencies)}")
+            calls, latencies = model.calls, []
+            for index in range(requests):
+                start = time.perf_counter()
+                await chain.call_main_graph(f"Plan a dinner on Sunday #{index}")
+                latencies.append(time.perf_counter() - start)
+            print(f"{mode:<6} per request | model calls {(model.calls - calls) / requests:4.1f} | p50 {percentile(latencies,50)*1000:7.1f} ms")
+            await A2AConnectionPool().aclose()
+    finally:
+        await A2AConnectionPool().aclose()
+        for server in servers:
+            stop(server)
+
+@click.command()
+@click.option("--latency","latency",default=0.3,help="Model latency per call in seconds")
+@click.option("--agent","agent",default=0.5,help="Seconds the remote agent works on a task")
+@click.option("--tasks","tasks",default=3,help="Tasks per worker agent")
+@click.option("--requests","requests",default=3)
+def main(latency,agent,tasks,requests):
+    asyncio.run(run(latency,agent,tasks,requests))
+
+if __name__ == "__main__":
+    main()
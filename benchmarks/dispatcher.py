@@ -0,0 +1,45 @@
+"""
+Wall time of the assignment dispatcher against the critical path and the total work.
+
+Dispatches synthetic assignments (every agent sleeps `--task` seconds) for independent agents and for a chain where
+the decoration agent waits for the weather agent, for several concurrency caps. The sequential ReAct executor
+(one tool call per model turn) is close to the total work column.
+
+uv run python -m benchmarks.dispatcher --task 0.2
+"""
+import asyncio
+import click
+from benchmarks.offline_settings import load_offline_settings
+
+AGENTS = ["cinema_agent","food_agent","decoration_agent","weather_agent","file_agent"]
+
+SCENARIOS = {
+    "independent": {},
+    "weather -> decoration": {"decoration_agent": ["weather_agent"]},
+    "chain of 3": {"decoration_agent": ["weather_agent"],"food_agent": ["decoration_agent"]},
+}
+
+async def run(task:float, caps:list[int]):
+    load_offline_settings()
+    from modules.cluster.dispatcher import AssignmentDispatcher
+
+    async def call(item:dict)->str:
+        await asyncio.sleep(task)
+        return f"{item['agent']} done"
+
+    print(f"{len(AGENTS)} agents, {task*1000:.0f} ms per agent task")
+    print(f"{'scenario':<22} {'cap':>3} | {'wall ms':>8} {'critical path ms':>17} {'total work ms':>14}")
+    for name, depends_on in SCENARIOS.items():
+        assignments = [{'agent': agent,'instruction': "task",'context': "",'depends_on': depends_on.get(agent,[])} for agent in AGENTS]
+        for cap in caps:
+            _, report = await AssignmentDispatcher(cap).run(assignments,call)
+            print(f"{name:<22} {cap:>3} | {report.wall*1000:8.1f} {report.critical_path*1000:17.1f} {report.total_work*1000:14.1f}")
+
+@click.command()
+@click.option("--task","task",default=0.2,help="Seconds of every agent task")
+@click.option("--caps","caps",default="1,3,5",help="Concurrency caps")
+def main(task,caps):
+    asyncio.run(run(task,[int(cap) for cap in caps.split(",")]))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Runaway executor ReAct loops with and without the executor guardrails.
+
+The benchmark executor keeps calling every worker tool for `--rounds` model turns. With workers that execute their
+tasks the guardrails stop the loop once every agent answered (agents_done); with workers that keep answering with a
+plan the per agent tool call limit stops it. Prints latency, model calls per request and the limit that fired.
+
+uv run python -m benchmarks.guardrails --rounds 6 --latency 0.05
+"""
+import asyncio
+import time
+import click
+from benchmarks.harness import ToolCallingModel, use_benchmark_model
+
+SCENARIOS = {
+    "workers execute": "Done, the tickets were purchased and the table was booked.",
+    "workers answer plans": "Here is my plan: 1. look for options 2. book the best one.",
+}
+
+async def request(chain, query:str)->str|None:
+    guardrail = None
+    async for event in chain.stream_main_graph(query):
+        guardrail = event.get('guardrail',guardrail)
+    return guardrail
+
+async def run(latency:float, rounds:int, requests:int):
+    model = ToolCallingModel(latency=latency,executor_rounds=rounds)
+    use_benchmark_model(model)
+    from modules.chain.warmup import warm_up
+    from modules.cluster.executor import ExecutorAgent
+    chain = warm_up()
+    guardrails = ExecutorAgent()._guardrails
+    configured = (guardrails.max_iterations,guardrails.max_tool_calls_per_agent,guardrails.max_prompt_tokens,guardrails.stop_when_done)
+    print(f"model latency {latency*1000:.0f} ms, executor loops for {rounds} turns, limits (iterations, calls per agent, prompt tokens, stop when done) = {configured}")
+    for scenario, reply in SCENARIOS.items():
+        model.worker_reply = reply
+        for label, limits in [("no limits",(0,0,0,False)),("guardrails",configured)]:
+            guardrails.max_iterations, guardrails.max_tool_calls_per_agent, guardrails.max_prompt_tokens, guardrails.stop_when_done = limits
+            calls, start, fired = model.calls, time.perf_counter(), set()
+            for index in range(requests):
+                fired.add(await request(chain,f"Plan a movie date on Sunday #{index}"))
+            elapsed = (time.perf_counter() - start) / requests
+            print(f"{scenario:<21} {label:<10} {elapsed*1000:8.1f} ms | model calls per request {(model.calls - calls) / requests:5.1f} | limit {', '.join(sorted(str(limit) for limit in fired))}")
+
+@click.command()
+@click.option("--latency","latency",default=0.05,help="Model latency per call in seconds")
+@click.option("--rounds","rounds",default=6,help="Model turns the runaway executor keeps calling tools")
+@click.option("--requests","requests",default=3)
+def main(latency,rounds,requests):
+    asyncio.run(run(latency,rounds,requests))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+""" Offline harness for the benchmarks: local settings and a latency-simulating chat model instead of the OCI client """
+import asyncio
+import logging
+import time
+from typing import Any
+from uuid import uuid4
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+from benchmarks.offline_settings import load_offline_settings
+
+class BenchmarkChatModel(BaseChatModel):
+    """
+    Chat model that answers after a fixed latency:
+
+    * Records the prompt size of every call so benchmarks can compare token usage
+    * Structured output returns the schema defaults, updated with the matching structured_fields
+    """
+    latency: float = 0.0
+    reply: str = "Done, all the tasks were executed."
+    structured_fields: dict = {"status": "complete"}
+    calls: int = 0
+    prompt_messages: list[int] = []
+    prompt_chars: list[int] = []
+
+    @property
+    def _llm_type(self)->str:
+        return "benchmark"
+
+    def _record(self, messages:list[BaseMessage])->ChatResult:
+        self.calls += 1
+        self.prompt_messages.append(len(messages))
+        self.prompt_chars.append(sum(len(str(message.content)) for message in messages))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.reply))])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs)->ChatResult:
+        time.sleep(self.latency)
+        return self._record(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs)->ChatResult:
+        await asyncio.sleep(self.latency)
+        return self._record(messages)
+
+    def bind_tools(self, tools, **kwargs)->"BenchmarkChatModel":
+        return self
+
+    def _structured(self, schema)->Any:
+        self.calls += 1
+        fields = getattr(schema,"model_fields",{})
+        return schema(**{key: value for key, value in self.structured_fields.items() if key in fields})
+
+    def with_structured_output(self, schema, **kwargs)->Any:
+        def structured(_):
+            time.sleep(self.latency)
+            return self._structured(schema)
+        async def astructured(_):
+            await asyncio.sleep(self.latency)
+            return self._structured(schema)
+        return RunnableLambda(structured,afunc=astructured)
+
+class ToolCallingModel(BenchmarkChatModel):
+    """
+    Benchmark model whose executor calls every worker tool:
+
+    * The executor issues the tool calls again for `executor_rounds` model turns (runaway ReAct loop)
+    * The tasks of `slow_agent` take `slow` extra seconds, `worker_reply` replaces the worker answers
+    * With `relay_agents` the workers send their task to the remote agent (send_task2_* tool) and answer with its result
+    * `executor_prompt_chars` records the prompt size of every executor model turn
+    """
+    slow_agent: str = "food"
+    slow: float = 0.0
+    executor_rounds: int = 1
+    worker_reply: str|None = None
+    relay_agents: bool = False
+    executor_prompt_chars: list[int] = []
+
+    def bind_tools(self, tools, **kwargs)->Any:
+        return self.bind(tool_names=[tool.name for tool in tools])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, tool_names:list[str]|None=None, **kwargs)->ChatResult:
+        await asyncio.sleep(self.latency)
+        worker_task = "work to fulfill the request" in str(messages[-1].content)
+        if worker_task and f"You are a {self.slow_agent} agent" in str(messages[0].content):
+            await asyncio.sleep(self.slow)
+        result = self._record(messages)
+        if worker_task and self.worker_reply is not None:
+            result.generations[0].message = AIMessage(content=self.worker_reply)
+        send_tools = [name for name in tool_names or [] if name.startswith("send_task2_")]
+        if self.relay_agents and send_tools and isinstance(messages[-1],ToolMessage):
+            result.generations[0].message = AIMessage(content=messages[-1].content)
+        elif self.relay_agents and send_tools and worker_task:
+            agent_name = send_tools[0].removeprefix("send_task2_").removesuffix("_expert") + "_agent"
+            args = {"agent_name": agent_name,"full_context": str(messages[-1].content)}
+            result.generations[0].message = AIMessage(content="",tool_calls=[{"name": send_tools[0],"args": args,"id": uuid4().hex,"type": "tool_call"}])
+        rounds = sum(1 for message in messages if isinstance(message,AIMessage) and message.tool_calls)
+        executor = any(name.startswith("call_") for name in tool_names or [])
+        if executor:
+            self.executor_prompt_chars.append(self.prompt_chars[-1])
+        if executor and rounds < self.executor_rounds:
+            calls = [{"name": name,"args": {"instruction": "execute the plan","context": "benchmark"},"id": uuid4().hex,"type": "tool_call"} for name in tool_names]
+            result.generations[0].message = AIMessage(content="",tool_calls=calls)
+        return result
+
+def disable_tracing():
+    """ FuseConfig hands out a no-op callback instead of the Langfuse handler """
+    from langchain_core.callbacks import BaseCallbackHandler
+    from modules.util.lang_fuse import FuseConfig
+    def _init(self):
+        self._langfuse_handler = BaseCallbackHandler()
+        self._initialized = True
+    FuseConfig._init = _init
+
+def use_benchmark_model(model:BenchmarkChatModel):
+    """ Every agent built after this call gets `model` from LLM_Open_Client.build_llm_client """
+    logging.disable(logging.INFO)
+    load_offline_settings()
+    disable_tracing()
+    from modules.util.ociopen_ai import LLM_Open_Client
+    LLM_Open_Client.build_llm_client = lambda self: model
+
+def percentile(values:list[float], q:float)->float:
+    ordered = sorted(values)
+    index = min(len(ordered)-1,max(0,round(q / 100 * (len(ordered)-1))))
+    return ordered[index]
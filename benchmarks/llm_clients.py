@@ -0,0 +1,119 @@
+"""
+Chat clients of the portal agents built per call vs handed out by the shared LLM client registry.
+
+A local stand-in of the OCI OpenAI endpoint answers every chat completion after `--latency` seconds, requests are
+signed with a throwaway OCI API key. Per `llm_client.shared` the benchmark builds the clients the way the portal
+does (planner, executor, verification, layout, the five workers and `--binds` HelperOpenAI.bind_output calls),
+then sends `--waves` rounds of `--calls` concurrent completions through them. Prints the clients, signers (OCI
+config reads) and httpx pools built, the memory they hold, the TCP connections the endpoint saw and the p50 latency.
+
+uv run python -m benchmarks.llm_clients --binds 20 --calls 20 --waves 3
+"""
+import asyncio
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+import click
+import oci
+from benchmarks.a2a_servers import RequestCounter, free_port, serve, stop
+from benchmarks.harness import disable_tracing, percentile
+from benchmarks.offline_settings import load_offline_settings
+
+AGENTS = ["planner","executor","verification","layout","cinema","food","decoration","weather","file"]
+
+def completion_app(latency:float)->RequestCounter:
+    """ OpenAI compatible chat completion endpoint that answers after `latency` seconds """
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    async def completions(request):
+        body = await request.json()
+        await asyncio.sleep(latency)
+        return JSONResponse({
+            "id": "chatcmpl-benchmark","object": "chat.completion","created": int(time.time()),"model": body["model"],
+            "choices": [{"index": 0,"message": {"role": "assistant","content": "Done"},"finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 10,"completion_tokens": 1,"total_tokens": 11},
+        })
+
+    return RequestCounter(Starlette(routes=[Route("/20231130/actions/v1/chat/completions",completions,methods=["POST"])]))
+
+def oci_config(directory:str)->str:
+    """ OCI config file with a throwaway API key, enough to sign the requests """
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    key = rsa.generate_private_key(public_exponent=65537,key_size=2048)
+    key_file = os.path.join(directory,"key.pem")
+    with open(key_file,"wb") as file:
+        file.write(key.private_bytes(serialization.Encoding.PEM,serialization.PrivateFormat.TraditionalOpenSSL,serialization.NoEncryption()))
+    config_file = os.path.join(directory,"config")
+    with open(config_file,"w") as file:
+        file.write(f"[DEFAULT]\nuser=ocid1.user.oc1..benchmark\nfingerprint={':'.join(['aa']*16)}\n"
+                   f"tenancy=ocid1.tenancy.oc1..benchmark\nregion=us-ashburn-1\nkey_file={key_file}\n")
+    return config_file
+
+async def run(latency:float, binds:int, calls:int, waves:int):
+    settings = load_offline_settings()
+    disable_tracing()
+    from modules.util.ociopen_ai import LLM_Open_Client, user_principle_auth
+    reads = 0
+    from_file = oci.config.from_file
+    def counted_from_file(*args, **kwargs):
+        nonlocal reads
+        reads += 1
+        return from_file(*args,**kwargs)
+    oci.config.from_file = counted_from_file
+
+    port = free_port()
+    app = completion_app(latency)
+    server = serve(app,port)
+    directory = tempfile.mkdtemp()
+    settings._config.oci_client.endpoint = f"http://127.0.0.1:{port}"
+    settings._config.oci_client.config_path = oci_config(directory)
+    settings._config.oci_client.configProfile = "DEFAULT"
+    print(f"{len(AGENTS)} agents + {binds} bind_output calls, {waves} rounds of {calls} concurrent completions, endpoint latency {latency*1000:.0f} ms")
+    try:
+        for label, shared in [("client per call",False),("shared registry",True)]:
+            registry = LLM_Open_Client()
+            await registry.aclose()
+            registry.shared = shared
+            user_principle_auth.cache_clear()
+            reads, app.peers = 0, set()
+            gc.collect()
+            tracemalloc.start()
+            clients = [registry.build_llm_client() for _ in AGENTS + [None]*binds]
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            pools = {id(client.root_async_client._client) for client in clients}
+            latencies:list[float] = []
+
+            async def complete(index:int):
+                start = time.perf_counter()
+                await clients[index % len(clients)].ainvoke("Hello")
+                latencies.append(time.perf_counter() - start)
+
+            for wave in range(waves):
+                await asyncio.gather(*(complete(wave * calls + index) for index in range(calls)))
+            print(f"{label:<16} clients {len({id(client) for client in clients}):3d} | OCI config reads {reads:3d} | async pools {len(pools):3d} "
+                  f"| memory {memory/1024:7.0f} KiB | TCP connections {len(app.peers):3d} | p50 {percentile(latencies,50)*1000:6.1f} ms")
+            if not shared:
+                for client in clients:
+                    await client.root_async_client.close()
+                    client.root_client.close()
+    finally:
+        await LLM_Open_Client().aclose()
+        oci.config.from_file = from_file
+        stop(server)
+
+@click.command()
+@click.option("--latency","latency",default=0.05,help="Seconds the endpoint takes per completion")
+@click.option("--binds","binds",default=20,help="HelperOpenAI.bind_output calls (one client each before the registry)")
+@click.option("--calls","calls",default=20,help="Concurrent completions per round, spread over the clients")
+@click.option("--waves","waves",default=3,help="Rounds of concurrent completions")
+def main(latency,binds,calls,waves):
+    asyncio.run(run(latency,binds,calls,waves))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Plan phase with LLM worker plans vs capability manifests built from the agent cards.
+
+Runs the chain until `agent_select` answers for every labeled query of benchmarks/data/routing_queries.json, in
+both `plans.mode` values, and prints the latency until agent_select, the model calls and the size of the plans
+agent_select receives. Offline (default) the model is the benchmark model and the cards come from
+benchmarks/data/agent_cards.json; with --live the real model and the running A2A servers are used and the
+agent_select output is scored: precision / recall of the agents it names against the labeled agents.
+
+uv run python -m benchmarks.manifest_plans --latency 0.2
+uv run python -m benchmarks.manifest_plans --live
+"""
+import asyncio
+import json
+import time
+from contextlib import aclosing
+import click
+from benchmarks.offline_settings import ROOT
+from benchmarks.harness import BenchmarkChatModel, use_benchmark_model, percentile
+
+DATA = ROOT / "benchmarks" / "data"
+
+async def until_agent_select(chain, query:str)->tuple[float,int,str]:
+    """ Seconds until agent_select finished, size of the synthesized plans and the agent_select answer """
+    start = time.perf_counter()
+    plans_size = 0
+    stream = chain._graph.astream({"messages": [{"role": "user", "content": query}],'status':'plan'},chain._run_config(),stream_mode="updates")
+    async with aclosing(stream):
+        async for chunk in stream:
+            for node, update in chunk.items():
+                if node == "synthesizer":
+                    plans_size = len(chain._node_content(update))
+                if node == "agent_select":
+                    return time.perf_counter() - start, plans_size, chain._node_content(update)
+    raise RuntimeError(f"agent_select did not run for '{query}'")
+
+def named_agents(text:str, cards:dict)->set[str]:
+    lowered = text.lower()
+    return {agent for agent, card in cards.items() if agent in lowered or card.name.lower() in lowered}
+
+async def run(latency:float, live:bool, limit:int):
+    model = None
+    if not live:
+        model = BenchmarkChatModel(latency=latency)
+        use_benchmark_model(model)
+    from a2a.types import AgentCard
+    from modules.chain.warmup import warm_up
+    from modules.cluster.capability_manifest import ManifestPlanner
+    from modules.util.a2a_calls import agent_cards
+    chain = warm_up()
+    planner = ManifestPlanner()
+    if live:
+        cards = agent_cards()
+    else:
+        cards = {name: AgentCard.model_validate(card) for name, card in json.loads((DATA / "agent_cards.json").read_text()).items()}
+    planner.load(cards)
+    queries = json.loads((DATA / "routing_queries.json").read_text())[:limit]
+
+    print(f"{len(queries)} queries, {'live model' if live else f'benchmark model {latency*1000:.0f} ms'}, cards for {sorted(cards)}")
+    for mode in ["llm","manifest"]:
+        planner.mode = mode
+        latencies, sizes = [], []
+        true_positives = selected = expected = 0
+        calls = model.calls if model else 0
+        for item in queries:
+            elapsed, size, answer = await until_agent_select(chain,item["query"])
+            latencies.append(elapsed)
+            sizes.append(size)
+            named = named_agents(answer,cards)
+            true_positives += len(named & set(item["agents"]))
+            selected += len(named)
+            expected += len(item["agents"])
+        line = (f"{mode:<9} until agent_select p50={percentile(latencies,50)*1000:8.1f} ms p95={percentile(latencies,95)*1000:8.1f} ms "
+                f"| plans {sum(sizes)/len(sizes):7.0f} chars")
+        if model:
+            line += f" | model calls per query {(model.calls - calls) / len(queries):4.1f}"
+        if live:
+            line += f" | agent_select precision {true_positives/max(selected,1):.2f} recall {true_positives/max(expected,1):.2f}"
+        print(line)
+
+@click.command()
+@click.option("--latency","latency",default=0.2,help="Benchmark model latency per call in seconds")
+@click.option("--live","live",is_flag=True,help="Real model and A2A servers, scores the agent_select output")
+@click.option("--limit","limit",default=36,help="Number of labeled queries")
+def main(latency,live,limit):
+    asyncio.run(run(latency,live,limit))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+""" Portal app on the benchmark chat model, for load tests without OCI: uvicorn benchmarks.offline_portal:app """
+import os
+from benchmarks.offline_settings import load_offline_settings
+
+load_offline_settings()
+
+import portal
+
+def offline_warm_up(*args, **kwargs):
+    """ Swaps the model inside the background warm-up so the harness and agent imports stay off the port bind """
+    from benchmarks.harness import BenchmarkChatModel, use_benchmark_model
+    use_benchmark_model(BenchmarkChatModel(latency=float(os.environ.get("BENCHMARK_LLM_LATENCY","0.05"))))
+    return warm_up(*args,**kwargs)
+
+warm_up = portal.warm_up
+portal.warm_up = offline_warm_up
+# uvicorn target, an import string so several worker processes can load it
+app = portal.app
@@ -0,0 +1,18 @@
+""" Repo config with placeholder env values, kept apart from the harness so it loads without the LangChain imports """
+import os
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+ENV_VARIABLES = [
+    "COMPARTIMENT","ENDPOINT","CONFIG_PATH",
+    "SECRET_VM_KEY","PUBLIC_VM_KEY","VM_HOST",
+    "SECRET_OCI_KEY","PUBLIC_OCI_KEY","OCI_HOST",
+]
+
+def load_offline_settings():
+    """ Loads the repo config with placeholder env values, later Settings(...) calls reuse this instance """
+    for variable in ENV_VARIABLES:
+        os.environ.setdefault(variable,"offline")
+    from modules.util.config.config import Settings
+    return Settings(str(ROOT / "modules" / "util" / "config" / "config.yaml"))
@@ -0,0 +1,67 @@
+"""
+Wall time of the 5-way worker plan fan-out with the sync `*_plan` nodes vs the async `a*_plan` nodes.
+
+Builds START -> every worker plan node -> END with the real worker agents on the benchmark model and runs it
+`--requests` times at each concurrency. Sync nodes block a thread of the default executor during every model call,
+async nodes await it on the event loop.
+
+uv run python -m benchmarks.plan_fanout --latency 0.2 --concurrency 1,8,32
+"""
+import asyncio
+import time
+import click
+from langgraph.graph import StateGraph, START, END
+from benchmarks.harness import BenchmarkChatModel, use_benchmark_model, percentile
+from modules.util.session import new_session_id
+from modules.util.states import LayoutState
+
+def build_fanout(nodes:list[tuple[str,object]]):
+    builder = StateGraph(LayoutState)
+    for name, node in nodes:
+        builder.add_node(name,node)
+        builder.add_edge(START,name)
+        builder.add_edge(name,END)
+    return builder.compile()
+
+async def run_fanout(graph, requests:int, concurrency:int)->tuple[float,list[float]]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies:list[float] = []
+
+    async def one(index:int):
+        async with semaphore:
+            start = time.perf_counter()
+            await graph.ainvoke(
+                {"messages": [{"role": "user", "content": f"Plan a movie date on Sunday #{index}"}],'status':'plan'},
+                {'configurable': {'thread_id': new_session_id()}}
+            )
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return time.perf_counter() - start, latencies
+
+async def run(latency:float, concurrency_levels:list[int], requests:int):
+    use_benchmark_model(BenchmarkChatModel(latency=latency))
+    from modules.cluster.worker_manager import WorkerManager
+    workers = WorkerManager()
+    agents = [workers.cinema_agent,workers.food_agent,workers.decoration_agent,workers.weather_agent,workers.file_agent]
+    graphs = {
+        "sync *_plan": build_fanout([(agent.name,getattr(agent,f"{agent.name.removesuffix('_agent')}_plan")) for agent in agents]),
+        "async a*_plan": build_fanout(workers.agent_list),
+    }
+    print(f"model latency {latency*1000:.0f} ms, {len(agents)} plan nodes, {requests} requests per row")
+    for concurrency in concurrency_levels:
+        for label, graph in graphs.items():
+            total, latencies = await run_fanout(graph,requests,concurrency)
+            print(f"{label:<14} concurrency={concurrency:<3} fan-out p50={percentile(latencies,50)*1000:8.1f} ms "
+                  f"p95={percentile(latencies,95)*1000:8.1f} ms | total {total:6.2f} s")
+
+@click.command()
+@click.option("--latency","latency",default=0.2,help="Model latency per call in seconds")
+@click.option("--concurrency","concurrency",default="1,8,32",help="Concurrent graph runs")
+@click.option("--requests","requests",default=32)
+def main(latency,concurrency,requests):
+    asyncio.run(run(latency,[int(level) for level in concurrency.split(",")],requests))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Size of the graph state and of the agent_select prompt per request.
+
+Runs the chain on the benchmark model, whose plans are `--plan-chars` long, until `agent_select` answers and prints
+the state size agent_select receives (messages and plan store, in characters), the agent_select prompt in characters
+and estimated tokens (4 characters per token), for `plans.max_chars` off and the configured value.
+
+uv run python -m benchmarks.plan_store --plan-chars 3000 --requests 5
+"""
+import asyncio
+import json
+from contextlib import aclosing
+import click
+from benchmarks.harness import BenchmarkChatModel, use_benchmark_model
+
+def state_chars(state:dict)->int:
+    return len(json.dumps(state,default=lambda value: getattr(value,"content",str(value))))
+
+async def until_agent_select(chain, model:BenchmarkChatModel, query:str)->tuple[int,int]:
+    """ State size received by agent_select and its prompt size, in characters """
+    values, calls_before = {}, 0
+    stream = chain._graph.astream({"messages": [{"role": "user", "content": query}],'status':'plan'},chain._run_config(),stream_mode=["updates","values"])
+    async with aclosing(stream):
+        async for mode, chunk in stream:
+            if mode == "values":
+                values = chunk
+                calls_before = len(model.prompt_chars)
+            elif "agent_select" in chunk:
+                return state_chars(values), sum(model.prompt_chars[calls_before:])
+    raise RuntimeError("agent_select did not run")
+
+async def run(latency:float, plan_chars:int, requests:int):
+    model = BenchmarkChatModel(latency=latency,reply=("Step: check the options and book the best one. " * plan_chars)[:plan_chars])
+    use_benchmark_model(model)
+    from modules.chain.warmup import warm_up
+    from modules.util.config.config import Settings
+    chain = warm_up()
+    plans = Settings().plans
+    configured = plans.get("max_chars") if plans else None
+    print(f"plans of {plan_chars} chars from each of the {len(chain._worker_names)} workers, {requests} requests per row")
+    for label, max_chars in [("no cap",None),(f"max_chars {configured}",configured)]:
+        if plans is not None:
+            plans.max_chars = max_chars
+        sizes = [await until_agent_select(chain,model,f"Plan a movie date on Sunday #{index}") for index in range(requests)]
+        state = sum(size[0] for size in sizes) / requests
+        prompt = sum(size[1] for size in sizes) / requests
+        print(f"{label:<16} state {state:9.0f} chars | agent_select prompt {prompt:9.0f} chars ~{prompt/4:7.0f} tokens")
+
+@click.command()
+@click.option("--latency","latency",default=0.01,help="Model latency per call in seconds")
+@click.option("--plan-chars","plan_chars",default=3000,help="Length of every worker plan")
+@click.option("--requests","requests",default=5)
+def main(latency,plan_chars,requests):
+    asyncio.run(run(latency,plan_chars,requests))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Throughput of the portal with 1/2/4/8 worker processes.
+
+Starts the portal once per worker count, waits for /ready, then keeps `concurrency` clients sending requests
+for `duration` seconds. --offline serves benchmarks.offline_portal:app (chat model with fixed latency) instead of portal:app.
+
+uv run python -m benchmarks.portal_workers --offline --workers 1,2,4,8
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import click
+import httpx
+from importlib.util import find_spec
+from benchmarks.harness import percentile
+from benchmarks.offline_settings import ROOT
+
+async def wait_ready(client:httpx.AsyncClient, base_url:str, workers:int, timeout:float):
+    """ Polls /ready on new connections (a kept-alive one always lands on the same worker) until `workers` distinct pids answered """
+    ready_pids = set()
+    limit = time.monotonic() + timeout
+    while len(ready_pids) < workers:
+        if time.monotonic() > limit:
+            raise TimeoutError(f"Only {len(ready_pids)} of {workers} workers ready")
+        try:
+            response = await client.get(f"{base_url}/ready",headers={"Connection": "close"})
+            if response.status_code == 200:
+                ready_pids.add(response.json()["pid"])
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+
+async def load(client:httpx.AsyncClient, url:str, concurrency:int, duration:float)->tuple[int,int,list[float]]:
+    latencies:list[float] = []
+    errors = 0
+    limit = time.monotonic() + duration
+
+    async def user(index:int):
+        nonlocal errors
+        while time.monotonic() < limit:
+            start = time.perf_counter()
+            try:
+                response = await client.get(url,params={"query": f"Plan a movie date on Sunday #{index}","bypass_cache": True})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+            except httpx.HTTPError:
+                errors += 1
+
+    await asyncio.gather(*(user(i) for i in range(concurrency)))
+    return len(latencies), errors, latencies
+
+async def run(worker_counts:list[int], concurrency:int, duration:float, port:int, offline:bool, latency:float):
+    app = "benchmarks.offline_portal:app" if offline else "portal:app"
+    options = {"loop": "uvloop" if find_spec("uvloop") else "asyncio","http": "httptools" if find_spec("httptools") else "h11"}
+    base_url = f"http://127.0.0.1:{port}"
+    env = {**os.environ,"BENCHMARK_LLM_LATENCY": str(latency)}
+    print(f"app={app} loop={options['loop']} http={options['http']} concurrency={concurrency} duration={duration}s")
+    for workers in worker_counts:
+        process = subprocess.Popen(
+            [sys.executable,"-m","uvicorn",app,"--port",str(port),"--workers",str(workers),
+             "--loop",options["loop"],"--http",options["http"],"--log-level","warning"],
+            cwd=ROOT,env=env
+        )
+        try:
+            async with httpx.AsyncClient(timeout=300,limits=httpx.Limits(max_connections=concurrency)) as client:
+                await wait_ready(client,base_url,workers,timeout=300)
+                done, errors, latencies = await load(client,f"{base_url}/get-response",concurrency,duration)
+            throughput = done / duration
+            p50 = percentile(latencies,50) if latencies else 0.0
+            p95 = percentile(latencies,95) if latencies else 0.0
+            print(f"workers={workers:<2} requests={done:<6} errors={errors:<4} throughput={throughput:8.2f} req/s p50={p50*1000:8.1f} ms p95={p95*1000:8.1f} ms")
+        finally:
+            process.terminate()
+            process.wait()
+
+@click.command()
+@click.option("--workers","workers",default="1,2,4,8")
+@click.option("--concurrency","concurrency",default=64)
+@click.option("--duration","duration",default=20.0)
+@click.option("--port","port",default=8100)
+@click.option("--offline","offline",is_flag=True,help="Use the benchmark chat model instead of OCI")
+@click.option("--latency","latency",default=0.05,help="Offline model latency per call in seconds")
+def main(workers,concurrency,duration,port,offline,latency):
+    asyncio.run(run([int(count) for count in workers.split(",")],concurrency,duration,port,offline,latency))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Threshold check of the semantic response cache on labeled query pairs (benchmarks/data/cache_pairs.json).
+
+The first query of every pair is stored, the second one is looked up:
+
+* paraphrase pairs must hit the stored answer of their first query (recall)
+* near-miss pairs change a day, time, place, number or the topic and must miss (any hit is a wrong answer)
+
+Prints recall and wrong answers for a grid of thresholds, with similarity only and with the slot match of the cache.
+Exits with 1 when the configured `portal.response_cache.threshold` gives a wrong answer.
+
+uv run python -m benchmarks.response_cache
+"""
+import json
+import sys
+import click
+import numpy as np
+from benchmarks.offline_settings import ROOT, load_offline_settings
+
+PAIRS = ROOT / "benchmarks" / "data" / "cache_pairs.json"
+
+def evaluate(pairs:dict, threshold:float, slots:bool)->tuple[int,int]:
+    """ Paraphrases that got their own answer and near misses that got any answer """
+    from modules.util.response_cache import SemanticResponseCache
+    cache = SemanticResponseCache(threshold=threshold)
+    for stored, _ in pairs['paraphrase'] + pairs['near_miss']:
+        cache.store(stored,stored)
+
+    def answer(query:str)->str|None:
+        if slots:
+            return cache.lookup(query)
+        stored, scores = cache.scores(query)
+        best = int(np.argmax(scores))
+        return cache._values[stored[best]] if scores[best] >= threshold else None
+
+    recalled = sum(answer(query) == stored for stored, query in pairs['paraphrase'])
+    wrong = sum(answer(query) is not None for _, query in pairs['near_miss'])
+    return recalled, wrong
+
+@click.command()
+@click.option("--thresholds","thresholds",default="0.6,0.65,0.7,0.75,0.8,0.84,0.9",help="Comma separated thresholds")
+def main(thresholds):
+    configured = load_offline_settings().portal.response_cache.threshold
+    with open(PAIRS,encoding="utf-8") as file:
+        pairs = json.load(file)
+    print(f"{len(pairs['paraphrase'])} paraphrase pairs, {len(pairs['near_miss'])} near-miss pairs, configured threshold {configured}")
+    grid = sorted({float(value) for value in thresholds.split(",")} | {configured})
+    failed = False
+    for threshold in grid:
+        row = []
+        for label, slots in [("similarity only",False),("with slots",True)]:
+            recalled, wrong = evaluate(pairs,threshold,slots)
+            row.append(f"{label}: recall {recalled:2d}/{len(pairs['paraphrase'])} wrong answers {wrong:2d}/{len(pairs['near_miss'])}")
+            failed |= slots and threshold == configured and wrong > 0
+        marker = " <- configured" if threshold == configured else ""
+        print(f"threshold {threshold:4.2f} | {' | '.join(row)}{marker}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Memory growth benchmark for the checkpointer threads.
+
+Runs the planner and executor agents for N sequential requests, once with the old shared thread id ("1")
+and once with a new thread id per request, and prints the prompt size sent to the model.
+
+uv run python -m benchmarks.session_memory --requests 1000
+"""
+import asyncio
+import click
+from langchain_core.messages import HumanMessage
+from benchmarks.harness import BenchmarkChatModel, use_benchmark_model
+from modules.util.session import new_session_id
+
+def report(label:str, model:BenchmarkChatModel):
+    messages = model.prompt_messages
+    chars = model.prompt_chars
+    print(f"{label:<28} first: {messages[0]:>5} msgs {chars[0]:>8} chars | "
+          f"last: {messages[-1]:>5} msgs {chars[-1]:>8} chars | max: {max(messages):>5} msgs")
+
+async def run(requests:int):
+    model = BenchmarkChatModel()
+    use_benchmark_model(model)
+    from modules.cluster.planner import PlannerAgent
+    from modules.cluster.executor import ExecutorAgent
+    planner = PlannerAgent()
+    executor = ExecutorAgent()
+    state = {"messages": [HumanMessage(content="Plan a movie date on Sunday with snacks")],'status':'plan'}
+
+    for label, thread_id in [("shared thread '1'",lambda: "1"),("thread per request",new_session_id)]:
+        for agent, call in [("planner",planner.call_planner_agent),("executor",executor.call_executor_agent)]:
+            model.prompt_messages = []
+            model.prompt_chars = []
+            for _ in range(requests):
+                config = {'configurable': {'thread_id': thread_id()}}
+                if asyncio.iscoroutinefunction(call):
+                    await call(state,config)
+                else:
+                    call(state,config)
+            report(f"{agent} / {label}",model)
+
+@click.command()
+@click.option("--requests","requests",default=1000)
+def main(requests):
+    asyncio.run(run(requests))
+
+if __name__ == "__main__":
+    main()
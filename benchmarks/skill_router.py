@@ -0,0 +1,79 @@
+"""
+Precision / recall of the skill router on a labeled query set.
+
+Indexes the agent cards in benchmarks/data/agent_cards.json (same skills as the remote servers publish) and routes
+every query of benchmarks/data/routing_queries.json for a grid of threshold / top_k values. Prints micro precision,
+recall, exact matches and the plan LLM calls saved against the broadcast to all five workers, then per agent numbers
+for the configured values.
+
+uv run python -m benchmarks.skill_router
+"""
+import json
+import time
+import click
+from benchmarks.offline_settings import ROOT, load_offline_settings
+
+DATA = ROOT / "benchmarks" / "data"
+
+def evaluate(router, queries:list[dict], agents:list[str])->dict:
+    router.routed = router.broadcasts = router.plan_calls = router.plan_calls_saved = 0
+    true_positives, selected_total, expected_total, exact = 0, 0, 0, 0
+    per_agent = {agent: {'tp': 0,'selected': 0,'expected': 0} for agent in agents}
+    start = time.perf_counter()
+    for item in queries:
+        selected = set(router.select(item["query"],agents))
+        expected = set(item["agents"])
+        true_positives += len(selected & expected)
+        selected_total += len(selected)
+        expected_total += len(expected)
+        exact += selected == expected
+        for agent in agents:
+            per_agent[agent]['tp'] += agent in selected and agent in expected
+            per_agent[agent]['selected'] += agent in selected
+            per_agent[agent]['expected'] += agent in expected
+    elapsed = time.perf_counter() - start
+    return {
+        'precision': true_positives / max(selected_total,1),
+        'recall': true_positives / max(expected_total,1),
+        'exact': exact / len(queries),
+        'saved': router.plan_calls_saved / (len(queries) * len(agents)),
+        'broadcasts': router.broadcasts,
+        'route_ms': elapsed / len(queries) * 1000,
+        'per_agent': per_agent,
+    }
+
+@click.command()
+@click.option("--thresholds","thresholds",default="0.05,0.08,0.1,0.12,0.15,0.2")
+@click.option("--top-k","top_ks",default="1,2,3,5")
+def main(thresholds,top_ks):
+    load_offline_settings()
+    from a2a.types import AgentCard
+    from modules.cluster.skill_router import SkillRouter
+    cards = {name: AgentCard.model_validate(card) for name, card in json.loads((DATA / "agent_cards.json").read_text()).items()}
+    queries = json.loads((DATA / "routing_queries.json").read_text())
+    agents = list(cards)
+
+    router = SkillRouter()
+    configured = (router.threshold,router.top_k)
+    router.enabled = True
+    router.load(cards)
+    print(f"{len(queries)} labeled queries, {len(agents)} agents, broadcast = {len(queries)*len(agents)} plan calls")
+    print("threshold top_k | precision recall exact | plan calls saved | broadcasts | route ms")
+    for threshold in [float(value) for value in thresholds.split(",")]:
+        for top_k in [int(value) for value in top_ks.split(",")]:
+            router.threshold, router.top_k = threshold, top_k
+            result = evaluate(router,queries,agents)
+            print(f"{threshold:9.2f} {top_k:5} | {result['precision']:9.2f} {result['recall']:6.2f} {result['exact']:5.2f} | "
+                  f"{result['saved']*100:15.1f}% | {result['broadcasts']:10} | {result['route_ms']:8.3f}")
+
+    router.threshold, router.top_k = configured
+    result = evaluate(router,queries,agents)
+    print(f"\nconfigured threshold={configured[0]} top_k={configured[1]}: precision {result['precision']:.2f} recall {result['recall']:.2f}, "
+          f"{result['saved']*100:.1f}% plan calls saved")
+    for agent, counts in result['per_agent'].items():
+        precision = counts['tp'] / max(counts['selected'],1)
+        recall = counts['tp'] / max(counts['expected'],1)
+        print(f"  {agent:<17} precision {precision:5.2f} recall {recall:5.2f} ({counts['selected']} selected, {counts['expected']} expected)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+End-to-end latency of the chain with the serial verification gate vs the speculative verification.
+
+Runs the full ChainManager graph on the benchmark model, once with every query passing the verification and once
+with every query rejected, and prints p50/p95 and the model calls per request (the cancelled speculative work).
+
+uv run python -m benchmarks.speculative_verify --latency 0.1 --requests 20
+"""
+import asyncio
+import time
+import click
+from benchmarks.harness import BenchmarkChatModel, use_benchmark_model, percentile
+
+async def run(latency:float, requests:int):
+    model = BenchmarkChatModel(latency=latency)
+    use_benchmark_model(model)
+    from modules.chain.warmup import warm_up
+    chain = warm_up()
+    graphs = {"serial": chain._build_chain(speculative=False),"speculative": chain._build_chain(speculative=True)}
+    print(f"model latency {latency*1000:.0f} ms, {requests} sequential requests per row")
+    for verdict in ["complete","reject"]:
+        model.structured_fields = {"status": verdict}
+        for mode, graph in graphs.items():
+            chain._graph = graph
+            latencies:list[float] = []
+            calls = model.calls
+            for index in range(requests):
+                start = time.perf_counter()
+                await chain.call_main_graph(f"Plan a movie date on Sunday #{index}")
+                latencies.append(time.perf_counter() - start)
+            print(f"verify={verdict:<8} {mode:<11} p50={percentile(latencies,50)*1000:8.1f} ms p95={percentile(latencies,95)*1000:8.1f} ms "
+                  f"| model calls per request {(model.calls - calls) / requests:5.1f}")
+
+@click.command()
+@click.option("--latency","latency",default=0.1,help="Model latency per call in seconds")
+@click.option("--requests","requests",default=20)
+def main(latency,requests):
+    asyncio.run(run(latency,requests))
+
+if __name__ == "__main__":
+    main()
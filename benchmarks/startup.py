@@ -0,0 +1,75 @@
+"""
+Startup time of the portal.
+
+Starts benchmarks.offline_portal:app under uvicorn `--repeat` times and measures the time from process start until
+the port accepts connections and until /ready answers 200. Then runs the warm-up in this process and prints the
+per component report (the same table as `python -m modules.chain.warmup`).
+
+uv run python -m benchmarks.startup --repeat 3
+"""
+import os
+import socket
+import subprocess
+import sys
+import time
+import click
+import httpx
+from benchmarks.harness import BenchmarkChatModel, use_benchmark_model
+from benchmarks.offline_settings import ROOT
+
+def wait_port(port:int, timeout:float)->None:
+    limit = time.monotonic() + timeout
+    while time.monotonic() < limit:
+        try:
+            socket.create_connection(("127.0.0.1",port),timeout=0.05).close()
+            return
+        except OSError:
+            time.sleep(0.01)
+    raise TimeoutError(f"Port {port} not bound after {timeout}s")
+
+def wait_ready(port:int, timeout:float)->None:
+    limit = time.monotonic() + timeout
+    while time.monotonic() < limit:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/ready").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.05)
+    raise TimeoutError(f"Portal not ready after {timeout}s")
+
+def measure_server(port:int)->tuple[float,float]:
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable,"-m","uvicorn","benchmarks.offline_portal:app","--port",str(port),"--log-level","warning"],
+        cwd=ROOT,env={**os.environ,"BENCHMARK_LLM_LATENCY":"0"},stdout=subprocess.DEVNULL,stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_port(port,timeout=60)
+        bound = time.perf_counter() - start
+        wait_ready(port,timeout=300)
+        ready = time.perf_counter() - start
+    finally:
+        process.terminate()
+        process.wait()
+    return bound, ready
+
+@click.command()
+@click.option("--repeat","repeat",default=3)
+@click.option("--port","port",default=8110)
+@click.option("--sequential","sequential",is_flag=True,help="Report with the components built one by one")
+def main(repeat,port,sequential):
+    for run in range(repeat):
+        bound, ready = measure_server(port)
+        print(f"run {run+1}: port bound {bound*1000:8.1f} ms | /ready {ready*1000:8.1f} ms")
+
+    start = time.perf_counter()
+    use_benchmark_model(BenchmarkChatModel())
+    print(f"harness (settings, ociopen_ai and lang_fuse imports) {(time.perf_counter() - start)*1000:.1f} ms, not in the report below")
+    from modules.chain.warmup import StartupReport, warm_up
+    report = StartupReport()
+    warm_up(report,parallel=not sequential)
+    print(report.render())
+
+if __name__ == "__main__":
+    main()
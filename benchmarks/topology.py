@@ -0,0 +1,45 @@
+"""
+End-to-end latency of the react topology (agent_select text + executor ReAct agent) vs the fused one (typed
+assignments in one structured call, dispatched in code).
+
+Both run the full ChainManager graph on the benchmark model; every worker agent is selected in both, the react
+executor calls every worker tool in one step and the fused agent_select assigns every worker. Prints p50/p95 and
+the model calls per request.
+
+uv run python -m benchmarks.topology --latency 0.3 --requests 10
+"""
+import asyncio
+import time
+import click
+from benchmarks.harness import ToolCallingModel, use_benchmark_model, percentile
+
+async def run(latency:float, requests:int):
+    model = ToolCallingModel(latency=latency)
+    use_benchmark_model(model)
+    from modules.chain.warmup import warm_up
+    chain = warm_up()
+    model.structured_fields = {
+        "status": "complete",
+        "assignments": [{"agent": agent,"instruction": "execute the plan","context": "benchmark"} for agent in chain._worker_names],
+    }
+    graphs = {"react": chain._build_chain(topology="react"),"fused": chain._build_chain(topology="fused")}
+    print(f"model latency {latency*1000:.0f} ms, {requests} sequential requests per row, {len(chain._worker_names)} agents selected")
+    for topology, graph in graphs.items():
+        chain._graph = graph
+        latencies:list[float] = []
+        calls = model.calls
+        for index in range(requests):
+            start = time.perf_counter()
+            await chain.call_main_graph(f"Plan a movie date on Sunday #{index}")
+            latencies.append(time.perf_counter() - start)
+        print(f"{topology:<6} p50={percentile(latencies,50)*1000:8.1f} ms p95={percentile(latencies,95)*1000:8.1f} ms "
+              f"| model calls per request {(model.calls - calls) / requests:5.1f}")
+
+@click.command()
+@click.option("--latency","latency",default=0.3,help="Model latency per call in seconds")
+@click.option("--requests","requests",default=10)
+def main(latency,requests):
+    asyncio.run(run(latency,requests))
+
+if __name__ == "__main__":
+    main()
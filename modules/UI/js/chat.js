@@ -118,26 +118,50 @@ function hideLoader() {
   loaderInterval = null
 }
 
+function updateLoader(text) {
+  const textEl = document.getElementById("loader-text")
+  if (textEl) textEl.textContent = text
+}
+
+// Progress text shown when each chain node finishes
+const nodeProgress = {
+  verify: "Getting agent plans...",
+  verify_and_plan: "Selecting best agents...",
+  synthesizer: "Selecting best agents...",
+  agent_select: "Doing awesome agent team up!",
+  executor: "Great visuals comming...",
+}
+
 // ------------ END loader
 
-document.getElementById("sendBtn").addEventListener("click", async () => {
+document.getElementById("sendBtn").addEventListener("click", () => {
   const userInput = document.getElementById("userInput").value
 
-  showLoader() // just for visual representation
-
   if (!userInput.trim()) {
     alert("Please enter something")
     return
   }
 
-  try {
-    const response = await fetch(`http://localhost:8000/get-response?query=${encodeURIComponent(userInput)}`)
-    const data = await response.json()
+  showLoader() // just for visual representation
+  clearInterval(loaderInterval)
+
+  const source = new EventSource(`http://localhost:8000/stream-response?query=${encodeURIComponent(userInput)}`)
+
+  source.addEventListener("node", (event) => {
+    const data = JSON.parse(event.data)
+    updateLoader(nodeProgress[data.node] || `Finished ${data.node}...`)
+  })
+
+  source.addEventListener("result", (event) => {
+    source.close()
     hideLoader()
-    buildResponse(data.result)
-  } catch (error) {
+    buildResponse(JSON.parse(event.data).result)
+  })
+
+  source.onerror = (error) => {
+    source.close()
     hideLoader()
-    console.error("Error fetching data:", error)
-    document.getElementById('response').textContent = error
+    console.error("Error streaming data:", error)
+    document.getElementById('response').textContent = "Connection to the portal was lost"
   }
-});
\ No newline at end of file
+})
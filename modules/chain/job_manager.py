@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import math
+import time
+import uuid
+from typing import Any, Awaitable, Callable
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(name=f"JOB_MANAGER.{__name__}")
+
+class QueueFullError(Exception):
+    """ Raised when a job is submitted while the queue is at its max depth """
+
+    def __init__(self, retry_after:int):
+        super().__init__(f"Job queue is full, retry after {retry_after} s")
+        self.retry_after = retry_after
+
+class Job:
+    """ One queued chain run and its result """
+
+    def __init__(self, query:str, params:dict):
+        self.id = uuid.uuid4().hex
+        self.query = query
+        self.params = params
+        self.status = "queued"
+        self.result:Any = None
+        self.error:str|None = None
+        self.created_at = time.time()
+        self.started_at:float|None = None
+        self.finished_at:float|None = None
+        self.done = asyncio.Event()
+
+    def to_dict(self)->dict:
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+class JobManager:
+    """
+    Asynchronous job API backend:
+
+    * Jobs wait in a bounded queue, submit fails fast with QueueFullError when it is full
+    * A fixed pool of worker tasks runs at most `workers` chain calls at the same time
+    * Finished jobs are kept for `retention_seconds` so clients can poll the result
+    """
+
+    def __init__(self, runner:Callable[...,Awaitable[Any]], workers:int=4, max_queue:int=32, retention_seconds:float=600):
+        self._runner = runner
+        self._workers = workers
+        self._retention_seconds = retention_seconds
+        self._queue:asyncio.Queue[Job] = asyncio.Queue(maxsize=max_queue)
+        self._jobs:dict[str,Job] = {}
+        self._tasks:list[asyncio.Task] = []
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._total_run_seconds = 0.0
+
+    async def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self._workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks,return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self, index:int):
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            job.started_at = time.time()
+            self._running += 1
+            try:
+                job.result = await self._runner(job.query,**job.params)
+                job.status = "done"
+                self._completed += 1
+            except Exception as e:
+                logger.error(f"Job {job.id} failed on worker {index}: {e}")
+                job.error = str(e)
+                job.status = "error"
+                self._failed += 1
+            finally:
+                job.finished_at = time.time()
+                self._total_run_seconds += job.finished_at - job.started_at
+                self._running -= 1
+                job.done.set()
+                self._queue.task_done()
+
+    def _prune(self):
+        limit = time.time() - self._retention_seconds
+        expired = [job_id for job_id, job in self._jobs.items() if job.finished_at and job.finished_at < limit]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def retry_after(self)->int:
+        """ Seconds until a queue slot is likely free, from the average run time """
+        finished = self._completed + self._failed
+        average = self._total_run_seconds / finished if finished else 30.0
+        return max(1,math.ceil(average * (self._queue.qsize() + 1) / self._workers))
+
+    def submit(self, query:str, **params)->Job:
+        self._prune()
+        job = Job(query,params)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self._rejected += 1
+            raise QueueFullError(self.retry_after())
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id:str)->Job|None:
+        return self._jobs.get(job_id)
+
+    async def wait(self, job:Job, timeout:float)->Job:
+        """ Long-poll: returns when the job finishes or the timeout passes """
+        if timeout > 0:
+            try:
+                await asyncio.wait_for(job.done.wait(),timeout)
+            except asyncio.TimeoutError:
+                pass
+        return job
+
+    def stats(self)->dict:
+        return {
+            'workers': self._workers,
+            'queued': self._queue.qsize(),
+            'max_queue': self._queue.maxsize,
+            'running': self._running,
+            'completed': self._completed,
+            'failed': self._failed,
+            'rejected': self._rejected,
+            'tracked_jobs': len(self._jobs),
+        }
@@ -1,34 +1,42 @@
 import asyncio
 import logging
-from langgraph.graph import StateGraph, START, MessagesState, END
+from langgraph.graph import StateGraph, START, END
 from modules.cluster.verification import VerificationAgent
 from modules.cluster.planner import PlannerAgent
 from modules.cluster.executor import ExecutorAgent
 from modules.util.lang_fuse import FuseConfig
 from modules.cluster.worker_manager import WorkerManager
 from modules.cluster.layout_builder import LayoutAgent
-from typing import Annotated
-from langchain_core.messages import AnyMessage
-from langgraph.graph import add_messages
+from modules.cluster.skill_router import SkillRouter
+from modules.cluster.capability_manifest import ManifestPlanner
+from modules.util.session import new_session_id
+from modules.util.states import LayoutState
+from modules.util.plan_store import render_plans, plans_chars
+from modules.util.deadline import BUDGET_KEY, DEADLINE_KEY, get_budget, get_deadline, remaining, reserve, run_until, timed_out
+from modules.util.progress import PROGRESS_KEY, Progress
+from modules.util.metrics import MetricsCallbackHandler, DEADLINE_TIMEOUTS, STATE_CHARS
+from modules.util.config.config import Settings
+from langchain_core.runnables import RunnableConfig
+from typing import AsyncIterator
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(name=f"LAYOUT_GRAPH.{__name__}")
 
-class LayoutState(MessagesState):
-    """ Message state with extra information about execution step and plan compilation """
-    status: str
-    plans: Annotated[list[AnyMessage], add_messages]
-
 class ChainManager:
     """ 
     Class to hold the graph management and calls:
 
     * Gets all the intances from the chain agents to call
     * Use the Layoutstate to control information
+    * chain.speculative_verification in the yaml starts the plan fan-out together with the verification
+    * chain.topology in the yaml selects the ReAct executor or the fused assignment dispatch
     """
     _instance = None
     _initialized = False
 
+    PREVIEW_LENGTH = 280
+    INCOMPLETE = ('timeout','unavailable')
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(ChainManager,cls).__new__(cls)
@@ -36,75 +44,217 @@ class ChainManager:
     
     def __init__(self):
         if not self._initialized:
+            self._settings = Settings(r"C:\Users\Cristopher Hdz\Desktop\ai_portal\modules\util\config\config.yaml")
             self._fuse_tracer = FuseConfig()
             self._trace_handler = self._fuse_tracer.get_handler()
+            self._metrics_handler = MetricsCallbackHandler()
             self._verification_agent = VerificationAgent()
             self._planner_hub = PlannerAgent()
             self._executor_hub = ExecutorAgent()
             self._workers_hub = WorkerManager()
             self._layout_hub = LayoutAgent()
-            self._build_chain()
+            self._skill_router = SkillRouter()
+            self._manifest_planner = ManifestPlanner()
+            self._worker_names = [agent[0] for agent in self._workers_hub.agent_list]
+            chain = self._settings.chain
+            self._graph = self._build_chain(bool(chain and chain.speculative_verification),chain.get("topology","react") if chain else "react")
             ChainManager._initialized = True
     
     def _synthesizer(self,state:LayoutState):
-        """Synthesize full agent plans form the list to pass to executor"""
+        """ Joins the plan store, one compacted section per agent (plans.max_chars), into the message for agent_select """
+        max_chars = self._settings.plans.get("max_chars") if self._settings.plans else None
+        full_plan = render_plans(state.get("plans") or {},self._worker_names,max_chars)
+        STATE_CHARS.observe(sum(len(str(message.content)) for message in state["messages"]),part="messages")
+        STATE_CHARS.observe(plans_chars(state.get("plans")),part="plans")
+        STATE_CHARS.observe(len(full_plan),part="compacted_plans")
 
-        full_plan = []
+        return {"messages": [{"role": "assistant", "content": full_plan}],'status':'execute'}
 
-        for plan in state["plans"]:
-            details = plan.content
-            full_plan.append(details)
+    def _route_plans(self,state:LayoutState)->list[str]:
+        """ Worker plan nodes that receive the broadcast, all of them unless the skill router is enabled """
+        return self._skill_router.select(state["messages"][0].content,self._worker_names)
 
-        return {"messages": [{"role": "assistant", "content": full_plan}],'status':'execute','plans':full_plan}
+    @staticmethod
+    def _plan_until_deadline(agent_name:str,plan_node):
+        """ Worker plan node cut by the request deadline (minus the report and layout reserves), the plan is then a timed out marker """
+        async def plan(state:LayoutState,config:RunnableConfig)->LayoutState:
+            try:
+                return await run_until(plan_node(state,config),get_deadline(config),reserve('report_reserve','layout_reserve',budget=get_budget(config)))
+            except TimeoutError:
+                DEADLINE_TIMEOUTS.inc(stage="plan")
+                return {'plans': {agent_name: timed_out(agent_name)}}
+        return plan
 
-    def _build_chain(self):
-        main_graph_builder = StateGraph(LayoutState)
+    def _add_plan_nodes(self,builder:StateGraph,entry:str):
+        """ planner -> routed worker plan nodes (LLM or capability manifest), the workers end in `entry` """
+        builder.add_node("planner",self._planner_hub.acall_planner_agent)
+        for agent in self._workers_hub.agent_list:
+            builder.add_node(agent[0],self._plan_until_deadline(agent[0],self._manifest_planner.node(agent[0],agent[1])))
+            builder.add_edge(agent[0],entry)
+        builder.add_conditional_edges("planner",self._route_plans,self._worker_names)
 
-        main_graph_builder.add_node("verify",self._verification_agent.verify_query)
-        main_graph_builder.add_node("planner",self._planner_hub.call_planner_agent)
-        main_graph_builder.add_node("agent_select",self._planner_hub.call_planner_agent)
-        main_graph_builder.add_node("executor",self._executor_hub.call_executor_agent)
-        main_graph_builder.add_node("layout",self._layout_hub.call_layout_builder)
+    def _build_plan_graph(self):
+        """ Plan broadcast alone, run by the speculative node while the verification is in flight """
+        plan_graph_builder = StateGraph(LayoutState)
+        self._add_plan_nodes(plan_graph_builder,END)
+        plan_graph_builder.add_edge(START,"planner")
+        return plan_graph_builder.compile()
 
-        for agent in self._workers_hub.agent_list:
-            main_graph_builder.add_node(agent[0],agent[1])
+    async def _verify_and_plan(self,state:LayoutState,config:RunnableConfig):
+        """
+        Speculative verification:
 
-        main_graph_builder.add_node("synthesizer",self._synthesizer)
+        * The verification and the plan broadcast start at the same time
+        * On reject the plan task is cancelled and only the verification message is kept (Fail branch)
+        * On pass the plans are returned as if the plan nodes had run after the verification
+        """
+        plan_task = asyncio.create_task(self._plan_graph.ainvoke(state,config))
+        try:
+            verdict = await self._verification_agent.averify_query(state,config)
+        except BaseException:
+            plan_task.cancel()
+            await asyncio.gather(plan_task,return_exceptions=True)
+            raise
+        if verdict["messages"][-1]["content"] == 'reject':
+            plan_task.cancel()
+            await asyncio.gather(plan_task,return_exceptions=True)
+            logger.debug("Speculative plans cancelled, query rejected")
+            return verdict
+        plans = await plan_task
+        return {"messages": verdict["messages"] + plans["messages"][len(state["messages"]):],'plans':plans.get("plans",{}),'status':plans.get("status","execute")}
 
-        main_graph_builder.add_edge(START,"verify")
-        
-        main_graph_builder.add_conditional_edges(
-            "verify", self._verification_agent.verification_check, {"Fail": "layout", "Pass": "planner"}
-        )
+    def _build_chain(self,speculative:bool=False,topology:str="react"):
+        """
+        Main graph, `topology` selects the execution stage:
 
-        for agent in self._workers_hub.agent_list:
-            main_graph_builder.add_edge("planner",agent[0])
-            main_graph_builder.add_edge(agent[0],"synthesizer")
+        * react: agent_select writes the assignments as text and the executor ReAct agent calls the worker tools
+        * fused: agent_select returns typed assignments in one structured call and the executor dispatches them in code
+        """
+        main_graph_builder = StateGraph(LayoutState)
+
+        if topology == "fused":
+            main_graph_builder.add_node("agent_select",self._planner_hub.aassign_agents)
+            main_graph_builder.add_node("executor",self._executor_hub.dispatch_assignments)
+        else:
+            main_graph_builder.add_node("agent_select",self._planner_hub.acall_planner_agent)
+            main_graph_builder.add_node("executor",self._executor_hub.call_executor_agent)
+        main_graph_builder.add_node("layout",self._layout_hub.call_layout_builder)
+        main_graph_builder.add_node("synthesizer",self._synthesizer)
+
+        if speculative:
+            self._plan_graph = self._build_plan_graph()
+            main_graph_builder.add_node("verify_and_plan",self._verify_and_plan)
+            main_graph_builder.add_edge(START,"verify_and_plan")
+            main_graph_builder.add_conditional_edges(
+                "verify_and_plan", self._verification_agent.verification_check, {"Fail": "layout", "Pass": "synthesizer"}
+            )
+        else:
+            main_graph_builder.add_node("verify",self._verification_agent.averify_query)
+            self._add_plan_nodes(main_graph_builder,"synthesizer")
+            main_graph_builder.add_edge(START,"verify")
+            main_graph_builder.add_conditional_edges(
+                "verify", self._verification_agent.verification_check, {"Fail": "layout", "Pass": "planner"}
+            )
 
         main_graph_builder.add_edge("synthesizer","agent_select")
         main_graph_builder.add_edge("agent_select","executor")
         main_graph_builder.add_edge("executor","layout")
 
-        self._graph = main_graph_builder.compile()
+        return main_graph_builder.compile()
+
+    def _run_config(self, session_id:str|None=None, deadline:float|None=None, progress:Progress|None=None)->dict:
+        """ Config for one graph run, the thread id is the client session or a new one per request, the deadline and progress callback reach every agent call """
+        thread_id = session_id or new_session_id()
+        configurable = {'thread_id': thread_id}
+        if deadline is not None:
+            configurable[DEADLINE_KEY] = deadline
+            configurable[BUDGET_KEY] = remaining(deadline)
+        if progress is not None:
+            configurable[PROGRESS_KEY] = progress
+        return {'configurable': configurable,'callbacks':[self._trace_handler,self._metrics_handler],'metadata':{'langfuse_session_id':thread_id}}
+
+    @staticmethod
+    def _node_content(update)->str:
+        """ Gets the text of the last message written by a node update, or the plans it stored """
+        try:
+            message = update['messages'][-1]
+            content = message['content'] if isinstance(message,dict) else message.content
+            return content if isinstance(content,str) else str(content)
+        except (KeyError, IndexError, TypeError):
+            plans = update.get('plans') if isinstance(update,dict) else None
+            return "\n".join(plans.values()) if plans else ""
+
+    @staticmethod
+    def _node_guardrail(update)->str|None:
+        """ Executor limit that stopped the ReAct loop, kept in the response metadata of its message """
+        try:
+            return update['messages'][-1].response_metadata.get('guardrail')
+        except (KeyError, IndexError, TypeError, AttributeError):
+            return None
+
+    async def stream_main_graph(self, user_input:str, session_id:str|None=None, deadline:float|None=None, agent_events:bool=True)->AsyncIterator[dict]:
+        """
+        Streams the graph run node by node:
+
+        * Yields {'event':'node','node':name,'preview':text} as soon as each node finishes, with 'guardrail' when an executor limit fired
+        * With `agent_events` yields {'event':'agent','agent':name,'state':state,'preview':text} while the remote agents work (A2A streaming)
+        * Yields {'event':'final','content':text,'status':status} at the end with the last message (layout JSON or error),
+          status is 'timeout' when a node was cut by the deadline during the run, 'unavailable' when an agent could not
+          be reached, else the last status of the graph
+        * `deadline` (epoch seconds) cuts the unfinished agents, the layout then shows the finished sections
+        """
+        events:asyncio.Queue[dict|None] = asyncio.Queue()
+        final_response = ""
+        status = ""
 
-    async def call_main_graph(self, user_input:str)->str:
+        async def run_graph():
+            nonlocal final_response, status
+            try:
+                async for chunk in self._graph.astream( {"messages": [{"role": "user", "content": user_input}],'status':'plan'},
+                    self._run_config(session_id,deadline,events.put_nowait if agent_events else None),
+                    stream_mode="updates"
+                ):
+                    for node, update in chunk.items():
+                        content = self._node_content(update)
+                        if content:
+                            final_response = content
+                        if isinstance(update,dict) and update.get('status') and status not in self.INCOMPLETE:
+                            status = update['status']
+                        elif isinstance(update,dict) and update.get('status') == 'timeout':
+                            status = 'timeout'
+                        event = {'event':'node','node':node,'preview':content[:self.PREVIEW_LENGTH]}
+                        guardrail = self._node_guardrail(update)
+                        if guardrail:
+                            event['guardrail'] = guardrail
+                        events.put_nowait(event)
+            except Exception as e:
+                # logger.info(f'General error: {e}')
+                final_response, status = f'General error: {e}', 'error'
+            finally:
+                events.put_nowait(None)
+
+        # The graph runs in its own task so the agent events it reports are yielded while the nodes are still running
+        task = asyncio.create_task(run_graph())
         try:
-            final_response = []
-            async for chunk in self._graph.astream( {"messages": [{"role": "user", "content": user_input}],'status':'plan'},
-                {'configurable': {'thread_id': "1"},'callbacks':[self._trace_handler],'metadata':{'langfuse_session_id':self._fuse_tracer.generate_id()}},
-                stream_mode="values",
-                subgraphs=True
-            ):
-                try:
-                    # logger.debug("============ Chunk response ==========\n")
-                    # logger.debug(chunk[-1])
-                    final_response.append(chunk[-1]['messages'][-1].content)
-                except Exception as p:
-                    final_response.append(f"Error in response: {p}")
-            return final_response[-1]
-        except Exception as e:
-            # logger.info(f'General error: {e}')
-            return f'General error: {e}'
+            while (event := await events.get()) is not None:
+                yield event
+            await task
+        finally:
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task,return_exceptions=True)
+        yield {'event':'final','content':final_response,'status':status}
+
+    async def run_main_graph(self, user_input:str, session_id:str|None=None, deadline:float|None=None)->tuple[str,str]:
+        """ Final message and status of the run (see stream_main_graph), the portal only caches complete answers """
+        async for event in self.stream_main_graph(user_input,session_id,deadline,agent_events=False):
+            if event['event'] == 'final':
+                return event['content'], event['status']
+        return "", ""
+
+    async def call_main_graph(self, user_input:str, session_id:str|None=None, deadline:float|None=None)->str:
+        final_response, _ = await self.run_main_graph(user_input,session_id,deadline)
+        return final_response
 
 async def main():
     chain = ChainManager()
@@ -0,0 +1,141 @@
+"""
+Startup of the agent singletons, off the import path of the portal:
+
+* Imports run one component at a time (imports hold the module locks, threads would not make them faster)
+* Construction runs in parallel stages, a stage waits for the one before (the executor needs the worker manager)
+* The registries every agent shares (LLM clients, checkpointers, agent cards) are built first, one at a time
+* A failed warm-up can run again with the same report, it starts from an empty one
+* Every component is timed, `python -m modules.chain.warmup` prints the report in the style of python -X importtime
+"""
+import importlib
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+import click
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(name=f"WARMUP.{__name__}")
+
+# (component, module, attribute called to build it)
+STAGES:list[list[tuple[str,str,str]]] = [
+    [("llm_clients","modules.util.ociopen_ai","LLM_Open_Client")],
+    [("checkpointers","modules.util.checkpointer","CheckpointerRegistry")],
+    [("agent_cards","modules.util.a2a_calls","agent_cards")],
+    [
+        ("tracing","modules.util.lang_fuse","FuseConfig"),
+        ("cinema_agent","modules.cluster.workers.cinema_agent","CinemaAgent"),
+        ("food_agent","modules.cluster.workers.food_agent","FoodAgent"),
+        ("decoration_agent","modules.cluster.workers.decoration_agent","DecorationAgent"),
+        ("weather_agent","modules.cluster.workers.weather_agent","WeatherAgent"),
+        ("file_agent","modules.cluster.workers.file_agent","FileAgent"),
+        ("verification","modules.cluster.verification","VerificationAgent"),
+        ("planner","modules.cluster.planner","PlannerAgent"),
+        ("layout","modules.cluster.layout_builder","LayoutAgent"),
+        ("ui_schemas","modules.cluster.layout_builder","load_schemas"),
+        ("skill_router","modules.cluster.skill_router","SkillRouter"),
+        ("manifests","modules.cluster.capability_manifest","ManifestPlanner"),
+    ],
+    [("worker_manager","modules.cluster.worker_manager","WorkerManager")],
+    [("executor","modules.cluster.executor","ExecutorAgent")],
+    [("chain","modules.chain.layout_graph","ChainManager")],
+]
+
+class ComponentTiming:
+    """ Import and init time of one startup component """
+
+    def __init__(self, name:str, stage:int, import_seconds:float=0.0):
+        self.name = name
+        self.stage = stage
+        self.import_seconds = import_seconds
+        self.init_seconds = 0.0
+
+class StartupReport:
+    """ Per component import and init times of one warm-up """
+
+    def __init__(self):
+        self.parallel = True
+        self.components:list[ComponentTiming] = []
+        self.import_seconds = 0.0
+        self.init_seconds = 0.0
+        self.total_seconds = 0.0
+        self.done = False
+        self.error:str|None = None
+
+    def to_dict(self)->dict:
+        return {
+            'parallel': self.parallel,
+            'done': self.done,
+            'error': self.error,
+            'import_ms': round(self.import_seconds*1000,1),
+            'init_ms': round(self.init_seconds*1000,1),
+            'total_ms': round(self.total_seconds*1000,1),
+            'components': [
+                {'name': c.name,'stage': c.stage,'import_ms': round(c.import_seconds*1000,1),'init_ms': round(c.init_seconds*1000,1)}
+                for c in self.components
+            ],
+        }
+
+    def render(self)->str:
+        """ Text table like python -X importtime, one line per component and the totals """
+        lines = ["startup time: import [ms] |   init [ms] | stage | component"]
+        for c in self.components:
+            lines.append(f"startup time: {c.import_seconds*1000:11.1f} | {c.init_seconds*1000:11.1f} | {c.stage:>5} | {c.name}")
+        summed = sum(c.init_seconds for c in self.components)
+        mode = "parallel" if self.parallel else "sequential"
+        lines.append(f"startup time: {self.import_seconds*1000:11.1f} | {self.init_seconds*1000:11.1f} |     - | total, {mode} init (sum of inits {summed*1000:.1f} ms)")
+        lines.append(f"startup time: {self.total_seconds*1000:.1f} ms wall")
+        if self.error:
+            lines.append(f"startup error: {self.error}")
+        return "\n".join(lines)
+
+def _import_components(report:StartupReport)->dict[str,object]:
+    builders = {}
+    for stage, components in enumerate(STAGES):
+        for name, module, attribute in components:
+            start = time.perf_counter()
+            builders[name] = getattr(importlib.import_module(module),attribute)
+            report.components.append(ComponentTiming(name,stage,import_seconds=time.perf_counter() - start))
+    return builders
+
+def _init_component(timing:ComponentTiming, builder)->object:
+    start = time.perf_counter()
+    instance = builder()
+    timing.init_seconds = time.perf_counter() - start
+    return instance
+
+def warm_up(report:StartupReport|None=None, parallel:bool=True):
+    """ Builds the agent singletons of this process so no request pays for the cold init, returns the ChainManager """
+    report = report if report is not None else StartupReport()
+    report.parallel = parallel
+    report.components, report.done, report.error = [], False, None
+    start = time.perf_counter()
+    try:
+        builders = _import_components(report)
+        report.import_seconds = time.perf_counter() - start
+        timings = {timing.name: timing for timing in report.components}
+        instances = {}
+        init_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(len(stage) for stage in STAGES) if parallel else 1,thread_name_prefix="warmup") as pool:
+            for components in STAGES:
+                futures = {name: pool.submit(_init_component,timings[name],builders[name]) for name, _, _ in components}
+                for name, future in futures.items():
+                    instances[name] = future.result()
+        report.init_seconds = time.perf_counter() - init_start
+    except Exception as e:
+        report.error = str(e)
+        raise
+    finally:
+        report.total_seconds = time.perf_counter() - start
+        report.done = True
+    logger.info(f"Agent singletons ready in {report.total_seconds:.2f}s")
+    return instances["chain"]
+
+@click.command()
+@click.option("--sequential","sequential",is_flag=True,help="Build the components one by one instead of in parallel stages")
+def main(sequential):
+    report = StartupReport()
+    warm_up(report,parallel=not sequential)
+    print(report.render())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import logging
+from typing import Awaitable, Callable
+from a2a.types import AgentCard
+from langchain_core.runnables import RunnableConfig
+from modules.util.config.config import Settings
+from modules.util.a2a_calls import agent_cards
+from modules.util.states import LayoutState
+from modules.cluster.skill_router import SkillIndex
+from modules.util.query_slots import extract_slots
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(name=f"CAPABILITY_MANIFEST.{__name__}")
+
+def build_manifest(agent_name:str, card:AgentCard, query:str, slots:dict[str,list[str]], skill_scores:dict[tuple[str,str],float])->str:
+    """ Plan text of one worker made from its agent card, the skills closest to the query go first """
+    skills = sorted(card.skills,key=lambda skill: skill_scores.get((agent_name,skill.id),0.0),reverse=True)
+    details = ", ".join(f"{slot}: {' / '.join(values)}" for slot, values in slots.items() if values) or "none given, decide on behalf of the user"
+    lines = [
+        f"Agent: {agent_name} ({card.name})",
+        f"Expertise: {card.description}",
+        "Skills (most relevant to the query first):",
+    ]
+    for skill in skills:
+        examples = f" Example: {skill.examples[0]}" if skill.examples else ""
+        lines.append(f"- {skill.name}: {skill.description}.{examples}")
+    lines.extend([
+        f"Request details: {details}",
+        f"Plan: cover the parts of \"{query}\" that match the skills above, using the request details, and state that "
+        "the parts outside this expertise are not addressed by this agent.",
+    ])
+    return "\n".join(lines)
+
+class ManifestPlanner:
+    """
+    Plan phase without model calls (`plans.mode: manifest` in the yaml):
+
+    * The plan of every worker is a capability manifest built from its remote agent card and the query slots
+    * Workers whose agent card could not be fetched, and `plans.mode: llm`, use the LLM plan node as before
+    """
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ManifestPlanner,cls).__new__(cls)
+            cls._instance._init()
+        return cls._instance
+
+    def _init(self):
+        if self._initialized:
+            return
+        self._settings = Settings(r"C:\Users\Cristopher Hdz\Desktop\ai_portal\modules\util\config\config.yaml")
+        self.mode = self._settings.plans.mode if self._settings.plans else "llm"
+        self._cards:dict[str,AgentCard] = {}
+        self._index:SkillIndex|None = None
+        self.manifests = 0
+        self.fallbacks = 0
+        if self.mode == "manifest":
+            self.load(agent_cards())
+        self._initialized = True
+
+    def load(self, cards:dict[str,AgentCard]):
+        self._cards = dict(cards)
+        self._index = SkillIndex(self._cards)
+
+    def manifest(self, agent_name:str, query:str)->str|None:
+        """ Manifest plan of `agent_name` for `query`, None when the LLM plan has to be used """
+        if self.mode != "manifest" or agent_name not in self._cards:
+            return None
+        return build_manifest(agent_name,self._cards[agent_name],query,extract_slots(query),self._index.skill_scores(query))
+
+    def node(self, agent_name:str, llm_plan:Callable[[LayoutState,RunnableConfig],Awaitable[LayoutState]]):
+        """ Plan node of `agent_name` for the graph, falls back to `llm_plan` """
+        async def plan(state:LayoutState, config:RunnableConfig)->LayoutState:
+            manifest = self.manifest(agent_name,state['messages'][0].content)
+            if manifest is None:
+                self.fallbacks += 1
+                return await llm_plan(state,config)
+            self.manifests += 1
+            return {'plans': {agent_name: manifest}}
+        return plan
+
+    def stats(self)->dict:
+        return {'mode': self.mode,'agents_with_card': list(self._cards),'manifests': self.manifests,'llm_fallbacks': self.fallbacks}
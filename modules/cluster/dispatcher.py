@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable
+from modules.util.metrics import registry
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(name=f"DISPATCHER.{__name__}")
+
+DISPATCH_SECONDS = registry.histogram("dispatch_duration_seconds","Worker dispatch of one request: wall time, critical path and total work",("kind",))
+
+class DispatchReport:
+    """ Timings of one dispatch, the critical path is the longest chain of dependent agent runs """
+
+    def __init__(self):
+        self.durations:dict[str,float] = {}
+        self.depends_on:dict[str,list[str]] = {}
+        self.wall = 0.0
+
+    @property
+    def total_work(self)->float:
+        return sum(self.durations.values())
+
+    @property
+    def critical_path(self)->float:
+        finish:dict[str,float] = {}
+        def path(agent:str)->float:
+            if agent not in finish:
+                finish[agent] = self.durations.get(agent,0.0) + max((path(dep) for dep in self.depends_on.get(agent,[])),default=0.0)
+            return finish[agent]
+        return max((path(agent) for agent in self.durations),default=0.0)
+
+    def to_dict(self)->dict:
+        return {
+            'wall_seconds': round(self.wall,3),
+            'critical_path_seconds': round(self.critical_path,3),
+            'total_work_seconds': round(self.total_work,3),
+            'agents': {agent: round(seconds,3) for agent, seconds in self.durations.items()},
+            'depends_on': self.depends_on,
+        }
+
+def dependency_graph(assignments:list[dict])->dict[str,list[str]]:
+    """ Edges of the assignments DAG: only dependencies on other assigned agents, edges closing a cycle are dropped """
+    agents = [item['agent'] for item in assignments]
+    graph = {item['agent']: [dep for dep in dict.fromkeys(item.get('depends_on') or []) if dep in agents and dep != item['agent']] for item in assignments}
+    def reaches(start:str, target:str, seen:set[str])->bool:
+        if start == target:
+            return True
+        seen.add(start)
+        return any(reaches(dep,target,seen) for dep in graph[start] if dep not in seen)
+    for agent in agents:
+        for dep in list(graph[agent]):
+            graph[agent].remove(dep)
+            if not reaches(dep,agent,set()):
+                graph[agent].append(dep)
+            else:
+                logger.warning(f"Dependency {agent} -> {dep} closes a cycle, dropped")
+    return graph
+
+class AssignmentDispatcher:
+    """
+    Runs the assignments of one request as a small DAG:
+
+    * An agent starts once the agents it depends on finished, their results are added to its context
+    * Independent branches run together with asyncio.gather, at most `max_concurrency` agents at a time
+    * A failing agent gives an ERROR result instead of stopping the others
+    """
+
+    def __init__(self, max_concurrency:int=5):
+        self.max_concurrency = max(1,max_concurrency)
+
+    async def run(self, assignments:list[dict], call:Callable[[dict],Awaitable[str]])->tuple[dict[str,str],DispatchReport]:
+        report = DispatchReport()
+        report.depends_on = dependency_graph(assignments)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        done:dict[str,asyncio.Future] = {item['agent']: asyncio.get_running_loop().create_future() for item in assignments}
+        results:dict[str,str] = {}
+
+        async def run_one(item:dict):
+            agent_name = item['agent']
+            try:
+                upstream = [(dep,await done[dep]) for dep in report.depends_on[agent_name]]
+                context = item['context'] + "".join(f"\n\nResult of {dep}:\n{output}" for dep, output in upstream)
+                async with semaphore:
+                    start = time.perf_counter()
+                    try:
+                        results[agent_name] = await call({**item,'context': context})
+                    except Exception as e:
+                        logger.error(f"{agent_name} failed: {e}")
+                        results[agent_name] = f"ERROR: {agent_name} could not complete the task: {e}"
+                    report.durations[agent_name] = time.perf_counter() - start
+            finally:
+                if not done[agent_name].done():
+                    done[agent_name].set_result(results.get(agent_name,""))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(run_one(item) for item in assignments))
+        report.wall = time.perf_counter() - start
+        DISPATCH_SECONDS.observe(report.wall,kind="wall")
+        DISPATCH_SECONDS.observe(report.critical_path,kind="critical_path")
+        DISPATCH_SECONDS.observe(report.total_work,kind="total_work")
+        logger.info(f"Dispatch {report.to_dict()}")
+        return {item['agent']: results[item['agent']] for item in assignments}, report
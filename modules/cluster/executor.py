@@ -1,18 +1,40 @@
-from langgraph.checkpoint.memory import MemorySaver
+from modules.util.checkpointer import build_checkpointer
 from langgraph.prebuilt import create_react_agent
 from modules.util.ociopen_ai import LLM_Open_Client
 import logging
 import asyncio
 from langgraph.graph import MessagesState
 from modules.cluster.worker_manager import WorkerManager
-from modules.util.lang_fuse import FuseConfig
+from modules.cluster.dispatcher import AssignmentDispatcher
+from modules.cluster.guardrails import ExecutorGuardrails
+from modules.util.config.config import Settings
+from modules.util.session import agent_config
+from modules.util.states import LayoutState
+from langchain_core.runnables import RunnableConfig
+from langchain_core.messages import AIMessage, AnyMessage, ToolMessage
+from modules.util.deadline import TIMED_OUT, get_budget, get_deadline, reserve, run_until, timed_out
+from modules.util.metrics import DEADLINE_TIMEOUTS
+from modules.util.circuit_breaker import UNAVAILABLE
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(name=f"EXECUTOR_AGENT.{__name__}")
 
-fuse_tracer = FuseConfig()
-id = fuse_tracer.generate_id()
-trace_handler = fuse_tracer.get_handler()
+def partial_report(messages:list[AnyMessage])->str:
+    """
+    Report of an executor run cut by the deadline, built from its checkpointed messages:
+
+    * One section per agent call with the agent answer
+    * Calls without an answer are marked as timed out
+    """
+    results = {message.tool_call_id: message.content for message in messages if isinstance(message,ToolMessage)}
+    sections = []
+    for message in messages:
+        for call in getattr(message,'tool_calls',None) or []:
+            agent_name = call['name'].removeprefix("call_")
+            sections.append(f"## {agent_name}\n{results.get(call['id']) or timed_out(agent_name)}")
+    if not sections:
+        sections.append(f"## executor\n{timed_out('executor')}, no agent results were collected")
+    return "Agents & Work Results (partial, request deadline reached):\n\n" + "\n\n".join(sections)
 
 class ExecutorAgent:
     """ Agent expert in executing plans, adding tasks and working with agents to solve the user query """
@@ -35,6 +57,7 @@ class ExecutorAgent:
         Monitor and Coordinate Agent Activity:
         - Continuously monitor agent responses and progress for each task.
         - If an agent does not respond or completes a task incompletely, retry, re-issue instructions, or make practical user-centered decisions on the users behalf (clearly mark such decisions).
+        - If an agent answers "AGENT UNAVAILABLE", do not call it again: continue with the other agents and report its tasks as not done.
         - Sequence tasks and coordinate the order of execution as needed, especially where dependencies exist.
         - If agents must share outputs, facilitate needed information transfer via available tools (never via direct agent-to-agent interface).
         
@@ -71,6 +94,8 @@ class ExecutorAgent:
         """
     )
 
+    QUERY_PREFIX = "Current agent plan selection and tasks"
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(ExecutorAgent,cls).__new__(cls)
@@ -80,31 +105,91 @@ class ExecutorAgent:
         if not self._initialized:
             self._oci_client = LLM_Open_Client()
             self._model = self._oci_client.build_llm_client()
-            self._memory = MemorySaver()
+            self._memory = build_checkpointer("executor")
             self._worker_hub = WorkerManager()
+            self._settings = Settings(r"C:\Users\Cristopher Hdz\Desktop\ai_portal\modules\util\config\config.yaml")
             self._tools = self._worker_hub.agent_tools
+            # No cap below the worker count by default, a plan that assigns every agent runs in one wave
+            max_concurrency = self._settings.dispatcher.max_concurrency if self._settings.dispatcher else 0
+            self._dispatcher = AssignmentDispatcher(max_concurrency or len(self._worker_hub.tools_by_agent))
+            limits = self._settings.executor
+            self._guardrails = ExecutorGuardrails(
+                self.QUERY_PREFIX,
+                list(self._worker_hub.tools_by_agent),
+                self.SYSTEM_INSTRUCTION,
+                max_iterations=limits.max_iterations if limits else 0,
+                max_tool_calls_per_agent=limits.max_tool_calls_per_agent if limits else 0,
+                max_prompt_tokens=limits.max_prompt_tokens if limits else 0,
+                stop_when_done=bool(limits.stop_when_done) if limits else False,
+            )
             self._executor_agent = create_react_agent(
                 model=self._model,
                 tools=self._tools,
                 checkpointer=self._memory,
                 prompt=self.SYSTEM_INSTRUCTION,
+                post_model_hook=self._guardrails,
             )
             ExecutorAgent._initialized = True
 
-    async def call_executor_agent(self, state:MessagesState):
+    async def call_executor_agent(self, state:MessagesState, config:RunnableConfig):
 
         logger.debug("\nEntered executor ===============\n")
 
-        query = f"Current agent plan selection and tasks\n: {state['messages'][-1].content}"
-        response = await self._executor_agent.ainvoke(
-            {"messages": [{"role": "assistant", "content": query}]},
-            {'configurable': {'thread_id': id},'callbacks':[trace_handler],'metadata':{'langfuse_session_id':id}}
-        )
+        query = f"{self.QUERY_PREFIX}\n: {state['messages'][-1].content}"
+        executor_config = agent_config(config)
+        deadline = get_deadline(config)
+        history = len((await self._executor_agent.aget_state(executor_config)).values.get('messages',[])) if deadline else 0
+        try:
+            response = await run_until(
+                self._executor_agent.ainvoke({"messages": [{"role": "assistant", "content": query}]},executor_config),
+                deadline,
+                reserve('layout_reserve',budget=get_budget(config))
+            )
+        except TimeoutError:
+            logger.warning("Executor cut by the request deadline, reporting the finished agents")
+            DEADLINE_TIMEOUTS.inc(stage="executor")
+            messages = (await self._executor_agent.aget_state(executor_config)).values.get('messages',[])[history:]
+            return {"messages": [{"role": "assistant", "content": partial_report(messages)}],'status':'timeout'}
 
         ans = response['messages'][-1].content
         logger.debug(str(ans))
-        
-        return {"messages": [{"role": "assistant", "content": ans}],'status':'execute'}
+        guardrail = response['messages'][-1].response_metadata.get('guardrail')
+        metadata = {'guardrail': guardrail} if guardrail else {}
+        cut = [message.name.removeprefix("call_") for message in response['messages'][history:] if isinstance(message,ToolMessage) and str(message.content).startswith(TIMED_OUT)]
+        if cut:
+            # Some agents were cut by the deadline, the markers are kept for the layout even if the report left them out
+            ans += "".join(f"\n\n## {agent_name}\n{timed_out(agent_name)}" for agent_name in cut if timed_out(agent_name) not in ans)
+            return {"messages": [AIMessage(content=ans,response_metadata=metadata)],'status':'timeout'}
+        # An agent that could not be reached makes the answer incomplete, the status keeps it out of the response cache
+        unavailable = any(isinstance(message,ToolMessage) and UNAVAILABLE in str(message.content) for message in response['messages'][history:])
+        return {"messages": [AIMessage(content=ans,response_metadata=metadata)],'status':'unavailable' if unavailable else 'execute'}
+
+    async def dispatch_assignments(self, state:LayoutState, config:RunnableConfig):
+        """
+        Fused executor: the assignments of agent_select go straight to the worker tools, without a ReAct pass:
+
+        * The assignments run as a DAG (dispatcher.max_concurrency agents at a time), each agent cut by the request deadline as with the executor tools
+        * The report has one section per agent with its answer, the layout builds the UI from it
+        """
+        logger.debug("\nEntered assignment dispatch ===============\n")
+
+        tools = self._worker_hub.tools_by_agent
+        assignments = [item for item in state.get('assignments') or [] if item['agent'] in tools]
+
+        async def call(item:dict)->str:
+            return await tools[item['agent']].ainvoke({"instruction": item['instruction'],"context": item['context']},config)
+
+        results, _ = await self._dispatcher.run(assignments,call)
+        sections = [f"## {agent_name}\n{result}" for agent_name, result in results.items()]
+        ans = "Agents & Work Results:\n\n" + ("\n\n".join(sections) if sections else "No agent was assigned to the user query")
+        logger.debug(ans)
+
+        status = 'execute'
+        if any(str(result).startswith(TIMED_OUT) for result in results.values()):
+            status = 'timeout'
+        elif any(UNAVAILABLE in str(result) for result in results.values()):
+            status = 'unavailable'
+        return {"messages": [{"role": "assistant", "content": ans}],'status':status}
 
 
 async def main():
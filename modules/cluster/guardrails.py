@@ -0,0 +1,102 @@
+import logging
+import re
+from collections import Counter
+from langchain_core.messages import AIMessage, AnyMessage, ToolMessage
+from modules.util.metrics import registry
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(name=f"GUARDRAILS.{__name__}")
+
+GUARDRAIL_STOPS = registry.counter("executor_guardrail_stops_total","Executor ReAct runs stopped by a guardrail",("limit",))
+
+PLAN_PATTERN = re.compile(
+    r"^\W*(?:proposed |suggested |my |execution )?plan\b|\bhere(?:'s| is) (?:my|the|a) (?:proposed |suggested )?plan\b|\bI (?:would|will) (?:propose|suggest)\b",
+    re.IGNORECASE | re.MULTILINE
+)
+
+def looks_like_plan(text:str)->bool:
+    """ True when a worker answered with a plan instead of executing its tasks """
+    return bool(PLAN_PATTERN.search(str(text)[:600]))
+
+def prompt_tokens(messages:list[AnyMessage], start:int, system_chars:int)->int:
+    """ Prompt tokens of the model calls since `start`: usage of the model when reported, else 4 characters per token """
+    total, chars = 0, system_chars + sum(len(str(message.content)) for message in messages[:start])
+    for message in messages[start:]:
+        if isinstance(message,AIMessage):
+            usage = getattr(message,"usage_metadata",None) or {}
+            total += usage.get("input_tokens") or chars // 4
+        chars += len(str(message.content))
+    return total
+
+class ExecutorGuardrails:
+    """
+    post_model_hook of the executor ReAct agent (`executor` section of the yaml, 0 = no limit):
+
+    * max_iterations: model turns per executor run
+    * max_tool_calls_per_agent: calls to the same worker tool, extra calls are dropped from the model turn
+    * max_prompt_tokens: prompt tokens of all the model turns of the run
+    * stop_when_done: once every assigned agent returned a result that is not a plan, new tool calls end the run
+    * A run stopped by a limit ends with a report built from the agent results, the limit is in its response_metadata
+    """
+
+    def __init__(self, run_marker:str, agent_names:list[str], system_prompt:str, max_iterations:int=0, max_tool_calls_per_agent:int=0, max_prompt_tokens:int=0, stop_when_done:bool=True):
+        self.run_marker = run_marker
+        self.agent_names = agent_names
+        self._system_chars = len(system_prompt)
+        self.max_iterations = max_iterations
+        self.max_tool_calls_per_agent = max_tool_calls_per_agent
+        self.max_prompt_tokens = max_prompt_tokens
+        self.stop_when_done = stop_when_done
+
+    def _run_start(self, messages:list[AnyMessage])->int:
+        """ Index of the executor query of the current run, the thread keeps the previous runs of the session """
+        for index in range(len(messages) - 1,-1,-1):
+            if str(messages[index].content).startswith(self.run_marker):
+                return index
+        return 0
+
+    def _assigned(self, query:str)->list[str]:
+        return [agent_name for agent_name in self.agent_names if agent_name in query]
+
+    @staticmethod
+    def report(results:dict[str,str], limit:str)->str:
+        sections = [f"## {agent_name}\n{result}" for agent_name, result in results.items()]
+        return f"Agents & Work Results (executor stopped: {limit}):\n\n" + ("\n\n".join(sections) if sections else "No agent returned a result")
+
+    def __call__(self, state:dict)->dict:
+        messages = state["messages"]
+        last = messages[-1]
+        if not isinstance(last,AIMessage) or not last.tool_calls:
+            return {}
+        start = self._run_start(messages)
+        run = messages[start:]
+        results = {message.name.removeprefix("call_"): str(message.content) for message in run if isinstance(message,ToolMessage)}
+        calls = Counter(message.name.removeprefix("call_") for message in run if isinstance(message,ToolMessage))
+        assigned = self._assigned(str(messages[start].content)) or list(results)
+
+        limit = None
+        if self.max_iterations and sum(isinstance(message,AIMessage) for message in run) >= self.max_iterations:
+            limit = "max_iterations"
+        elif self.max_prompt_tokens and prompt_tokens(messages,start,self._system_chars) >= self.max_prompt_tokens:
+            limit = "max_prompt_tokens"
+        elif self.stop_when_done and assigned and all(agent_name in results and not looks_like_plan(results[agent_name]) for agent_name in assigned):
+            limit = "agents_done"
+        elif self.max_tool_calls_per_agent:
+            kept = []
+            for call in last.tool_calls:
+                agent_name = call['name'].removeprefix("call_")
+                if calls[agent_name] < self.max_tool_calls_per_agent:
+                    calls[agent_name] += 1
+                    kept.append(call)
+            if not kept:
+                limit = "max_tool_calls_per_agent"
+            elif len(kept) < len(last.tool_calls):
+                logger.warning(f"Executor tool calls over max_tool_calls_per_agent dropped: {len(last.tool_calls) - len(kept)}")
+                additional_kwargs = {key: value for key, value in last.additional_kwargs.items() if key != "tool_calls"}
+                return {"messages": [last.model_copy(update={"tool_calls": kept,"additional_kwargs": additional_kwargs})]}
+        if limit is None:
+            return {}
+
+        logger.warning(f"Executor run stopped by {limit}")
+        GUARDRAIL_STOPS.inc(limit=limit)
+        return {"messages": [AIMessage(id=last.id,content=self.report(results,limit),response_metadata={'guardrail': limit})]}
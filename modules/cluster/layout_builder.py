@@ -1,17 +1,22 @@
-from langgraph.checkpoint.memory import MemorySaver
+from modules.util.checkpointer import build_checkpointer
 from langgraph.prebuilt import create_react_agent
 from modules.util.ociopen_ai import LLM_Open_Client
 import logging
 import asyncio
 import json
-from langgraph.graph import MessagesState
+import re
+from functools import cache
+from pathlib import Path
+from modules.util.states import LayoutState
 from pydantic import BaseModel
 from langchain_core.tools import tool
 from typing import List,Any
 from modules.util.lang_fuse import FuseConfig
-
-fuse_tracer = FuseConfig()
-trace_handler = fuse_tracer.get_handler()
+from modules.util.session import agent_config
+from modules.util.deadline import TIMED_OUT, get_deadline, remaining, run_until
+from modules.util.circuit_breaker import UNAVAILABLE
+from modules.util.metrics import DEADLINE_TIMEOUTS
+from langchain_core.runnables import RunnableConfig
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(name=f"LAYOUT_BUILDER.{__name__}")
@@ -37,29 +42,51 @@ class HelperOpenAI:
         output_model = model.with_structured_output(schema)
         return output_model
 
-with open(r"C:\Users\Cristopher Hdz\Desktop\ai_portal\modules\UI\json\card.json",'r',encoding='utf-8') as f:
-    card_schema = json.load(f)
+SCHEMA_DIR = Path(__file__).resolve().parents[1] / "UI" / "json"
+
+@cache
+def load_schema(name:str)->dict:
+    """ UI component JSON schema from modules/UI/json, read on the first tool call """
+    with open(SCHEMA_DIR / f"{name}.json",'r',encoding='utf-8') as f:
+        return json.load(f)
+
+def load_schemas()->list[dict]:
+    """ Reads every schema used by the layout tools, called by the warm-up """
+    return [load_schema("card"),load_schema("chart")]
 
 @tool
 async def build_card_schema(context:str)->Any:
     """ Builds a JSON schema for a card text UI component based on the given context. """
-    llm = HelperOpenAI().bind_output(card_schema)
+    llm = HelperOpenAI().bind_output(load_schema("card"))
     query = f"Based on the current context: {context}, use the schema to generate a text card UI component with a summary of the data given."
     response = await llm.ainvoke(query)
     return response
 
-with open(r"C:\Users\Cristopher Hdz\Desktop\ai_portal\modules\UI\json\chart.json",'r',encoding='utf-8') as f:
-    chart_schema = json.load(f)
-
 @tool
 async def build_chart_schema(context:str)->Any:
     """ Builds a JSON schema for a chart bar/pie UI component based on the given context. """
-    llm = HelperOpenAI().bind_output(chart_schema)
+    llm = HelperOpenAI().bind_output(load_schema("chart"))
     query = f"Based on the current context: {context}, use the schema to generate a chart UI component with a summary of the data given."
     response = await llm.ainvoke(query)
     return response
 
 
+def partial_layout(report:str)->str:
+    """ Layout built without the model once the deadline is reached: one text card per report section, timed out and unavailable sections are marked """
+    components = []
+    for index, section in enumerate(re.split(r"^#{1,6}\s+",report,flags=re.MULTILINE)):
+        title, _, content = section.strip().partition("\n")
+        if index == 0:
+            title, content = "Report", section.strip()
+        if not content.strip():
+            continue
+        if TIMED_OUT in content:
+            title = f"{title} (timed out)"
+        elif UNAVAILABLE in content:
+            title = f"{title} (unavailable)"
+        components.append({"component": "card","props": {"title": title,"content": content.strip()}})
+    return json.dumps(components)
+
 class ComponentState(BaseModel):
     components:List[str]
 
@@ -107,7 +134,7 @@ class LayoutAgent:
         if not self._initialized:
             self._oci_client = LLM_Open_Client()
             self._model = self._oci_client.build_llm_client()
-            self._memory = MemorySaver()
+            self._memory = build_checkpointer("layout")
             self._tools = [build_card_schema,build_chart_schema]
             self._layout_builder_agent = create_react_agent(
                 model=self._model,
@@ -117,20 +144,33 @@ class LayoutAgent:
             )
             LayoutAgent._initialized = True
 
-    async def call_layout_builder(self, state:MessagesState):
+    async def call_layout_builder(self, state:LayoutState, config:RunnableConfig):
 
         logger.debug("\nEntered layout builder ===============\n")
 
-        query = f"Current workflow report:\n {state['messages'][-1].content}"
-        response = await self._layout_builder_agent.ainvoke({"messages": [{"role": "assistant", "content": query}]})
+        report = state['messages'][-1].content
+        deadline = get_deadline(config)
+        if state.get('status') == 'timeout' or remaining(deadline) == 0:
+            return {"messages": [{"role": "assistant", "content": partial_layout(report)}],'status':'timeout'}
+
+        query = f"Current workflow report:\n {report}"
+        try:
+            response = await run_until(self._layout_builder_agent.ainvoke({"messages": [{"role": "assistant", "content": query}]},agent_config(config)),deadline)
+        except TimeoutError:
+            logger.warning("Layout cut by the request deadline, rendering the report sections as cards")
+            DEADLINE_TIMEOUTS.inc(stage="layout")
+            return {"messages": [{"role": "assistant", "content": partial_layout(report)}],'status':'timeout'}
 
         ans = response['messages'][-1].content
         logger.debug(str(ans))
         
-        return {"messages": [{"role": "assistant", "content": ans}],'status':'execute'}
+        # 'unavailable' (an agent could not be reached) stays on the finished layout
+        return {"messages": [{"role": "assistant", "content": ans}],'status':'unavailable' if state.get('status') == 'unavailable' else 'execute'}
 
 async def main():
     main_orchestrator = LayoutAgent()
+    fuse_tracer = FuseConfig()
+    trace_handler = fuse_tracer.get_handler()
 
     query = r"""A"""
     # Invoke
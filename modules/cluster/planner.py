@@ -1,8 +1,12 @@
 import asyncio
 from langgraph.graph import StateGraph, START, END, MessagesState
-from langgraph.checkpoint.memory import MemorySaver
+from modules.util.checkpointer import build_checkpointer
 from langgraph.prebuilt import create_react_agent
 from modules.util.ociopen_ai import LLM_Open_Client
+from modules.util.session import agent_config
+from modules.util.states import LayoutState
+from langchain_core.runnables import RunnableConfig
+from pydantic import BaseModel, Field
 import logging
 
 logging.basicConfig(level=logging.DEBUG)
@@ -12,6 +16,17 @@ class PlannerState(MessagesState):
     """ change the status according to execution steps """
     status: str
 
+class Assignment(BaseModel):
+    """ Work given to one selected agent """
+    agent: str = Field(description="Name of the selected agent, exactly as written in the plans")
+    instruction: str = Field(description="Exact tasks the agent has to execute, derived from its own plan")
+    context: str = Field(description="User query details and background the agent needs for the tasks")
+    depends_on: list[str] = Field(default=[],description="Selected agents whose results this agent needs before starting, empty when its tasks are independent")
+
+class Assignments(BaseModel):
+    """ Agents selected to solve the user query and the work assigned to each one """
+    assignments: list[Assignment] = []
+
 class PlannerAgent:
     """ Agent in charge of give the plan order, recevie the responses and decide which agents to use """
 
@@ -60,7 +75,7 @@ class PlannerAgent:
         if not self._initialized:
             self._oci_client = LLM_Open_Client()
             self._model = self._oci_client.build_llm_client()
-            self._memory = MemorySaver()
+            self._memory = build_checkpointer("planner")
             self._tools = []
             self._planner_agent = create_react_agent(
                 model=self._model,
@@ -68,20 +83,76 @@ class PlannerAgent:
                 checkpointer=self._memory,
                 prompt=self.SYSTEM_INSTRUCTION
             )
+            self._assignment_model = self._model.with_structured_output(Assignments)
             PlannerAgent._initialized = True
 
-    def call_planner_agent(self,state:PlannerState)->PlannerState:
-        logger.debug("=========== Entered planner calling")
+    def _planner_query(self,state:PlannerState)->str:
         if state['status'] == 'plan':
-            query = state['messages'][0].content
-        else:
-            query = f"Current agent plans: {state['messages'][-1].content}, current state: {state['status']}. Generate the instructions to be executed by the agents. Select only the best agents to address the user query: {state['messages'][0].content}.Generate the list of selected agents along with the context and tasks."
+            return state['messages'][0].content
+        return f"Current agent plans: {state['messages'][-1].content}, current state: {state['status']}. Generate the instructions to be executed by the agents. Select only the best agents to address the user query: {state['messages'][0].content}.Generate the list of selected agents along with the context and tasks."
+
+    def call_planner_agent(self,state:PlannerState,config:RunnableConfig)->PlannerState:
+        logger.debug("=========== Entered planner calling")
+        query = self._planner_query(state)
         
-        response = self._planner_agent.invoke({"messages": [{"role": "assistant", "content": query}]})
+        response = self._planner_agent.invoke({"messages": [{"role": "assistant", "content": query}]},agent_config(config))
         ans = response['messages'][-1].content
         logger.debug(str(ans))
         
         return {"messages": [{"role": "assistant", "content": ans}],'status':'execute'}
+
+    def _assignment_query(self,state:LayoutState)->str:
+        return f"Current agent plans:\n{state['messages'][-1].content}\nSelect only the best agents to address the user query: {state['messages'][0].content}. Assign to each selected agent its tasks and context."
+
+    async def aassign_agents(self,state:LayoutState,config:RunnableConfig)->LayoutState:
+        """
+        Fused agent_select: one structured output call returns the typed assignments for the dispatcher:
+
+        * Agent names are matched against the plan store, unknown agents are dropped and repeated agents merged
+        * depends_on lists the agents whose output an agent needs, the dispatcher runs the rest in parallel
+        * No valid assignment means every agent with a plan executes it
+        """
+        logger.debug("=========== Entered planner assignments")
+        response:Assignments = await self._assignment_model.ainvoke(
+            [{"role": "system", "content": self.SYSTEM_INSTRUCTION},{"role": "user", "content": self._assignment_query(state)}],
+            config
+        )
+        plans = state.get('plans') or {}
+        selected:dict[str,dict] = {}
+        for assignment in response.assignments:
+            agent_name = assignment.agent.strip().lower().replace(" ","_")
+            if agent_name not in plans:
+                continue
+            depends_on = [dep.strip().lower().replace(" ","_") for dep in assignment.depends_on]
+            if agent_name in selected:
+                item = selected[agent_name]
+                item['instruction'] += f"\n{assignment.instruction}"
+                item['context'] += f"\n{assignment.context}"
+                item['depends_on'] += depends_on
+            else:
+                selected[agent_name] = {'agent': agent_name,'instruction': assignment.instruction,'context': assignment.context,'depends_on': depends_on}
+        assignments = list(selected.values())
+        if not assignments:
+            logger.warning("No valid assignment returned, dispatching every agent plan")
+            assignments = [{'agent': agent_name,'instruction': "Execute your plan for the user query",'context': plan,'depends_on': []} for agent_name, plan in plans.items()]
+        ans = "\n\n".join(
+            f"## {item['agent']}\nTasks: {item['instruction']}\nContext: {item['context']}" + (f"\nAfter: {', '.join(item['depends_on'])}" if item['depends_on'] else "")
+            for item in assignments
+        )
+        logger.debug(ans)
+
+        return {"messages": [{"role": "assistant", "content": ans}],'assignments':assignments,'status':'execute'}
+
+    async def acall_planner_agent(self,state:PlannerState,config:RunnableConfig)->PlannerState:
+        """ Async version of call_planner_agent used by the main graph """
+        logger.debug("=========== Entered planner calling")
+        query = self._planner_query(state)
+
+        response = await self._planner_agent.ainvoke({"messages": [{"role": "assistant", "content": query}]},agent_config(config))
+        ans = response['messages'][-1].content
+        logger.debug(str(ans))
+
+        return {"messages": [{"role": "assistant", "content": ans}],'status':'execute'}
     
 async def main_graph():
     planner = PlannerAgent()
@@ -0,0 +1,131 @@
+import logging
+import threading
+import numpy as np
+from a2a.types import AgentCard
+from modules.util.config.config import Settings
+from modules.util.response_cache import HashedTfidfVectorizer
+from modules.util.a2a_calls import agent_cards
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(name=f"SKILL_ROUTER.{__name__}")
+
+def skill_documents(card:AgentCard)->list[str]:
+    """ One text per skill: agent description, skill name and description, tags and examples """
+    return [
+        " ".join([card.description,skill.name,skill.description," ".join(skill.tags)," ".join(skill.examples or [])])
+        for skill in card.skills
+    ] or [card.description]
+
+class SkillIndex:
+    """
+    Vectorized index over the skills published in the agent cards:
+
+    * Every skill is a row of a TF-IDF matrix (hashed words and trigrams, same features as the response cache)
+    * The score of an agent is the best cosine similarity between the query and one of its skills
+    """
+
+    def __init__(self, cards:dict[str,AgentCard], dimensions:int=4096):
+        self._vectorizer = HashedTfidfVectorizer(dimensions)
+        self.agents = list(cards)
+        self.skills:list[tuple[str,str]] = []
+        rows, owners = [], []
+        for index, (agent, card) in enumerate(cards.items()):
+            for skill, document in zip(card.skills or [None],skill_documents(card)):
+                rows.append(self._vectorizer.term_frequencies(document))
+                owners.append(index)
+                self.skills.append((agent,skill.id if skill else ""))
+        self._owners = np.asarray(owners,dtype=np.int64)
+        matrix = np.vstack(rows) if rows else np.zeros((0,dimensions),dtype=np.float32)
+        document_frequency = (matrix > 0).sum(axis=0)
+        self._idf = (np.log((1.0 + len(rows)) / (1.0 + document_frequency)) + 1.0).astype(np.float32)
+        weighted = matrix * self._idf
+        self._matrix = weighted / np.maximum(np.linalg.norm(weighted,axis=1,keepdims=True),1e-12)
+
+    def _skill_vector(self, query:str)->np.ndarray:
+        query_vector = self._vectorizer.term_frequencies(query) * self._idf
+        norm = np.linalg.norm(query_vector)
+        if norm == 0 or not len(self._matrix):
+            return np.zeros(len(self.skills),dtype=np.float32)
+        return self._matrix @ (query_vector / norm)
+
+    def skill_scores(self, query:str)->dict[tuple[str,str],float]:
+        """ Similarity of the query with every (agent, skill id) """
+        return {skill: float(score) for skill, score in zip(self.skills,self._skill_vector(query))}
+
+    def scores(self, query:str)->dict[str,float]:
+        best = np.zeros(len(self.agents),dtype=np.float32)
+        if len(self.skills):
+            np.maximum.at(best,self._owners,self._skill_vector(query))
+        return {agent: float(score) for agent, score in zip(self.agents,best)}
+
+class SkillRouter:
+    """
+    Picks the worker agents that receive the plan broadcast (`router` section of the yaml):
+
+    * The agents among the top_k best scores that reach the threshold are selected
+    * No agent above the threshold means an unclear query, it goes to every agent as before
+    * Agents without an agent card (server down at start) are always selected
+    """
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(SkillRouter,cls).__new__(cls)
+            cls._instance._init()
+        return cls._instance
+
+    def _init(self):
+        if self._initialized:
+            return
+        self._settings = Settings(r"C:\Users\Cristopher Hdz\Desktop\ai_portal\modules\util\config\config.yaml")
+        config = self._settings.router
+        self.enabled = bool(config and config.enabled)
+        self.threshold = config.threshold if config else 0.15
+        self.top_k = config.top_k if config else 5
+        self._dimensions = config.dimensions if config else 4096
+        self._index:SkillIndex|None = None
+        self._lock = threading.Lock()
+        self.routed = 0
+        self.broadcasts = 0
+        self.plan_calls = 0
+        self.plan_calls_saved = 0
+        if self.enabled:
+            self.load(agent_cards())
+        self._initialized = True
+
+    def load(self, cards:dict[str,AgentCard]):
+        """ Builds the index from `cards`, called at start with the cards fetched from the remote agents """
+        self._index = SkillIndex(cards,self._dimensions)
+        logger.info(f"Skill index with the agent cards of {list(cards)}")
+
+    def select(self, query:str, agents:list[str])->list[str]:
+        """ Agents of `agents` that should plan for `query`, in their original order """
+        if not self.enabled or self._index is None:
+            return list(agents)
+        scores = self._index.scores(query)
+        ranked = sorted((agent for agent in agents if agent in scores),key=lambda agent: scores[agent],reverse=True)
+        chosen = {agent for agent in ranked[:self.top_k] if scores[agent] >= self.threshold}
+        missing = [agent for agent in agents if agent not in scores]
+        with self._lock:
+            self.routed += 1
+            if not chosen:
+                self.broadcasts += 1
+                chosen = set(agents)
+            chosen.update(missing)
+            self.plan_calls += len(chosen)
+            self.plan_calls_saved += len(agents) - len(chosen)
+        logger.debug(f"Routing scores {scores}, selected {sorted(chosen)}")
+        return [agent for agent in agents if agent in chosen]
+
+    def stats(self)->dict:
+        return {
+            'enabled': self.enabled,
+            'threshold': self.threshold,
+            'top_k': self.top_k,
+            'routed': self.routed,
+            'broadcasts': self.broadcasts,
+            'plan_calls': self.plan_calls,
+            'plan_calls_saved': self.plan_calls_saved,
+        }
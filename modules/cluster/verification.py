@@ -1,5 +1,7 @@
 from modules.util.ociopen_ai import LLM_Open_Client
-from langgraph.checkpoint.memory import MemorySaver
+from modules.util.session import agent_config
+from langchain_core.runnables import RunnableConfig
+from modules.util.checkpointer import build_checkpointer
 from langgraph.prebuilt import create_react_agent
 from pydantic import BaseModel
 from typing import Literal
@@ -33,7 +35,7 @@ class VerificationAgent:
         if not self._initialized:
             self._oci_client = LLM_Open_Client()
             self._model = self._oci_client.build_llm_client()
-            self._memory = MemorySaver()
+            self._memory = build_checkpointer("verification")
             self._create_agent()
             VerificationAgent._initialized = True
 
@@ -56,9 +58,14 @@ class VerificationAgent:
             response_format=(self.FORMAT_INSTRUCTION,VerificationFormat)
         )
 
-    def verify_query(self,state:MessagesState):
+    def verify_query(self,state:MessagesState,config:RunnableConfig):
         """ Verifies the user query to be aligned to the topic """
-        response = self._verify_agent.invoke({"messages": [{"role": "user", "content": state["messages"][-1].content}]})
+        response = self._verify_agent.invoke({"messages": [{"role": "user", "content": state["messages"][-1].content}]},agent_config(config))
+        return {"messages": [{"role": "assistant", "content": response["structured_response"].status}]}
+
+    async def averify_query(self,state:MessagesState,config:RunnableConfig):
+        """ Async version of verify_query used by the main graph """
+        response = await self._verify_agent.ainvoke({"messages": [{"role": "user", "content": state["messages"][-1].content}]},agent_config(config))
         return {"messages": [{"role": "assistant", "content": response["structured_response"].status}]}
     
     def verification_check(self,state:MessagesState):
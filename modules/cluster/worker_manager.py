@@ -1,4 +1,12 @@
 from langchain_core.tools import tool, BaseTool
+from langchain_core.runnables import RunnableConfig
+from modules.util.session import agent_config
+from modules.util.config.config import Settings
+from modules.util.deadline import get_budget, get_deadline, reserve, run_until, timed_out
+from modules.util.metrics import DEADLINE_TIMEOUTS, registry
+from modules.util.circuit_breaker import AgentGuards, unavailable
+from modules.util.a2a_calls import call_a2a_agent
+from modules.util.progress import get_progress
 import logging
 from modules.cluster.workers.cinema_agent import CinemaAgent
 from modules.cluster.workers.decoration_agent import DecorationAgent
@@ -9,50 +17,79 @@ from modules.cluster.workers.weather_agent import WeatherAgent
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(name=f"AGENTS_CLUSTER.{__name__}")
 
+WORKER_TASKS = registry.counter("worker_tasks_total","Worker tasks by agent and dispatch mode (proxy worker agent or direct A2A call)",("agent","mode"))
+
+DIRECT_FRAMING = (
+    "You are called by the executor as the {name}: {expertise}. Execute the task now with your tools, address only the "
+    "parts inside your expertise, act on behalf of the user and state the decisions you took. If a tool fails, say that "
+    "you can not answer instead of making up information.\n\n{query}"
+)
+
+def worker_mode()->str:
+    """ `workers.mode` of the yaml: proxy (local worker ReAct agent) or direct (A2A call from the executor tool) """
+    config = Settings(r"C:\Users\Cristopher Hdz\Desktop\ai_portal\modules\util\config\config.yaml").workers
+    return (config or {}).get('mode','proxy')
+
+def direct_message(worker,query:str)->str:
+    """ Task for the remote agent with the framing of the worker agent that is skipped """
+    expertise = " ".join((worker.__doc__ or "").split()) or "remote expert agent"
+    return DIRECT_FRAMING.format(name=worker.name,expertise=expertise,query=query)
+
+async def run_worker(worker,instruction:str,context:str,config:RunnableConfig)->str:
+    """
+    Executes the task with the worker agent, past the request deadline (minus the report and layout reserves) it is cancelled and marked as timed out.
+    While the circuit of the remote agent is open the worker model is not called.
+    In direct mode the task goes to the remote agent over A2A without the worker model round trips.
+    """
+    breaker = AgentGuards().guard(worker.name).breaker
+    if breaker.is_open():
+        return unavailable(worker.name,f"is failing, its circuit is open for {breaker.retry_in():.0f} s more")
+    query = f"Given the context: {context}, work to fulfill the request: {instruction}. Do not make up information and provide all the data that you hava available"
+    mode = worker_mode()
+    WORKER_TASKS.inc(agent=worker.name,mode=mode)
+    if mode == "direct":
+        return await call_a2a_agent(worker.name,direct_message(worker,query),get_deadline(config),get_progress(config),get_budget(config))
+    try:
+        response = await run_until(
+            worker.agent.ainvoke({"messages": [{"role": "user", "content": query}]},agent_config(config)),
+            get_deadline(config),
+            reserve('report_reserve','layout_reserve',budget=get_budget(config))
+        )
+    except TimeoutError:
+        logger.warning(f"{worker.name} cut by the request deadline")
+        DEADLINE_TIMEOUTS.inc(stage="agent")
+        return timed_out(worker.name)
+    return response['messages'][-1].content
+
 @tool
-async def call_cinema_agent(instruction:str,context:str)->str:
+async def call_cinema_agent(instruction:str,context:str,config:RunnableConfig)->str:
     """ Calls the cinema agent with the specific instructions and context given """
 
-    cinema_agent = CinemaAgent()
-    response = await cinema_agent.agent.ainvoke({"messages": [{"role": "user", "content": f"Given the context: {context}, work to fulfill the request: {instruction}. Do not make up information and provide all the data that you hava available"}]})
-
-    return response['messages'][-1].content
+    return await run_worker(CinemaAgent(),instruction,context,config)
 
 @tool
-async def call_food_agent(instruction:str,context:str)->str:
+async def call_food_agent(instruction:str,context:str,config:RunnableConfig)->str:
     """ Calls the Food agent with the specific instructions and context given """
 
-    food_agent = FoodAgent()
-    response = await food_agent.agent.ainvoke({"messages": [{"role": "user", "content": f"Given the context: {context}, work to fulfill the request: {instruction}. Do not make up information and provide all the data that you hava available"}]})
-
-    return response['messages'][-1].content
+    return await run_worker(FoodAgent(),instruction,context,config)
 
 @tool
-async def call_decoration_agent(instruction:str,context:str)->str:
+async def call_decoration_agent(instruction:str,context:str,config:RunnableConfig)->str:
     """ Calls the decoration agent with the specific instructions and context given """
 
-    decoration_agent = DecorationAgent()
-    response = await decoration_agent.agent.ainvoke({"messages": [{"role": "user", "content": f"Given the context: {context}, work to fulfill the request: {instruction}. Do not make up information and provide all the data that you hava available"}]})
-
-    return response['messages'][-1].content
+    return await run_worker(DecorationAgent(),instruction,context,config)
 
 @tool
-async def call_weather_agent(instruction:str,context:str)->str:
+async def call_weather_agent(instruction:str,context:str,config:RunnableConfig)->str:
     """ Calls the weather agent with the specific instructions and context given """
 
-    weather_agent = WeatherAgent()
-    response = await weather_agent.agent.ainvoke({"messages": [{"role": "user", "content": f"Given the context: {context}, work to fulfill the request: {instruction}. Do not make up information and provide all the data that you hava available"}]})
-
-    return response['messages'][-1].content
+    return await run_worker(WeatherAgent(),instruction,context,config)
     
 @tool
-async def call_file_agent(instruction:str,context:str)->str:
+async def call_file_agent(instruction:str,context:str,config:RunnableConfig)->str:
     """ Calls the file agent with the specific instructions and context given """
 
-    file_agent = FileAgent()
-    response = await file_agent.agent.ainvoke({"messages": [{"role": "user", "content": f"Given the context: {context}, work to fulfill the request: {instruction}. Do not make up information and provide all the data that you hava available"}]})
-
-    return response['messages'][-1].content
+    return await run_worker(FileAgent(),instruction,context,config)
     
 
 class WorkerManager:
@@ -73,11 +110,11 @@ class WorkerManager:
             self.weather_agent = WeatherAgent()
             self.file_agent = FileAgent()
             self.agent_list = [
-                (self.cinema_agent.name,self.cinema_agent.cinema_plan),
-                (self.food_agent.name,self.food_agent.food_plan),
-                (self.decoration_agent.name,self.decoration_agent.decoration_plan),
-                (self.weather_agent.name,self.weather_agent.weather_plan),
-                (self.file_agent.name,self.file_agent.file_plan),
+                (self.cinema_agent.name,self.cinema_agent.acinema_plan),
+                (self.food_agent.name,self.food_agent.afood_plan),
+                (self.decoration_agent.name,self.decoration_agent.adecoration_plan),
+                (self.weather_agent.name,self.weather_agent.aweather_plan),
+                (self.file_agent.name,self.file_agent.afile_plan),
             ]
             self.agent_tools:list[BaseTool] = [
                 call_cinema_agent,
@@ -86,4 +123,5 @@ class WorkerManager:
                 call_weather_agent,
                 call_file_agent
             ]
+            self.tools_by_agent:dict[str,BaseTool] = {worker_tool.name.removeprefix("call_"): worker_tool for worker_tool in self.agent_tools}
             WorkerManager._initialized = True
\ No newline at end of file
@@ -1,18 +1,22 @@
-from langgraph.checkpoint.memory import MemorySaver
+from modules.util.checkpointer import build_checkpointer
 from langgraph.prebuilt import create_react_agent
 from modules.util.ociopen_ai import LLM_Open_Client
 from langchain_core.tools import tool
+from langchain_core.runnables import RunnableConfig
 from modules.util.states import LayoutState
 from modules.util.a2a_calls import call_a2a_agent
+from modules.util.session import agent_config
+from modules.util.deadline import get_budget, get_deadline
+from modules.util.progress import get_progress
 
 @tool
-async def send_task2_cinema_expert(agent_name:str,full_context:str)->str:
+async def send_task2_cinema_expert(agent_name:str,full_context:str,config:RunnableConfig)->str:
     """ Sends a task to a cinema_agent with capabilities to: 
     find available cinema functions, purchase tickets (including money usage) and 
     return a list of available movies. Agent is not capable to do tasks outside the cinema location.
     Agent name: cinema_agent
     """
-    response = await call_a2a_agent(agent_name,full_context)
+    response = await call_a2a_agent(agent_name,full_context,get_deadline(config),get_progress(config),get_budget(config))
     return response
 
 class CinemaAgent:
@@ -62,7 +66,7 @@ class CinemaAgent:
             self.name = "cinema_agent"
             self.oci_client = LLM_Open_Client()
             self.model = self.oci_client.build_llm_client()
-            self.memory = MemorySaver()
+            self.memory = build_checkpointer(self.name)
             self.tools = [send_task2_cinema_expert]
             self.agent = create_react_agent(
                 model=self.model,
@@ -72,11 +76,20 @@ class CinemaAgent:
             )
             CinemaAgent._initialized = True
 
-    def cinema_plan(self,state:LayoutState)->LayoutState:
+    def cinema_plan(self,state:LayoutState,config:RunnableConfig)->LayoutState:
         """ Verifies the user query to be aligned to the topic """
 
         query = state['messages'][-1].content
-        response = self.agent.invoke({"messages": [{"role": "assistant", "content": query}]})
+        response = self.agent.invoke({"messages": [{"role": "assistant", "content": query}]},agent_config(config))
         ans = response['messages'][-1].content
         
-        return {"messages": [{"role": "assistant", "content": ans}],'plans':ans}
\ No newline at end of file
+        return {'plans': {self.name: ans}}
+
+    async def acinema_plan(self,state:LayoutState,config:RunnableConfig)->LayoutState:
+        """ Async version of cinema_plan for the graph, awaits the agent instead of blocking a thread """
+
+        query = state['messages'][-1].content
+        response = await self.agent.ainvoke({"messages": [{"role": "assistant", "content": query}]},agent_config(config))
+        ans = response['messages'][-1].content
+        
+        return {'plans': {self.name: ans}}
\ No newline at end of file
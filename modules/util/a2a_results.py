@@ -0,0 +1,101 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from a2a.types import JSONRPCErrorResponse, Message, SendMessageResponse, Task, TaskState
+from a2a.utils import get_message_text, get_text_parts
+from modules.util.config.config import Settings
+from modules.util.metrics import registry, SIZE_BUCKETS
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(name=f"A2A_RESULTS.{__name__}")
+
+A2A_RESULT_CHARS = registry.histogram("a2a_result_chars","Characters of the A2A answers by agent and part: the full response dump and the result given to the worker",("agent","part"),SIZE_BUCKETS)
+
+def result_text(result:Task|Message|None)->str:
+    """ Text of an agent result: the message, else the task artifacts, else its last status message """
+    if isinstance(result,Message):
+        return get_message_text(result)
+    if isinstance(result,Task):
+        texts = [text for artifact in result.artifacts or [] for text in get_text_parts(artifact.parts)]
+        if texts:
+            return "\n".join(texts)
+        if result.status and result.status.message:
+            return get_message_text(result.status.message)
+    return ""
+
+def result_state(result:Task|Message)->str:
+    """ Task state, a streamed read that stopped on the final artifact still holds the working status """
+    if isinstance(result,Message):
+        return TaskState.completed.value
+    if result.status.state == TaskState.working and result.artifacts:
+        return TaskState.completed.value
+    return result.status.state.value
+
+def compact_result(agent_name:str, response:SendMessageResponse, max_chars:int|None=None, dump_id:str|None=None)->str:
+    """
+    Result of an A2A call for the worker model: '[agent state] text' with the final artifact text only
+    (no task history, status updates, ids or metadata), cut at `max_chars`
+    """
+    if isinstance(response.root,JSONRPCErrorResponse):
+        return f"[{agent_name} error] {response.root.error.message}"
+    result = response.root.result
+    text = result_text(result).strip() or "(no text in the answer)"
+    if max_chars and len(text) > max_chars:
+        cut = f"... [{len(text) - max_chars} more characters cut" + (f", full answer {dump_id}]" if dump_id else "]")
+        text = text[:max_chars] + cut
+    return f"[{agent_name} {result_state(result)}] {text}"
+
+class ResultDumps:
+    """
+    Full A2A responses kept out of the model context for debugging (`a2a.results` section of the yaml):
+
+    * The last `keep` dumps in memory by request id, served by /a2a/results on the portal
+    * Every dump appended to `dump_file` (JSON lines) when it is set
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ResultDumps,cls).__new__(cls)
+            cls._instance._init()
+        return cls._instance
+
+    def _init(self):
+        if hasattr(self,"_initialized") and self._initialized:
+            return
+        config = (Settings(r"C:\Users\Cristopher Hdz\Desktop\ai_portal\modules\util\config\config.yaml").a2a or {}).get('results') or {}
+        self.keep = config.get('keep',100)
+        self.dump_file = config.get('dump_file')
+        self._dumps:OrderedDict[str,dict] = OrderedDict()
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self._initialized = True
+
+    def record(self, dump_id:str, agent_name:str, dump:dict):
+        entry = {'id': dump_id,'agent': agent_name,'time': time.time(),'response': dump}
+        with self._lock:
+            self.recorded += 1
+            self._dumps[dump_id] = entry
+            while len(self._dumps) > self.keep:
+                self._dumps.popitem(last=False)
+        if self.dump_file:
+            try:
+                os.makedirs(os.path.dirname(self.dump_file) or ".",exist_ok=True)
+                with open(self.dump_file,"a",encoding="utf-8") as file:
+                    file.write(json.dumps(entry,default=str) + "\n")
+            except OSError as e:
+                logger.warning(f"A2A result dump not written to {self.dump_file}: {e}")
+
+    def get(self, dump_id:str)->dict|None:
+        return self._dumps.get(dump_id)
+
+    def recent(self, agent_name:str|None=None, limit:int=20)->list[dict]:
+        with self._lock:
+            dumps = [entry for entry in reversed(self._dumps.values()) if agent_name is None or entry['agent'] == agent_name]
+        return dumps[:limit]
+
+    def stats(self)->dict:
+        return {'recorded': self.recorded,'kept': len(self._dumps),'keep': self.keep,'dump_file': self.dump_file}
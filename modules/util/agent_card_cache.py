@@ -0,0 +1,108 @@
+import json
+import logging
+import os
+import threading
+import time
+import httpx
+from a2a.types import AgentCard
+from modules.util.metrics import A2A_CARD_LOOKUPS
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(name=f"AGENT_CARD_CACHE.{__name__}")
+
+class CachedCard:
+    """ Agent card with the ETag of the response and the time it was last fetched or revalidated (epoch seconds) """
+
+    def __init__(self, card:AgentCard, etag:str|None=None, fetched_at:float|None=None):
+        self.card = card
+        self.etag = etag
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+
+    def to_dict(self)->dict:
+        return {
+            'etag': self.etag,
+            'fetched_at': self.fetched_at,
+            'card': self.card.model_dump(mode='json',exclude_none=True),
+        }
+
+class AgentCardCache:
+    """
+    Agent cards by card URL, in memory and in a JSON file shared by the processes of the portal:
+
+    * A card younger than ttl_seconds is used without any request
+    * An older card is revalidated with If-None-Match, a 304 keeps it and restarts its TTL
+    * The file is loaded at start, so a restarted portal revalidates its cards instead of downloading them
+    """
+
+    def __init__(self, path:str|None=None, ttl_seconds:float=300):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._entries:dict[str,CachedCard] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path,encoding="utf-8") as file:
+                stored = json.load(file)
+            for url, entry in stored.items():
+                self._entries[url] = CachedCard(AgentCard.model_validate(entry['card']),entry.get('etag'),entry.get('fetched_at',0.0))
+            logger.debug(f"{len(self._entries)} agent cards loaded from {self.path}")
+        except Exception as e:
+            logger.warning(f"Agent card cache {self.path} not loaded: {e}")
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".",exist_ok=True)
+            temporary = f"{self.path}.{os.getpid()}.tmp"
+            with open(temporary,"w",encoding="utf-8") as file:
+                json.dump({url: entry.to_dict() for url, entry in self._entries.items()},file)
+            os.replace(temporary,self.path)
+        except Exception as e:
+            logger.warning(f"Agent card cache {self.path} not saved: {e}")
+
+    def fresh(self, url:str)->AgentCard|None:
+        """ Cached card of `url` when it is inside the TTL """
+        entry = self._entries.get(url)
+        if entry is None or time.time() - entry.fetched_at > self.ttl_seconds:
+            return None
+        A2A_CARD_LOOKUPS.inc(result="memory")
+        return entry.card
+
+    def headers(self, url:str)->dict[str,str]:
+        """ Conditional request headers for the card of `url` """
+        entry = self._entries.get(url)
+        return {'If-None-Match': entry.etag} if entry and entry.etag else {}
+
+    def update(self, url:str, response:httpx.Response)->AgentCard:
+        """ Card from the response of a (conditional) GET of `url`: the cached one on 304, else the new one is stored """
+        with self._lock:
+            entry = self._entries.get(url)
+            if response.status_code == 304 and entry is not None:
+                entry.fetched_at = time.time()
+                A2A_CARD_LOOKUPS.inc(result="revalidated")
+            else:
+                response.raise_for_status()
+                entry = CachedCard(AgentCard.model_validate(response.json()),response.headers.get('ETag'))
+                self._entries[url] = entry
+                A2A_CARD_LOOKUPS.inc(result="fetched")
+            self._save()
+            return entry.card
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._save()
+
+    def stats(self)->dict:
+        now = time.time()
+        return {
+            'cards': len(self._entries),
+            'fresh': sum(now - entry.fetched_at <= self.ttl_seconds for entry in self._entries.values()),
+            'ttl_seconds': self.ttl_seconds,
+            'path': self.path,
+        }
@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+import httpx
+from modules.util.config.config import Settings
+from modules.util.metrics import registry
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(name=f"AGENT_REGISTRY.{__name__}")
+
+PUBLIC_AGENT_CARD_PATH = '/.well-known/agent.json'
+
+DEFAULT_AGENTS = {
+    'cinema_agent': ['http://localhost:9999/'],
+    'decoration_agent': ['http://localhost:9998/'],
+    'food_agent': ['http://localhost:9997/'],
+    'weather_agent': ['http://localhost:9996/'],
+    'file_agent': ['http://localhost:9995/'],
+}
+
+REPLICA_OUTSTANDING = registry.gauge("a2a_replica_outstanding_requests","Requests in flight by remote agent replica",("agent","replica"))
+REPLICA_REQUESTS = registry.counter("a2a_replica_requests_total","Requests sent to every remote agent replica by result",("agent","replica","status"))
+REPLICA_EJECTIONS = registry.counter("a2a_replica_ejections_total","Replicas taken out of the balancing by failed calls or health checks",("agent","replica","reason"))
+
+def _causes(error:BaseException)->list[BaseException]:
+    chain = []
+    while error is not None and error not in chain:
+        chain.append(error)
+        error = error.__cause__ or error.__context__
+    return chain
+
+def is_replica_failure(error:BaseException)->bool:
+    """ The replica is down or broken: no connection, a network error or a 5xx answer """
+    for cause in _causes(error):
+        if isinstance(cause,httpx.TransportError):
+            return True
+        status = getattr(cause,"status_code",None) or getattr(getattr(cause,"response",None),"status_code",None)
+        if isinstance(status,int) and status >= 500:
+            return True
+    return False
+
+def is_timeout(error:BaseException)->bool:
+    """ The agent did not answer inside the timeout of the call """
+    return any(isinstance(cause,(httpx.TimeoutException,TimeoutError)) or type(cause).__name__ == "A2AClientTimeoutError" for cause in _causes(error))
+
+def never_delivered(error:BaseException)->bool:
+    """ The message did not reach the agent (refused connection, connect timeout, 502/503/504 answer), safe to send it to another replica """
+    for cause in _causes(error):
+        if isinstance(cause,(httpx.ConnectError,httpx.ConnectTimeout)):
+            return True
+        if isinstance(cause,httpx.HTTPStatusError) and cause.response.status_code in (502,503,504):
+            return True
+    return False
+
+class Replica:
+    """ One server of a remote agent: requests in flight, health check result and ejection time (monotonic) """
+
+    def __init__(self, agent_name:str, url:str):
+        self.agent_name = agent_name
+        self.url = url
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.healthy = True
+        self.ejected_until = 0.0
+
+    @property
+    def available(self)->bool:
+        return self.healthy and time.monotonic() >= self.ejected_until
+
+    def to_dict(self)->dict:
+        return {
+            'url': self.url,
+            'available': self.available,
+            'healthy': self.healthy,
+            'outstanding': self.outstanding,
+            'requests': self.requests,
+            'failures': self.failures,
+            'ejected_for_seconds': round(max(0.0,self.ejected_until - time.monotonic()),1),
+        }
+
+class AgentRegistry:
+    """
+    Replicas of every remote agent (`a2a.agents` in the yaml, one URL per agent by default):
+
+    * pick() returns the available replica with the fewest requests in flight, ties go to the least used
+    * max_failures consecutive failed calls eject a replica for eject_seconds
+    * A health check GETs the agent card of every replica each health_interval_seconds, a failed one is out until it answers again
+    * When no replica is available the one whose ejection ends first is tried anyway
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(AgentRegistry,cls).__new__(cls)
+            cls._instance._init()
+        return cls._instance
+
+    def _init(self):
+        if hasattr(self,"_initialized") and self._initialized:
+            return
+        config = Settings(r"C:\Users\Cristopher Hdz\Desktop\ai_portal\modules\util\config\config.yaml").a2a or {}
+        self.max_failures = config.get('max_failures',2)
+        self.eject_seconds = config.get('eject_seconds',30.0)
+        self.health_interval_seconds = config.get('health_interval_seconds',10.0)
+        self.load(config.get('agents') or DEFAULT_AGENTS)
+        self._health_task:asyncio.Task|None = None
+        self._initialized = True
+
+    def load(self, agents:dict[str,list[str]|str]):
+        """ Replaces the replicas, a single URL is one replica """
+        self.replicas = {
+            agent_name: [Replica(agent_name,url) for url in ([urls] if isinstance(urls,str) else urls)]
+            for agent_name, urls in agents.items()
+        }
+
+    @property
+    def agent_names(self)->list[str]:
+        return list(self.replicas)
+
+    def pick(self, agent_name:str, exclude:set[str]=frozenset())->Replica|None:
+        candidates = [replica for replica in self.replicas.get(agent_name,[]) if replica.url not in exclude]
+        if not candidates:
+            return None
+        available = [replica for replica in candidates if replica.available]
+        if not available:
+            return min(candidates,key=lambda replica: (replica.healthy is False,replica.ejected_until))
+        return min(available,key=lambda replica: (replica.outstanding,replica.requests))
+
+    @asynccontextmanager
+    async def acquire(self, agent_name:str, exclude:set[str]=frozenset())->AsyncIterator[Replica]:
+        """ Replica for one call, counted as in flight until the block ends; the caller reports succeeded / failed """
+        self.start_health_checks()
+        replica = self.pick(agent_name,exclude)
+        if replica is None:
+            raise LookupError(f"No replica of {agent_name} left to try")
+        replica.outstanding += 1
+        replica.requests += 1
+        REPLICA_OUTSTANDING.inc(agent=agent_name,replica=replica.url)
+        try:
+            yield replica
+        finally:
+            replica.outstanding -= 1
+            REPLICA_OUTSTANDING.dec(agent=agent_name,replica=replica.url)
+
+    def succeeded(self, replica:Replica):
+        replica.failures = 0
+        REPLICA_REQUESTS.inc(agent=replica.agent_name,replica=replica.url,status="ok")
+
+    def failed(self, replica:Replica):
+        replica.failures += 1
+        REPLICA_REQUESTS.inc(agent=replica.agent_name,replica=replica.url,status="error")
+        if replica.failures >= self.max_failures and replica.available:
+            replica.ejected_until = time.monotonic() + self.eject_seconds
+            REPLICA_EJECTIONS.inc(agent=replica.agent_name,replica=replica.url,reason="failures")
+            logger.warning(f"Replica {replica.url} of {replica.agent_name} ejected for {self.eject_seconds}s after {replica.failures} failed calls")
+
+    async def check(self, timeout:float=2.0):
+        """ One health check round over every replica """
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            async def check_one(replica:Replica):
+                try:
+                    response = await client.get(f"{replica.url.rstrip('/')}{PUBLIC_AGENT_CARD_PATH}")
+                    healthy = response.status_code in (200,304)
+                except httpx.HTTPError:
+                    healthy = False
+                if replica.healthy and not healthy:
+                    REPLICA_EJECTIONS.inc(agent=replica.agent_name,replica=replica.url,reason="health_check")
+                    logger.warning(f"Replica {replica.url} of {replica.agent_name} failed its health check")
+                elif healthy and not replica.healthy:
+                    logger.info(f"Replica {replica.url} of {replica.agent_name} is back")
+                replica.healthy = healthy
+            await asyncio.gather(*(check_one(replica) for replicas in self.replicas.values() for replica in replicas))
+
+    async def _health_loop(self):
+        while True:
+            try:
+                await self.check()
+            except Exception as e:
+                logger.warning(f"Replica health check failed: {e}")
+            await asyncio.sleep(self.health_interval_seconds)
+
+    def start_health_checks(self):
+        """ Health checks on the running loop, started by the first call; 0 = no health checks """
+        if not self.health_interval_seconds:
+            return
+        loop = asyncio.get_running_loop()
+        if self._health_task is None or self._health_task.done() or self._health_task.get_loop() is not loop:
+            self._health_task = loop.create_task(self._health_loop())
+
+    async def stop(self):
+        task, self._health_task = self._health_task, None
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            task.cancel()
+            await asyncio.gather(task,return_exceptions=True)
+
+    def stats(self)->dict:
+        return {agent_name: [replica.to_dict() for replica in replicas] for agent_name, replicas in self.replicas.items()}
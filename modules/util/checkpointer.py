@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import InMemorySaver, MemorySaver
+from modules.util.config.config import Settings
+from modules.util.metrics import registry
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(name=f"CHECKPOINTER.{__name__}")
+
+class BoundedThreadsMixin:
+    """
+    Thread bookkeeping shared by the bounded savers:
+
+    * Every read or write of a thread moves it to the end of an LRU order
+    * Threads idle for more than ttl_seconds are deleted (expirations)
+    * When there are more than max_threads, the least recently used ones are deleted (evictions)
+    """
+
+    def _init_bounds(self, max_threads:int, ttl_seconds:float):
+        self.max_threads = max_threads
+        self.ttl_seconds = ttl_seconds
+        self.evictions = 0
+        self.expirations = 0
+        self._last_used:OrderedDict[str,float] = OrderedDict()
+        self._bounds_lock = threading.RLock()
+
+    def _touch(self, config:RunnableConfig):
+        thread_id = str(config['configurable']['thread_id'])
+        now = time.monotonic()
+        with self._bounds_lock:
+            self._last_used[thread_id] = now
+            self._last_used.move_to_end(thread_id)
+            while self._last_used:
+                oldest, used = next(iter(self._last_used.items()))
+                if oldest == thread_id:
+                    break
+                if now - used > self.ttl_seconds:
+                    self.expirations += 1
+                elif len(self._last_used) > self.max_threads:
+                    self.evictions += 1
+                else:
+                    break
+                del self._last_used[oldest]
+                self.delete_thread(oldest)
+
+    def get_tuple(self, config:RunnableConfig):
+        with self._bounds_lock:
+            checkpoint = super().get_tuple(config)
+            if checkpoint is not None:
+                self._touch(config)
+            return checkpoint
+
+    def put(self, config:RunnableConfig, checkpoint, metadata, new_versions)->RunnableConfig:
+        with self._bounds_lock:
+            self._touch(config)
+            return super().put(config,checkpoint,metadata,new_versions)
+
+    def put_writes(self, config:RunnableConfig, writes, task_id:str, task_path:str="")->None:
+        with self._bounds_lock:
+            self._touch(config)
+            return super().put_writes(config,writes,task_id,task_path)
+
+    def stats(self)->dict:
+        return {
+            'backend': self.backend,
+            'threads': len(self._last_used),
+            'max_threads': self.max_threads,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'bytes': self.size_bytes(),
+        }
+
+class BoundedMemorySaver(BoundedThreadsMixin,InMemorySaver):
+    """ In memory checkpointer with LRU and TTL limits on the number of threads """
+
+    backend = "memory"
+
+    def __init__(self, max_threads:int=256, ttl_seconds:float=1800):
+        super().__init__()
+        self._init_bounds(max_threads,ttl_seconds)
+
+    def size_bytes(self)->int:
+        """ Serialized size of the stored checkpoints, writes and channel values """
+        with self._bounds_lock:
+            total = 0
+            for namespaces in self.storage.values():
+                for checkpoints in namespaces.values():
+                    for (_, checkpoint), (_, metadata), _ in checkpoints.values():
+                        total += len(checkpoint) + len(metadata)
+            for _, value in self.blobs.values():
+                total += len(value)
+            for writes in self.writes.values():
+                for _, _, (_, value), _ in writes.values():
+                    total += len(value)
+            return total
+
+def _sqlite_saver_class():
+    """ The sqlite backend is optional: pip install langgraph-checkpoint-sqlite """
+    try:
+        from langgraph.checkpoint.sqlite import SqliteSaver
+    except ImportError as e:
+        raise RuntimeError("checkpointer.backend 'sqlite' requires the langgraph-checkpoint-sqlite package") from e
+
+    class BoundedSqliteSaver(BoundedThreadsMixin,SqliteSaver):
+        """
+        On disk checkpointer (SQLite in WAL mode) for sessions that must survive restarts:
+
+        * Same LRU / TTL limits as the memory backend, threads found on disk at start count as just used
+        * The async methods run the sync ones in a worker thread, the connection is shared under the saver lock
+        """
+
+        backend = "sqlite"
+
+        def __init__(self, path:str, max_threads:int=256, ttl_seconds:float=1800):
+            super().__init__(sqlite3.connect(path,check_same_thread=False))
+            self.path = path
+            self._init_bounds(max_threads,ttl_seconds)
+            self.setup()
+            with self.cursor(transaction=False) as cursor:
+                cursor.execute("SELECT DISTINCT thread_id FROM checkpoints")
+                now = time.monotonic()
+                for (thread_id,) in cursor.fetchall():
+                    self._last_used[str(thread_id)] = now
+
+        def size_bytes(self)->int:
+            return sum(os.path.getsize(f"{self.path}{suffix}") for suffix in ("","-wal") if os.path.exists(f"{self.path}{suffix}"))
+
+        async def aget_tuple(self, config):
+            return await asyncio.to_thread(self.get_tuple,config)
+
+        async def aput(self, config, checkpoint, metadata, new_versions):
+            return await asyncio.to_thread(self.put,config,checkpoint,metadata,new_versions)
+
+        async def aput_writes(self, config, writes, task_id, task_path=""):
+            return await asyncio.to_thread(self.put_writes,config,writes,task_id,task_path)
+
+        async def adelete_thread(self, thread_id):
+            return await asyncio.to_thread(self.delete_thread,thread_id)
+
+        async def alist(self, config, *, filter=None, before=None, limit=None):
+            for item in await asyncio.to_thread(lambda: list(self.list(config,filter=filter,before=before,limit=limit))):
+                yield item
+
+    return BoundedSqliteSaver
+
+class CheckpointerRegistry:
+    """
+    Builds one checkpointer per agent from the `checkpointer` config section and keeps them for the stats:
+
+    * backend: memory (bounded), sqlite (bounded, on disk) or unbounded (plain MemorySaver)
+    * Agents keep their own saver so equal thread ids from different graphs do not collide
+    * The section comes from the caller (the A2A servers pass the one of their yaml), the portal yaml by default
+    """
+
+    _instance = None
+    _initialized = False
+    _creation_lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._creation_lock:
+                if cls._instance is None:
+                    instance = super(CheckpointerRegistry,cls).__new__(cls)
+                    instance._init()
+                    cls._instance = instance
+        return cls._instance
+
+    def _init(self):
+        if self._initialized:
+            return
+        self._savers:dict[str,BaseCheckpointSaver] = {}
+        self._lock = threading.Lock()
+        self._initialized = True
+
+    def _build(self, name:str, config:dict|None)->BaseCheckpointSaver:
+        if config is None:
+            config = Settings(r"C:\Users\Cristopher Hdz\Desktop\ai_portal\modules\util\config\config.yaml").checkpointer
+        if config is None or config.backend == "unbounded":
+            return MemorySaver()
+        if config.backend == "sqlite":
+            os.makedirs(config.sqlite_dir,exist_ok=True)
+            path = os.path.join(config.sqlite_dir,f"{name}.sqlite")
+            return _sqlite_saver_class()(path,config.max_threads,config.ttl_seconds)
+        return BoundedMemorySaver(config.max_threads,config.ttl_seconds)
+
+    def get(self, name:str, config:dict|None=None)->BaseCheckpointSaver:
+        with self._lock:
+            if name not in self._savers:
+                self._savers[name] = self._build(name,config)
+                logger.debug(f"Checkpointer for {name}: {type(self._savers[name]).__name__}")
+            return self._savers[name]
+
+    def stats(self)->dict:
+        return {name: saver.stats() for name, saver in self._savers.items() if hasattr(saver,"stats")}
+
+def build_checkpointer(name:str, config:dict|None=None)->BaseCheckpointSaver:
+    """ Checkpointer for the agent `name` according to the `checkpointer` section `config`, the one of the portal yaml by default """
+    return CheckpointerRegistry().get(name,config)
+
+CHECKPOINTER_THREADS = registry.gauge("checkpointer_threads","Threads kept by each agent checkpointer",("agent",))
+CHECKPOINTER_BYTES = registry.gauge("checkpointer_bytes","Serialized bytes kept by each agent checkpointer",("agent",))
+CHECKPOINTER_EVICTED = registry.counter("checkpointer_evicted_threads_total","Threads dropped by each agent checkpointer",("agent","reason"))
+_evicted_collected:dict[tuple[str,str],int] = {}
+
+def collect_checkpointer_metrics():
+    for name, stats in CheckpointerRegistry().stats().items():
+        CHECKPOINTER_THREADS.set(stats['threads'],agent=name)
+        CHECKPOINTER_BYTES.set(stats['bytes'],agent=name)
+        for reason, total in (("lru",stats['evictions']),("ttl",stats['expirations'])):
+            # The savers keep running totals, the counter gets the threads dropped since the last collection
+            CHECKPOINTER_EVICTED.inc(total - _evicted_collected.get((name,reason),0),agent=name,reason=reason)
+            _evicted_collected[(name,reason)] = total
+
+registry.add_collector(collect_checkpointer_metrics)
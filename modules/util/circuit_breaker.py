@@ -0,0 +1,168 @@
+import logging
+import math
+import threading
+import time
+from collections import deque
+from modules.util.config.config import Settings
+from modules.util.metrics import registry
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(name=f"CIRCUIT_BREAKER.{__name__}")
+
+UNAVAILABLE = "AGENT UNAVAILABLE"
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+BREAKER_STATE = registry.gauge("a2a_breaker_state","Circuit breaker of every remote agent: 0 closed, 1 half open, 2 open",("agent",))
+BREAKER_TRANSITIONS = registry.counter("a2a_breaker_transitions_total","Circuit breaker state changes by remote agent and new state",("agent","state"))
+BREAKER_REJECTIONS = registry.counter("a2a_breaker_rejections_total","Calls failed fast by an open circuit breaker",("agent",))
+AGENT_TIMEOUT = registry.gauge("a2a_agent_timeout_seconds","Timeout of the next call to every remote agent, derived from its latency percentiles",("agent",))
+
+def unavailable(agent_name:str, reason:str)->str:
+    """ Result of a call to a failing agent (open circuit, timeout, down), the executor routes around it instead of calling it again """
+    return f"{UNAVAILABLE}: {agent_name} {reason}. Do not call it again for this request, continue with the other agents"
+
+class RollingLatency:
+    """ Latencies (seconds) of the last `window` successful calls """
+
+    def __init__(self, window:int=200):
+        self._samples:deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds:float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self)->int:
+        return len(self._samples)
+
+    def percentile(self, quantile:float)->float|None:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1,math.ceil(quantile * len(samples)) - 1)]
+
+class CircuitBreaker:
+    """
+    closed -> open after failure_threshold consecutive failed calls,
+    open -> half_open after reset_seconds (one trial call at a time),
+    half_open -> closed on a successful trial, back to open on a failed one
+    """
+
+    def __init__(self, agent_name:str, failure_threshold:int=3, reset_seconds:float=30.0):
+        self.agent_name = agent_name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+        BREAKER_STATE.set(STATE_VALUES[CLOSED],agent=agent_name)
+
+    def _move(self, state:str):
+        if state != self.state:
+            logger.warning(f"Circuit of {self.agent_name}: {self.state} -> {state}")
+            BREAKER_TRANSITIONS.inc(agent=self.agent_name,state=state)
+            BREAKER_STATE.set(STATE_VALUES[state],agent=self.agent_name)
+        self.state = state
+
+    def retry_in(self)->float:
+        return max(0.0,self.opened_at + self.reset_seconds - time.monotonic()) if self.state == OPEN else 0.0
+
+    def is_open(self)->bool:
+        """ Open and still inside reset_seconds, a check that does not take the half open trial call """
+        return self.state == OPEN and self.retry_in() > 0
+
+    def allow(self)->bool:
+        """ True when the call can go out, an open circuit lets one trial call through after reset_seconds """
+        with self._lock:
+            if self.state == OPEN and self.retry_in() == 0:
+                self._move(HALF_OPEN)
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._trial:
+                self._trial = True
+                return True
+        BREAKER_REJECTIONS.inc(agent=self.agent_name)
+        return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures, self._trial = 0, False
+            self._move(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self._move(OPEN)
+
+    def release(self):
+        """ A trial call that ended without an outcome (cut by the request deadline, cancelled) frees its slot """
+        with self._lock:
+            self._trial = False
+
+    def to_dict(self)->dict:
+        return {'state': self.state,'failures': self.failures,'retry_in_seconds': round(self.retry_in(),1)}
+
+class AgentGuard:
+    """ Rolling latency, adaptive timeout and circuit breaker of one remote agent """
+
+    def __init__(self, agent_name:str, quantile:float=0.99, factor:float=2.0, min_seconds:float=5.0, max_seconds:float=30.0,
+                 window:int=200, min_samples:int=20, failure_threshold:int=3, reset_seconds:float=30.0):
+        self.agent_name = agent_name
+        self.quantile = quantile
+        self.factor = factor
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self.min_samples = min_samples
+        self.latency = RollingLatency(window)
+        self.breaker = CircuitBreaker(agent_name,failure_threshold,reset_seconds)
+
+    def timeout(self)->float:
+        """ Latency percentile x factor clamped to [min_seconds, max_seconds], max_seconds until min_samples calls succeeded """
+        observed = self.latency.percentile(self.quantile) if len(self.latency) >= self.min_samples else None
+        timeout = self.max_seconds if observed is None else min(self.max_seconds,max(self.min_seconds,observed * self.factor))
+        AGENT_TIMEOUT.set(timeout,agent=self.agent_name)
+        return timeout
+
+    def to_dict(self)->dict:
+        return {
+            'timeout_seconds': round(self.timeout(),3),
+            'samples': len(self.latency),
+            f'p{round(self.quantile*100)}_seconds': self.latency.percentile(self.quantile),
+            'breaker': self.breaker.to_dict(),
+        }
+
+class AgentGuards:
+    """ AgentGuard of every remote agent, created on first use with the `a2a.timeouts` and `a2a.breaker` sections of the yaml """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(AgentGuards,cls).__new__(cls)
+            cls._instance._init()
+        return cls._instance
+
+    def _init(self):
+        if hasattr(self,"_initialized") and self._initialized:
+            return
+        config = Settings(r"C:\Users\Cristopher Hdz\Desktop\ai_portal\modules\util\config\config.yaml").a2a or {}
+        self.options = {**(config.get('timeouts') or {}),**(config.get('breaker') or {})}
+        self._guards:dict[str,AgentGuard] = {}
+        self._lock = threading.Lock()
+        self._initialized = True
+
+    def guard(self, agent_name:str)->AgentGuard:
+        with self._lock:
+            if agent_name not in self._guards:
+                self._guards[agent_name] = AgentGuard(agent_name,**self.options)
+            return self._guards[agent_name]
+
+    def stats(self)->dict:
+        return {agent_name: guard.to_dict() for agent_name, guard in self._guards.items()}
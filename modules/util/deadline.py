@@ -0,0 +1,69 @@
+import asyncio
+import time
+from typing import Awaitable, TypeVar
+from langchain_core.runnables import RunnableConfig
+from modules.util.config.config import Settings
+
+T = TypeVar("T")
+
+DEADLINE_KEY = 'deadline'
+BUDGET_KEY = 'deadline_budget'
+TIMED_OUT = "TIMED OUT"
+RESERVES = ('report_reserve','layout_reserve')
+
+def deadline_settings():
+    """ `deadline` section of the yaml, None when missing (no deadline) """
+    return Settings(r"C:\Users\Cristopher Hdz\Desktop\ai_portal\modules\util\config\config.yaml").deadline
+
+def new_deadline(seconds:float|None=None)->float|None:
+    """ Absolute deadline (epoch seconds) for a request of `seconds`, the yaml default when None, 0 = no deadline """
+    if seconds is None:
+        config = deadline_settings()
+        seconds = config.seconds if config else 0
+    return time.time() + seconds if seconds and seconds > 0 else None
+
+def get_deadline(config:RunnableConfig|None)->float|None:
+    """ Deadline of the current graph run, carried in the configurable keys """
+    return (config or {}).get('configurable',{}).get(DEADLINE_KEY)
+
+def get_budget(config:RunnableConfig|None)->float|None:
+    """ Seconds the graph run had when it started, the reserves are scaled to it """
+    return (config or {}).get('configurable',{}).get(BUDGET_KEY)
+
+def reserve(*names:str, budget:float|None=None)->float:
+    """
+    Seconds of the budget kept for the steps after the current one (`report_reserve`, `layout_reserve`):
+
+    * The yaml values when they fit in `max_reserve_fraction` of the request budget
+    * Scaled down together for shorter budgets, a 10 s request still leaves most of its time to the agents
+    """
+    config = deadline_settings()
+    if not config:
+        return 0.0
+    seconds = float(sum(config.get(name,0) for name in names))
+    total = float(sum(config.get(name,0) for name in RESERVES))
+    if not budget or not total:
+        return seconds
+    return seconds * min(1.0,budget * config.get('max_reserve_fraction',0.3) / total)
+
+def remaining(deadline:float|None, reserved:float=0.0)->float|None:
+    """ Seconds left before `deadline` minus `reserved`, never negative, None without deadline """
+    if deadline is None:
+        return None
+    return max(deadline - time.time() - reserved,0.0)
+
+def bounded_timeout(timeout:float, deadline:float|None, reserved:float=0.0)->float:
+    """ `timeout` shortened to what is left of the request budget """
+    left = remaining(deadline,reserved)
+    return timeout if left is None else min(timeout,left)
+
+async def run_until(awaitable:Awaitable[T], deadline:float|None, reserved:float=0.0)->T:
+    """ Awaits `awaitable`, cancelled with TimeoutError once the deadline minus `reserved` is reached """
+    left = remaining(deadline,reserved)
+    if left is None:
+        return await awaitable
+    return await asyncio.wait_for(awaitable,left)
+
+def timed_out(agent_name:str)->str:
+    """ Marker kept in the report for the agents cut by the deadline """
+    return f"{TIMED_OUT}: {agent_name} did not finish before the request deadline"
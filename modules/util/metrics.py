@@ -0,0 +1,331 @@
+import logging
+import threading
+import time
+from typing import Any, Callable
+from uuid import UUID
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(name=f"METRICS.{__name__}")
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+TOKEN_BUCKETS = (128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576)
+
+def _escape(value:str)->str:
+    return value.replace("\\","\\\\").replace('"','\\"').replace("\n","\\n")
+
+def _label_text(labelnames:tuple[str,...], values:tuple[str,...], extra:str="")->str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames,values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Metric:
+    """ Base of the metric types: name, help text, label names and a lock shared by the series """
+
+    kind = "untyped"
+
+    def __init__(self, name:str, documentation:str, labelnames:tuple[str,...]=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _key(self, labels:dict)->tuple[str,...]:
+        return tuple(str(labels.get(name,"")) for name in self.labelnames)
+
+    def render(self)->list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name:str, documentation:str, labelnames:tuple[str,...]=()):
+        super().__init__(name,documentation,labelnames)
+        self._values:dict[tuple[str,...],float] = {}
+
+    def inc(self, amount:float=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key,0.0) + amount
+
+    def _samples(self)->list[str]:
+        with self._lock:
+            return [f"{self.name}{_label_text(self.labelnames,key)} {value}" for key, value in self._values.items()]
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name:str, documentation:str, labelnames:tuple[str,...]=()):
+        super().__init__(name,documentation,labelnames)
+        self._values:dict[tuple[str,...],float] = {}
+
+    def set(self, value:float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount:float=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key,0.0) + amount
+
+    def dec(self, amount:float=1.0, **labels):
+        self.inc(-amount,**labels)
+
+    def _samples(self)->list[str]:
+        with self._lock:
+            return [f"{self.name}{_label_text(self.labelnames,key)} {value}" for key, value in self._values.items()]
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name:str, documentation:str, labelnames:tuple[str,...]=(), buckets:tuple[float,...]=LATENCY_BUCKETS):
+        super().__init__(name,documentation,labelnames)
+        self.buckets = buckets
+        self._series:dict[tuple[str,...],list] = {}
+
+    def observe(self, value:float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.setdefault(key,[[0]*len(self.buckets),0.0,0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def _samples(self)->list[str]:
+        lines = []
+        with self._lock:
+            for key, (counts, total, count) in self._series.items():
+                for bound, bucket_count in zip(self.buckets,counts):
+                    bucket = f'le="{bound}"'
+                    lines.append(f"{self.name}_bucket{_label_text(self.labelnames,key,bucket)} {bucket_count}")
+                inf_bucket = 'le="+Inf"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames,key,inf_bucket)} {count}")
+                lines.append(f"{self.name}_sum{_label_text(self.labelnames,key)} {total}")
+                lines.append(f"{self.name}_count{_label_text(self.labelnames,key)} {count}")
+        return lines
+
+class MetricsRegistry:
+    """
+    Process wide metrics in the Prometheus text format:
+
+    * Metrics are created once by name and shared by every module
+    * Collectors are called at scrape time to refresh gauges from other components (checkpointers, caches)
+    """
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(MetricsRegistry,cls).__new__(cls)
+            cls._instance._init()
+        return cls._instance
+
+    def _init(self):
+        if self._initialized:
+            return
+        self._metrics:dict[str,Metric] = {}
+        self._collectors:list[Callable[[],None]] = []
+        self._lock = threading.Lock()
+        self._initialized = True
+
+    def _get(self, cls, name:str, documentation:str, labelnames:tuple[str,...], **kwargs):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name,documentation,labelnames,**kwargs)
+            return self._metrics[name]
+
+    def counter(self, name:str, documentation:str, labelnames:tuple[str,...]=())->Counter:
+        return self._get(Counter,name,documentation,labelnames)
+
+    def gauge(self, name:str, documentation:str, labelnames:tuple[str,...]=())->Gauge:
+        return self._get(Gauge,name,documentation,labelnames)
+
+    def histogram(self, name:str, documentation:str, labelnames:tuple[str,...]=(), buckets:tuple[float,...]=LATENCY_BUCKETS)->Histogram:
+        return self._get(Histogram,name,documentation,labelnames,buckets=buckets)
+
+    def add_collector(self, collector:Callable[[],None]):
+        self._collectors.append(collector)
+
+    def render(self)->str:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+registry = MetricsRegistry()
+
+NODE_LATENCY = registry.histogram("langgraph_node_duration_seconds","Duration of LangGraph node runs",("node",))
+TOOL_LATENCY = registry.histogram("tool_duration_seconds","Duration of agent tool calls",("tool","status"))
+LLM_REQUESTS = registry.counter("llm_requests_total","LLM calls by model and result",("model","status"))
+LLM_LATENCY = registry.histogram("llm_request_duration_seconds","Duration of LLM calls",("model",))
+A2A_LATENCY = registry.histogram("a2a_request_duration_seconds","Duration of HTTP requests to remote A2A agents",("agent","path","status"))
+A2A_FIRST_TOKEN = registry.histogram("a2a_time_to_first_token_seconds","Time from sending a message to the first text of the remote agent, by agent and mode (streaming or blocking)",("agent","mode"))
+A2A_CARD_LOOKUPS = registry.counter("a2a_agent_card_lookups_total","Agent card lookups by result: memory, revalidated (304) or fetched",("result",))
+PROMPT_TOKENS = registry.histogram("llm_prompt_tokens","Prompt tokens of the LLM calls by graph node (usage of the model, else 4 characters per token)",("node",),TOKEN_BUCKETS)
+REQUEST_PROMPT_TOKENS = registry.histogram("request_prompt_tokens","Prompt tokens of every LLM call of one graph run",(),TOKEN_BUCKETS)
+STATE_CHARS = registry.histogram("graph_state_chars","Characters of the graph state received by agent_select, by part",("part",),SIZE_BUCKETS)
+DEADLINE_TIMEOUTS = registry.counter("deadline_timeouts_total","Agent calls and nodes cut by the request deadline",("stage",))
+HTTP_IN_FLIGHT = registry.gauge("http_requests_in_flight","Requests being served")
+HTTP_LATENCY = registry.histogram("http_request_duration_seconds","Duration of served HTTP requests",("method","path","status"))
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    LangChain / LangGraph callback that feeds the latency metrics:
+
+    * Graph nodes: chain runs whose name is the langgraph_node in their metadata
+    * Tools: tool runs by tool name
+    * LLM: chat model runs by model name
+    * Prompt tokens: by outer graph node (agents invoked inside a node have their own inner nodes) and per graph run
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self._starts:dict[UUID,tuple[str,str,float]] = {}
+        self._parents:dict[UUID,UUID|None] = {}
+        self._nodes:dict[UUID,str] = {}
+        self._prompts:dict[UUID,tuple[str,UUID,int]] = {}
+        self._request_tokens:dict[UUID,int] = {}
+
+    def _outer_node(self, run_id:UUID|None)->tuple[str,UUID|None]:
+        """ Outermost graph node above `run_id` and the root run (the graph run of the request) """
+        node, root = "unknown", run_id
+        while run_id is not None:
+            node = self._nodes.get(run_id,node)
+            root = run_id
+            run_id = self._parents.get(run_id)
+        return node, root
+
+    def _end_chain(self, run_id:UUID):
+        self._nodes.pop(run_id,None)
+        if self._parents.pop(run_id,None) is None and run_id in self._request_tokens:
+            REQUEST_PROMPT_TOKENS.observe(self._request_tokens.pop(run_id))
+
+    def _start(self, run_id:UUID, kind:str, label:str):
+        self._starts[run_id] = (kind,label,time.perf_counter())
+
+    def _finish(self, run_id:UUID, status:str):
+        started = self._starts.pop(run_id,None)
+        if started is None:
+            return
+        kind, label, start = started
+        elapsed = time.perf_counter() - start
+        if kind == "node":
+            NODE_LATENCY.observe(elapsed,node=label)
+        elif kind == "tool":
+            TOOL_LATENCY.observe(elapsed,tool=label,status=status)
+        elif kind == "llm":
+            LLM_REQUESTS.inc(model=label,status=status)
+            LLM_LATENCY.observe(elapsed,model=label)
+
+    def on_chain_start(self, serialized, inputs, *, run_id:UUID, parent_run_id:UUID|None=None, metadata:dict|None=None, **kwargs:Any):
+        self._parents[run_id] = parent_run_id
+        node = (metadata or {}).get("langgraph_node")
+        if node and node == kwargs.get("name"):
+            self._nodes[run_id] = node
+            self._start(run_id,"node",node)
+
+    def on_chain_end(self, outputs, *, run_id:UUID, **kwargs:Any):
+        self._finish(run_id,"ok")
+        self._end_chain(run_id)
+
+    def on_chain_error(self, error, *, run_id:UUID, **kwargs:Any):
+        self._finish(run_id,"error")
+        self._end_chain(run_id)
+
+    def on_tool_start(self, serialized, input_str, *, run_id:UUID, parent_run_id:UUID|None=None, **kwargs:Any):
+        self._parents[run_id] = parent_run_id
+        self._start(run_id,"tool",kwargs.get("name") or (serialized or {}).get("name","unknown"))
+
+    def on_tool_end(self, output, *, run_id:UUID, **kwargs:Any):
+        self._finish(run_id,"ok")
+        self._parents.pop(run_id,None)
+
+    def on_tool_error(self, error, *, run_id:UUID, **kwargs:Any):
+        self._finish(run_id,"error")
+        self._parents.pop(run_id,None)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id:UUID, parent_run_id:UUID|None=None, metadata:dict|None=None, **kwargs:Any):
+        params = kwargs.get("invocation_params") or {}
+        model = (metadata or {}).get("ls_model_name") or params.get("model") or params.get("model_name") or params.get("model_id") or "unknown"
+        self._start(run_id,"llm",model)
+        node, root = self._outer_node(parent_run_id)
+        self._prompts[run_id] = (node,root,sum(len(str(message.content)) for batch in messages for message in batch) // 4)
+
+    def _observe_prompt(self, run_id:UUID, response=None):
+        prompt = self._prompts.pop(run_id,None)
+        if prompt is None:
+            return
+        node, root, tokens = prompt
+        usage = (getattr(response,"llm_output",None) or {}).get("token_usage") or {}
+        tokens = usage.get("prompt_tokens") or tokens
+        PROMPT_TOKENS.observe(tokens,node=node)
+        if root is not None and root in self._parents:
+            self._request_tokens[root] = self._request_tokens.get(root,0) + tokens
+
+    def on_llm_end(self, response, *, run_id:UUID, **kwargs:Any):
+        self._finish(run_id,"ok")
+        self._observe_prompt(run_id,response)
+
+    def on_llm_error(self, error, *, run_id:UUID, **kwargs:Any):
+        self._finish(run_id,"error")
+        self._observe_prompt(run_id)
+
+def a2a_event_hooks(agent_name:str)->dict:
+    """ httpx event hooks that time every request sent to the remote agent `agent_name` """
+    starts:dict[int,float] = {}
+
+    async def on_request(request:httpx.Request):
+        starts[id(request)] = time.perf_counter()
+
+    async def on_response(response:httpx.Response):
+        start = starts.pop(id(response.request),None)
+        if start is not None:
+            A2A_LATENCY.observe(time.perf_counter() - start,agent=agent_name,path=response.request.url.path,status=response.status_code)
+
+    return {'request': [on_request], 'response': [on_response]}
+
+HTTP_METHODS = ("GET","HEAD","POST","PUT","PATCH","DELETE","OPTIONS")
+
+class MetricsMiddleware:
+    """
+    ASGI middleware for the in-flight gauge and the request duration by route:
+
+    * The path label is the route template, requests that match no route share "unmatched" (random 404 URLs do not add series)
+    * Methods outside the standard ones share "other"
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope,receive,send)
+            return
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope,receive,send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            path = getattr(route,"path",None) or "unmatched"
+            method = scope["method"] if scope["method"] in HTTP_METHODS else "other"
+            HTTP_LATENCY.observe(time.perf_counter() - start,method=method,path=path,status=status["code"])
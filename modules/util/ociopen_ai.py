@@ -4,13 +4,22 @@ from typing import (
     Iterator,
     Mapping,
 )
+import logging
+import threading
+from functools import cache
+from importlib.util import find_spec
 from openai import DEFAULT_MAX_RETRIES, NOT_GIVEN, OpenAI, AsyncOpenAI,DefaultHttpxClient, DefaultAsyncHttpxClient,Timeout, NotGiven
 from modules.util.config.config import Settings
 # https://docs.oracle.com/en-us/iaas/Content/API/Concepts/sdk_authentication_methods.htm
 import requests, oci, httpx
 from oci.config import DEFAULT_PROFILE
 
-settings = Settings(r"C:\Users\Cristopher Hdz\Desktop\ai_portal\modules\util\config\config.yaml")
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(name=f"OCI_OPENAI.{__name__}")
+
+def get_settings()->Settings:
+    """ The yaml is read on first use instead of at import, so importing the module stays cheap """
+    return Settings(r"C:\Users\Cristopher Hdz\Desktop\ai_portal\modules\util\config\config.yaml")
 
 class OciOpenAI(OpenAI):
     """
@@ -38,6 +47,7 @@ class OciOpenAI(OpenAI):
             max_retries: int = DEFAULT_MAX_RETRIES,
             default_headers: Mapping[str, str] | None = None,
             default_query: Mapping[str, object] | None = None,
+            http_client: httpx.Client | None = None,
     ) -> None:
         super().__init__(
             api_key="<NOTUSED>",
@@ -46,7 +56,7 @@ class OciOpenAI(OpenAI):
             max_retries=max_retries,
             default_headers=default_headers,
             default_query=default_query,
-            http_client=DefaultHttpxClient(
+            http_client=http_client or DefaultHttpxClient(
                 auth=auth,
                 headers={
                     "CompartmentId": compartment_id,
@@ -65,6 +75,7 @@ class AsyncOciOpenAI(AsyncOpenAI):
             max_retries: int = DEFAULT_MAX_RETRIES,
             default_headers: Mapping[str, str] | None = None,
             default_query: Mapping[str, object] | None = None,
+            http_client: httpx.AsyncClient | None = None,
     ) -> None:
         super().__init__(
             api_key="<NOTUSED>",
@@ -73,7 +84,7 @@ class AsyncOciOpenAI(AsyncOpenAI):
             max_retries=max_retries,
             default_headers=default_headers,
             default_query=default_query,
-            http_client=DefaultAsyncHttpxClient(
+            http_client=http_client or DefaultAsyncHttpxClient(
                 auth=auth,
                 headers={
                     "CompartmentId": compartment_id,
@@ -122,8 +133,8 @@ class OCISessionAuth(HttpxOCIAuth):
     Attributes:
         signer (oci.auth.signers.SecurityTokenSigner): OCI signer using session token
     """
-    def __init__(self, config_file=settings.oci_client.config_path, profile_name=DEFAULT_PROFILE):
-        config = oci.config.from_file(config_file, profile_name)
+    def __init__(self, config_file=None, profile_name=DEFAULT_PROFILE):
+        config = oci.config.from_file(config_file or get_settings().oci_client.config_path, profile_name)
         token = self._load_token(config)
         private_key = self._load_private_key(config)
         self.signer = oci.auth.signers.SecurityTokenSigner(token, private_key)
@@ -169,8 +180,8 @@ class OCIUserPrincipleAuth(HttpxOCIAuth):
     Attributes:
         signer (oci.signer.Signer): OCI signer configured with API key credentials
     """
-    def __init__(self, config_file=settings.oci_client.config_path, profile_name=DEFAULT_PROFILE):
-        config = oci.config.from_file(config_file, profile_name)
+    def __init__(self, config_file=None, profile_name=DEFAULT_PROFILE):
+        config = oci.config.from_file(config_file or get_settings().oci_client.config_path, profile_name)
         oci.config.validate_config(config)
 
         self.signer = oci.signer.Signer(
@@ -184,14 +195,15 @@ class OCIUserPrincipleAuth(HttpxOCIAuth):
             private_key_content=config.get("key_content")
         )
 
+@cache
+def user_principle_auth(profile_name:str=DEFAULT_PROFILE)->OCIUserPrincipleAuth:
+    """ One signer per profile for the process, the OCI config file and the key are read once """
+    return OCIUserPrincipleAuth(profile_name=profile_name)
+
 from langchain_openai.chat_models.base import ChatOpenAI
 from pydantic import Field, model_validator
 from typing_extensions import Self
 
-compartment_id=settings.oci_client.compartiment
-profile=settings.oci_client.configProfile
-endpoint = settings.oci_client.endpoint
-
 class OciOpenAILangChainClient(ChatOpenAI):
     profile: str = Field(
         description="OCI profile name to use for authentication"
@@ -211,6 +223,10 @@ class OciOpenAILangChainClient(ChatOpenAI):
     @model_validator(mode="after")
     def validate_environment(self) -> Self:
         """Initialize OCI clients after validation."""
+        settings = get_settings()
+        endpoint = settings.oci_client.endpoint
+        profile = settings.oci_client.configProfile
+        compartment_id = settings.oci_client.compartiment
         if not self.client:
             self.client = OciOpenAI(
                 service_endpoint=endpoint,
@@ -244,48 +260,117 @@ class OciOpenAILangGraphClient(ChatOpenAI):
     )
 
     def validate_environment(self) -> Self:
-        """Initialize OCI clients after validation."""
+        """Initialize OCI clients after validation, on the shared signer and httpx pools when `llm_client.shared` is on."""
+        settings = get_settings()
+        endpoint = settings.oci_client.endpoint
+        profile = settings.oci_client.configProfile
+        compartment_id = settings.oci_client.compartiment
+        registry = LLM_Open_Client()
+        auth = user_principle_auth(profile) if registry.shared else OCIUserPrincipleAuth(profile_name=profile)
         if not self.client:
             self.root_client = OciOpenAI(
                 service_endpoint=endpoint,
-                auth=OCIUserPrincipleAuth(profile_name=profile),
-                compartment_id=compartment_id
+                auth=auth,
+                compartment_id=compartment_id,
+                http_client=registry.http_client(auth,compartment_id) if registry.shared else None
             )
             self.client = self.root_client.chat.completions
 
         if not self.async_client:
             self.root_async_client = AsyncOciOpenAI(
                 service_endpoint=endpoint,
-                auth=OCIUserPrincipleAuth(profile_name=profile),
-                compartment_id=compartment_id
+                auth=auth,
+                compartment_id=compartment_id,
+                http_client=registry.http_async_client(auth,compartment_id) if registry.shared else None
             )
             self.async_client = self.root_async_client.chat.completions
 
         return self
 
 class LLM_Open_Client:
+    """
+    Process wide registry of the chat clients of the portal agents (`llm_client` section of the yaml):
+
+    * build_llm_client hands out one shared client per (model, params) instead of a new one per call
+    * Every client signs with one cached OCI signer and sends through one sync and one async httpx pool
+      (keep-alive limits, HTTP/2 when the h2 package is installed)
+    * `shared: false` builds a client with its own signer and pools on every call, as before
+    """
     _instance = None
     _initialized = False
+    _creation_lock = threading.Lock()
 
     def __new__(cls):
+        # The agents are built in parallel threads at warm-up, the registry is published only once it is initialized
         if cls._instance is None:
-            cls._instance = super(LLM_Open_Client,cls).__new__(cls)
-            cls._instance._init()
+            with cls._creation_lock:
+                if cls._instance is None:
+                    instance = super(LLM_Open_Client,cls).__new__(cls)
+                    instance._init()
+                    cls._instance = instance
         return cls._instance
     
     def _init(self):
         if self._initialized:
             return
+        config = get_settings().llm_client or {}
+        self.shared = config.get('shared',True)
+        self.http2 = config.get('http2',True) and find_spec("h2") is not None
+        if config.get('http2',True) and not self.http2:
+            logger.info("h2 is not installed, the LLM pool uses HTTP/1.1 (pip install httpx[http2])")
+        self.limits = httpx.Limits(
+            max_connections=config.get('max_connections',50),
+            max_keepalive_connections=config.get('max_keepalive_connections',20),
+            keepalive_expiry=config.get('keepalive_expiry',60.0),
+        )
+        self._clients:dict[tuple,OciOpenAILangGraphClient] = {}
+        self._http_client:httpx.Client|None = None
+        self._http_async_client:httpx.AsyncClient|None = None
+        self._lock = threading.RLock()
+        self.requests = 0
         self._initialized = True
 
-    def build_llm_client(self):
-        llm = OciOpenAILangGraphClient(
-            profile="",
-            region="us-ashburn-1",
-            compartment_id="",
-            model_name="openai.gpt-4.1"
-        )
-        return llm
+    def http_client(self, auth:httpx.Auth, compartment_id:str)->httpx.Client:
+        with self._lock:
+            if self._http_client is None:
+                self._http_client = DefaultHttpxClient(auth=auth,headers={"CompartmentId": compartment_id},limits=self.limits,http2=self.http2)
+            return self._http_client
+
+    def http_async_client(self, auth:httpx.Auth, compartment_id:str)->httpx.AsyncClient:
+        with self._lock:
+            if self._http_async_client is None:
+                self._http_async_client = DefaultAsyncHttpxClient(auth=auth,headers={"CompartmentId": compartment_id},limits=self.limits,http2=self.http2)
+            return self._http_async_client
+
+    def build_llm_client(self, model_name:str="openai.gpt-4.1", **params)->OciOpenAILangGraphClient:
+        """ Shared client of the model with these ChatOpenAI params (temperature, max_tokens, ...) """
+        if not self.shared:
+            return OciOpenAILangGraphClient(profile="",region="us-ashburn-1",compartment_id="",model_name=model_name,**params)
+        key = (model_name,tuple(sorted(params.items())))
+        with self._lock:
+            self.requests += 1
+            if key not in self._clients:
+                self._clients[key] = OciOpenAILangGraphClient(profile="",region="us-ashburn-1",compartment_id="",model_name=model_name,**params)
+            return self._clients[key]
+
+    async def aclose(self):
+        """ Closes the shared pools, called on shutdown """
+        with self._lock:
+            http_client, http_async_client = self._http_client, self._http_async_client
+            self._http_client, self._http_async_client, self._clients = None, None, {}
+        if http_async_client is not None:
+            await http_async_client.aclose()
+        if http_client is not None:
+            http_client.close()
+
+    def stats(self)->dict:
+        return {
+            'shared': self.shared,
+            'http2': self.http2,
+            'clients': [f"{model_name} {dict(params)}" for model_name, params in self._clients],
+            'requests': self.requests,
+            'signers': user_principle_auth.cache_info().currsize,
+        }
 
 def main():
     llm = OciOpenAILangGraphClient(
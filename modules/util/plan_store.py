@@ -0,0 +1,23 @@
+import re
+
+def merge_plans(left:dict[str,str]|None, right:dict[str,str]|None)->dict[str,str]:
+    """ Reducer of the plan store: plans keyed by agent name, a newer plan of an agent replaces the previous one """
+    return {**(left or {}),**(right or {})}
+
+def compact_plan(plan:str, max_chars:int|None=None)->str:
+    """ Plan without markdown decoration and blank lines, cut at the last sentence or line end before `max_chars` """
+    lines = (re.sub(r"^\s*(?:#+|>)\s*|\*\*|`","",line).strip() for line in str(plan).splitlines())
+    text = "\n".join(re.sub(r"[ \t]+"," ",line) for line in lines if line)
+    if not max_chars or len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    end = max(cut.rfind(". "),cut.rfind("\n"))
+    return (cut[:end + 1] if end > max_chars // 2 else cut).rstrip() + " [...]"
+
+def render_plans(plans:dict[str,str], order:list[str], max_chars:int|None=None)->str:
+    """ One compacted section per agent of the store, in worker order, the text agent_select receives """
+    agents = [agent for agent in order if agent in plans] + [agent for agent in plans if agent not in order]
+    return "\n\n".join(f"## {agent}\n{compact_plan(plans[agent],max_chars)}" for agent in agents)
+
+def plans_chars(plans:dict[str,str]|None)->int:
+    return sum(len(str(plan)) for plan in (plans or {}).values())
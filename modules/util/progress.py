@@ -0,0 +1,23 @@
+import logging
+from typing import Callable
+from langchain_core.runnables import RunnableConfig
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(name=f"PROGRESS.{__name__}")
+
+PROGRESS_KEY = 'progress'
+
+Progress = Callable[[dict],None]
+
+def get_progress(config:RunnableConfig|None)->Progress|None:
+    """ Progress callback of the current graph run (carried in the configurable keys like the deadline), None when nobody streams """
+    return (config or {}).get('configurable',{}).get(PROGRESS_KEY)
+
+def report(progress:Progress|None, event:dict):
+    """ Sends a progress event, a failing consumer never breaks the agent call """
+    if progress is None:
+        return
+    try:
+        progress(event)
+    except Exception as e:
+        logger.debug(f"Progress event dropped: {e}")
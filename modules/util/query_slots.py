@@ -0,0 +1,67 @@
+""" Slots of a user query (day, time, location, quantities) found with regular expressions, no model call """
+import re
+
+WEEKDAYS = ("monday","tuesday","wednesday","thursday","friday","saturday","sunday")
+MONTHS = ("january","february","march","april","may","june","july","august","september","october","november","december")
+US_STATES = (
+    "alabama","alaska","arizona","arkansas","california","colorado","connecticut","delaware","florida","georgia",
+    "hawaii","idaho","illinois","indiana","iowa","kansas","kentucky","louisiana","maine","maryland",
+    "massachusetts","michigan","minnesota","mississippi","missouri","montana","nebraska","nevada","new hampshire","new jersey",
+    "new mexico","new york","north carolina","north dakota","ohio","oklahoma","oregon","pennsylvania","rhode island","south carolina",
+    "south dakota","tennessee","texas","utah","vermont","virginia","washington","west virginia","wisconsin","wyoming",
+)
+
+DAY_PATTERN = re.compile(
+    r"\b(?:(?:this|next)\s+)?(?:" + "|".join(WEEKDAYS) + r")s?\b|\b(?:today|tonight|tomorrow|(?:this\s+|next\s+)?weekend)\b"
+    r"|\b(?:" + "|".join(MONTHS) + r")\s+\d{1,2}(?:st|nd|rd|th)?\b|\b\d{1,2}[/-]\d{1,2}(?:[/-]\d{2,4})?\b",
+    re.IGNORECASE
+)
+TIME_PATTERN = re.compile(
+    r"\b\d{1,2}(?::\d{2})?\s*(?:am|pm|a\.m\.|p\.m\.)|\b\d{1,2}:\d{2}\b|\b(?:morning|afternoon|evening|night|noon|midnight)\b",
+    re.IGNORECASE
+)
+STATE_PATTERN = re.compile(r"\b(?:" + "|".join(US_STATES) + r")\b",re.IGNORECASE)
+STATE_CODES = dict(zip(
+    ("AL","AK","AZ","AR","CA","CO","CT","DE","FL","GA","HI","ID","IL","IN","IA","KS","KY","LA","ME","MD",
+     "MA","MI","MN","MS","MO","MT","NE","NV","NH","NJ","NM","NY","NC","ND","OH","OK","OR","PA","RI","SC",
+     "SD","TN","TX","UT","VT","VA","WA","WV","WI","WY"),
+    US_STATES
+))
+STATE_CODE_PATTERN = re.compile(r"\b(?:" + "|".join(STATE_CODES) + r")\b")
+PLACE_PATTERN = re.compile(r"\b(?:in|at|near)\s+((?:[A-Z][a-z]+)(?:\s+[A-Z][a-z]+)*)")
+
+def extract_slots(query:str)->dict[str,list[str]]:
+    """ Day, time and location mentioned in the query, found with regular expressions (no model call) """
+    locations = [match.group(0).title() for match in STATE_PATTERN.finditer(query)]
+    for match in STATE_CODE_PATTERN.finditer(query):
+        state = STATE_CODES[match.group(0)].title()
+        if state not in locations:
+            locations.append(state)
+    for match in PLACE_PATTERN.finditer(query):
+        # "near Dallas Friday" is Dallas, the place ends at the first day or month word
+        words = match.group(1).split()
+        ends = [index for index, word in enumerate(words) if word.lower().rstrip("s") in WEEKDAYS or word.lower() in MONTHS]
+        place = " ".join(words[:ends[0]] if ends else words)
+        if place and place.title() not in locations:
+            locations.append(place)
+    return {
+        'day': list(dict.fromkeys(match.group(0).lower() for match in DAY_PATTERN.finditer(query))),
+        'time': list(dict.fromkeys(match.group(0).lower() for match in TIME_PATTERN.finditer(query))),
+        'location': locations,
+    }
+
+NUMBER_WORDS = dict(zip(
+    ("one","two","three","four","five","six","seven","eight","nine","ten","eleven","twelve","fifteen","twenty","thirty","fifty","hundred"),
+    ("1","2","3","4","5","6","7","8","9","10","11","12","15","20","30","50","100")
+))
+NUMBER_PATTERN = re.compile(r"\b\d+(?:[.,]\d+)*\b|\b(?:" + "|".join(NUMBER_WORDS) + r")\b",re.IGNORECASE)
+
+def extract_numbers(query:str)->list[str]:
+    """ Quantities of the query (people, budget, items), the numbers inside a day or a time are left out """
+    text = TIME_PATTERN.sub(" ",DAY_PATTERN.sub(" ",query))
+    return [NUMBER_WORDS.get(match.group(0).lower(),match.group(0).replace(",","")) for match in NUMBER_PATTERN.finditer(text)]
+
+def query_signature(query:str)->tuple:
+    """ Day, time, location and number slots of the query, two queries can share an answer only with the same signature """
+    slots = {**extract_slots(query),'number': extract_numbers(query)}
+    return tuple((name,tuple(sorted(value.lower() for value in values))) for name, values in slots.items())
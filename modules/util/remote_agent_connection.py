@@ -1,3 +1,4 @@
+import asyncio
 from collections.abc import Callable
 from uuid import uuid4
 
@@ -7,6 +8,7 @@ from typing import Any
 from a2a.client import A2AClient
 from a2a.types import (
     AgentCard,
+    JSONRPCError,
     JSONRPCErrorResponse,
     Message,
     MessageSendParams,
@@ -18,6 +20,9 @@ from a2a.types import (
 )
 
 from a2a.client import A2ACardResolver, A2AClient
+from modules.util.circuit_breaker import AgentGuards
+from modules.util.deadline import bounded_timeout, remaining
+from modules.util.metrics import DEADLINE_TIMEOUTS
 
 TaskCallbackArg = Task | TaskStatusUpdateEvent | TaskArtifactUpdateEvent
 TaskUpdateCallback = Callable[[TaskCallbackArg, AgentCard], Task]
@@ -25,41 +30,52 @@ TaskUpdateCallback = Callable[[TaskCallbackArg, AgentCard], Task]
 class RemoteAgentConnections:
     """A class to hold the connections to the remote agents."""
 
-    def __init__(self, client: httpx.AsyncClient, agent_card: AgentCard):
+    def __init__(self, client: httpx.AsyncClient, agent_card: AgentCard, agent_name: str | None = None):
+        self.client = client
         self.agent_client = A2AClient(client, agent_card)
         self.card = agent_card
+        self.agent_name = agent_name
         self.pending_tasks = set()
-        self.timeout = 30.0
+
+    @property
+    def timeout(self) -> float:
+        """ Adaptive timeout of the agent when it is known by name, else the fixed 30 s """
+        return AgentGuards().guard(self.agent_name).timeout() if self.agent_name else 30.0
 
     def get_agent(self) -> AgentCard:
         return self.card
 
+    def update_card(self, agent_card: AgentCard):
+        """ Keeps the pooled httpx client, the A2A client is rebuilt only when the card changed """
+        if agent_card != self.card:
+            self.agent_client = A2AClient(self.client, agent_card)
+            self.card = agent_card
+
     async def send_message_task(
         self,
         request: MessageSendParams,
         task_callback: TaskUpdateCallback | None,
+        deadline: float | None = None,
     ) -> Task | Message | None:
         if self.card.capabilities.streaming:
             task = None
-            async for response in self.agent_client.send_message_streaming(
-                SendStreamingMessageRequest(id=str(uuid4()), params=request)
-            ):
-                if not response.root.result:
-                    return response.root.error
-                # In the case a message is returned, that is the end of the interaction.
-                event = response.root.result
-                if isinstance(event, Message):
-                    return event
-
-                # Otherwise we are in the Task + TaskUpdate cycle.
-                if task_callback and event:
-                    task = task_callback(event, self.card)
-                if hasattr(event, 'final') and event.final:
-                    break
+
+            def remember(event: TaskCallbackArg, card: AgentCard) -> Task:
+                nonlocal task
+                task = task_callback(event, card) if task_callback else task
+                return task
+
+            # Past the request deadline the stream is closed and the last task update is returned
+            try:
+                async with asyncio.timeout(remaining(deadline)):
+                    return await self.stream_message_task(request, remember)
+            except TimeoutError:
+                DEADLINE_TIMEOUTS.inc(stage="a2a_stream")
             return task
         # Non-streaming
         response = await self.agent_client.send_message(
-            SendMessageRequest(id=str(uuid4()), params=request)
+            SendMessageRequest(id=str(uuid4()), params=request),
+            http_kwargs={"timeout": bounded_timeout(self.timeout,deadline)}
         )
         if isinstance(response.root, JSONRPCErrorResponse):
             return response.root.error
@@ -70,7 +86,39 @@ class RemoteAgentConnections:
             task_callback(response.root.result, self.card)
         return response.root.result
     
-    async def send_message_agent(self, user_input:str)-> Any:
+    async def stream_message_task(
+        self,
+        request: MessageSendParams,
+        task_callback: TaskUpdateCallback | None,
+        stop_on_artifact: bool = False,
+        http_kwargs: dict[str, Any] | None = None,
+    ) -> Task | Message | JSONRPCError | None:
+        """
+        Reads the message stream of the agent until the final event; with `stop_on_artifact` an artifact sent whole
+        (or its last chunk) ends the read without waiting for the completed status. Returns the last task built by
+        `task_callback`, timeouts are left to the caller.
+        """
+        task = None
+        async for response in self.agent_client.send_message_streaming(
+            SendStreamingMessageRequest(id=str(uuid4()), params=request), http_kwargs=http_kwargs
+        ):
+            if not response.root.result:
+                return response.root.error
+            # In the case a message is returned, that is the end of the interaction.
+            event = response.root.result
+            if isinstance(event, Message):
+                return event
+
+            # Otherwise we are in the Task + TaskUpdate cycle.
+            if task_callback and event:
+                task = task_callback(event, self.card)
+            if hasattr(event, 'final') and event.final:
+                break
+            if stop_on_artifact and isinstance(event, TaskArtifactUpdateEvent) and (event.last_chunk or not event.append):
+                break
+        return task
+
+    async def send_message_agent(self, user_input:str, deadline:float|None=None)-> Any:
         send_message_payload: dict[str, Any] = {
                 'message': {
                     'role': 'user',
@@ -83,7 +131,7 @@ class RemoteAgentConnections:
         request = SendMessageRequest(
             id=str(uuid4()), params=MessageSendParams(**send_message_payload)
         )
-        response = await self.agent_client.send_message(request, http_kwargs={"timeout": self.timeout})
+        response = await self.agent_client.send_message(request, http_kwargs={"timeout": bounded_timeout(self.timeout,deadline)})
         final_text = response.model_dump(mode='json', exclude_none=True)
         try:
             answer = final_text.get("result").get("artifacts")[0].get('parts')[0].get('text')
@@ -114,5 +162,4 @@ async def main():
         print(response)
 
 if __name__ == '__main__':
-    import asyncio
     asyncio.run(main())       
\ No newline at end of file
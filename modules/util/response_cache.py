@@ -0,0 +1,170 @@
+import logging
+import time
+import zlib
+from collections import OrderedDict
+import numpy as np
+from modules.util.single_flight import normalize_query
+from modules.util.query_slots import query_signature
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(name=f"RESPONSE_CACHE.{__name__}")
+
+STOP_WORDS = frozenset({
+    "a","an","and","at","for","i","in","is","it","me","my","of","on","or","please","the","to","we","with","you"
+})
+
+class HashedTfidfVectorizer:
+    """
+    Local query embedding without a model or a fitted vocabulary:
+
+    * Features are the words of the normalized query plus the character trigrams of each word
+    * Every feature is hashed (crc32, stable across processes) into a fixed number of buckets
+    * Term frequencies are sublinear (1 + log tf), the IDF weights are applied by the cache at lookup time
+    """
+
+    def __init__(self, dimensions:int=4096):
+        self.dimensions = dimensions
+
+    def features(self, text:str)->list[str]:
+        words = [word for word in normalize_query(text).split() if word not in STOP_WORDS]
+        features = list(words)
+        for word in words:
+            padded = f"<{word}>"
+            features.extend(padded[i:i+3] for i in range(len(padded)-2))
+        return features
+
+    def term_frequencies(self, text:str)->np.ndarray:
+        buckets = [zlib.crc32(feature.encode("utf-8")) % self.dimensions for feature in self.features(text)]
+        counts = np.bincount(np.asarray(buckets,dtype=np.int64),minlength=self.dimensions).astype(np.float32)
+        nonzero = counts > 0
+        counts[nonzero] = 1.0 + np.log(counts[nonzero])
+        return counts
+
+class SemanticResponseCache:
+    """
+    Whole-response cache keyed by query similarity:
+
+    * Stored queries live as rows of a preallocated term frequency matrix
+    * Lookup is one vectorized cosine top-1 search over the TF-IDF weighted rows
+    * A hit also needs the same day, time, location and number slots, "Sunday" / "Monday" or "10" / "100" people
+      differ in one token only and would pass the similarity threshold
+    * Entries are bounded by capacity (least recently used goes first) and by TTL
+    """
+
+    def __init__(self, enabled:bool=True, threshold:float=0.80, capacity:int=512, ttl_seconds:float=3600, dimensions:int=4096):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.capacity = capacity
+        self.ttl_seconds = ttl_seconds
+        self._vectorizer = HashedTfidfVectorizer(dimensions)
+        self._matrix = np.zeros((capacity,dimensions),dtype=np.float32)
+        self._document_frequency = np.zeros(dimensions,dtype=np.float32)
+        self._stored_at = np.zeros(capacity,dtype=np.float64)
+        self._valid = np.zeros(capacity,dtype=bool)
+        self._values:list[str|None] = [None]*capacity
+        self._keys:list[str|None] = [None]*capacity
+        self._signatures:list[tuple|None] = [None]*capacity
+        self._slots:OrderedDict[str,int] = OrderedDict()
+        self._free = list(range(capacity-1,-1,-1))
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.slot_rejections = 0
+
+    def _release(self, key:str):
+        slot = self._slots.pop(key)
+        self._document_frequency -= self._matrix[slot] > 0
+        self._matrix[slot] = 0
+        self._valid[slot] = False
+        self._values[slot] = None
+        self._keys[slot] = None
+        self._signatures[slot] = None
+        self._free.append(slot)
+
+    def _expire(self):
+        if not self._slots:
+            return
+        expired = np.flatnonzero(self._valid & (time.monotonic() - self._stored_at > self.ttl_seconds))
+        for slot in expired:
+            self._release(self._keys[slot])
+            self.expirations += 1
+
+    def _idf(self)->np.ndarray:
+        total = len(self._slots)
+        return np.log((1.0 + total) / (1.0 + self._document_frequency)) + 1.0
+
+    def scores(self, query:str)->tuple[np.ndarray,np.ndarray]:
+        """ Stored slots and their cosine similarity to the query """
+        query_tf = self._vectorizer.term_frequencies(query)
+        slots = np.flatnonzero(self._valid)
+        if not len(slots) or not query_tf.any():
+            return slots, np.zeros(len(slots),dtype=np.float32)
+        idf = self._idf()
+        weighted = self._matrix[slots] * idf
+        query_vector = query_tf * idf
+        norms = np.linalg.norm(weighted,axis=1) * np.linalg.norm(query_vector)
+        return slots, (weighted @ query_vector) / np.maximum(norms,1e-12)
+
+    def lookup(self, query:str)->str|None:
+        """ Returns the stored response of the most similar cached query with the same slots when it is above the threshold """
+        if not self.enabled:
+            return None
+        self._expire()
+        slots, scores = self.scores(query)
+        if not len(slots) or not scores.any():
+            self.misses += 1
+            return None
+
+        signature = query_signature(query)
+        same_slots = np.fromiter((self._signatures[slot] == signature for slot in slots),dtype=bool,count=len(slots))
+        if not (scores[same_slots] >= self.threshold).any():
+            if (scores >= self.threshold).any():
+                self.slot_rejections += 1
+            self.misses += 1
+            return None
+
+        best = int(np.argmax(np.where(same_slots,scores,-1.0)))
+        slot = int(slots[best])
+        self._slots.move_to_end(self._keys[slot])
+        self.hits += 1
+        logger.debug(f"Cache hit for '{query}' with '{self._keys[slot]}' (score {scores[best]:.3f})")
+        return self._values[slot]
+
+    def store(self, query:str, response:str):
+        """ Adds or refreshes the response for a query, evicting the least recently used entry when full """
+        if not self.enabled:
+            return
+        key = normalize_query(query)
+        query_tf = self._vectorizer.term_frequencies(query)
+        if not query_tf.any():
+            return
+        if key in self._slots:
+            self._release(key)
+        elif not self._free:
+            self._release(next(iter(self._slots)))
+            self.evictions += 1
+
+        slot = self._free.pop()
+        self._matrix[slot] = query_tf
+        self._document_frequency += query_tf > 0
+        self._stored_at[slot] = time.monotonic()
+        self._valid[slot] = True
+        self._values[slot] = response
+        self._keys[slot] = key
+        self._signatures[slot] = query_signature(query)
+        self._slots[key] = slot
+
+    def stats(self)->dict:
+        lookups = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'size': len(self._slots),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'slot_rejections': self.slot_rejections,
+        }
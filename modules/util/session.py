@@ -0,0 +1,29 @@
+import uuid
+from langchain_core.runnables import RunnableConfig
+
+def new_session_id()->str:
+    return str(uuid.uuid4())
+
+def get_thread_id(config:RunnableConfig|None)->str:
+    """ Thread id of the current graph run, a fresh one when called outside a run """
+    thread_id = (config or {}).get('configurable',{}).get('thread_id')
+    return str(thread_id) if thread_id else new_session_id()
+
+def agent_config(config:RunnableConfig|None)->dict:
+    """
+    Config for an agent invoked inside a graph node or tool:
+
+    * Keeps the thread id of the request so every agent checkpoint is scoped to it
+    * Keeps the request deadline and budget so the agent tools and A2A calls stop in time
+    * Keeps the progress callback so the A2A calls can stream the agent updates to the portal
+    * Replaces the other parent configurable keys, callbacks and metadata are still inherited from the run
+    """
+    configurable = {'thread_id': get_thread_id(config)}
+    for key in ('deadline','deadline_budget'):
+        value = (config or {}).get('configurable',{}).get(key)
+        if value is not None:
+            configurable[key] = value
+    progress = (config or {}).get('configurable',{}).get('progress')
+    if progress is not None:
+        configurable['progress'] = progress
+    return {'configurable': configurable}
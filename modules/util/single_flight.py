@@ -0,0 +1,67 @@
+import asyncio
+import logging
+import re
+from typing import Any, Awaitable, Callable
+
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(name=f"SINGLE_FLIGHT.{__name__}")
+
+def normalize_query(query:str)->str:
+    """ Lower case, drop punctuation and collapse whitespace so equivalent queries share one key """
+    return " ".join(re.sub(r"[^\w\s]"," ",query.lower()).split())
+
+class SingleFlight:
+    """
+    Request coalescing for expensive async calls:
+
+    * The first caller for a key (leader) starts the call as a task
+    * Concurrent callers with the same key (joins) wait on that same task instead of starting a new one
+    * The task is shielded, a cancelled caller does not cancel the shared run for the others
+    """
+
+    def __init__(self):
+        self._in_flight:dict[str,asyncio.Task] = {}
+        self.leaders = 0
+        self.joins = 0
+        self.hits = 0
+        self.shared_errors = 0
+
+    def _forget(self, key:str, task:asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+    async def do(self, key:str, call:Callable[[],Awaitable[Any]])->Any:
+        """ Runs call() once per key among concurrent callers and returns the shared result """
+        task = self._in_flight.get(key)
+        joined = task is not None
+        if joined:
+            self.joins += 1
+            logger.debug(f"Joining in-flight call for key: {key}")
+        else:
+            self.leaders += 1
+            task = asyncio.ensure_future(call())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key,done))
+
+        try:
+            result = await asyncio.shield(task)
+        except Exception:
+            if joined:
+                self.shared_errors += 1
+            raise
+        if joined:
+            self.hits += 1
+        return result
+
+    def stats(self)->dict:
+        """
+        leaders: calls that started a run, joins: calls that waited on one, hits: joins served with the shared result,
+        shared_errors: joins that got the error of the run (a join cancelled while waiting is in neither)
+        """
+        return {
+            'leaders': self.leaders,
+            'joins': self.joins,
+            'hits': self.hits,
+            'shared_errors': self.shared_errors,
+            'in_flight': len(self._in_flight),
+        }
@@ -1,9 +1,9 @@
 from langgraph.graph import MessagesState
 from typing import Annotated
-from langchain_core.messages import AnyMessage
-from langgraph.graph import add_messages
+from modules.util.plan_store import merge_plans
 
 class LayoutState(MessagesState):
-    """ change the status according to execution steps for worker agents """
+    """ change the status according to execution steps for worker agents, plans are kept by agent name """
     status: str
-    plans: Annotated[list[AnyMessage], add_messages]
\ No newline at end of file
+    plans: Annotated[dict[str,str], merge_plans]
+    assignments: list[dict]
@@ -1,10 +1,39 @@
-from fastapi import FastAPI, Query
+from contextlib import asynccontextmanager
+from importlib.util import find_spec
+from fastapi import FastAPI, Query, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from modules.chain.layout_graph import ChainManager
+from fastapi.responses import StreamingResponse, PlainTextResponse, JSONResponse
+from modules.chain.warmup import warm_up, StartupReport
+from modules.chain.job_manager import JobManager, QueueFullError
+from modules.util.single_flight import SingleFlight, normalize_query
+from modules.util.response_cache import SemanticResponseCache
+from modules.util.config.config import Settings
+from modules.util.checkpointer import CheckpointerRegistry
+from modules.util.metrics import registry, MetricsMiddleware
+from modules.util.deadline import TIMED_OUT, new_deadline
+from modules.util.circuit_breaker import UNAVAILABLE
 import uvicorn
+import asyncio
+import click
 import json
+import os
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app:FastAPI):
+    """ The port is bound right away, the agents are built in the background and /ready turns 200 once they are done """
+    start_warmup()
+    await job_manager.start()
+    yield
+    await job_manager.stop()
+    if app.state.warmup.done():
+        from modules.util.a2a_calls import A2AConnectionPool
+        from modules.util.agent_registry import AgentRegistry
+        from modules.util.ociopen_ai import LLM_Open_Client
+        await AgentRegistry().stop()
+        await A2AConnectionPool().aclose()
+        await LLM_Open_Client().aclose()
+
+app = FastAPI(lifespan=lifespan)
 
 # Missing out of test security rules
 app.add_middleware(
@@ -14,8 +43,32 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+
+settings = Settings(r"C:\Users\Cristopher Hdz\Desktop\ai_portal\modules\util\config\config.yaml")
+startup_report = StartupReport()
+single_flight = SingleFlight()
+response_cache = SemanticResponseCache(**settings.portal.response_cache)
+
+def start_warmup()->asyncio.Task:
+    """ Builds the agents in a thread, the task is kept in the app state """
+    app.state.warmup = asyncio.create_task(asyncio.to_thread(warm_up,startup_report))
+    return app.state.warmup
 
-chain = ChainManager()
+def warmup_task()->asyncio.Task:
+    """ The running or finished warm-up, a failed one is started again (one retry at a time, the check does not await) """
+    warmup = app.state.warmup
+    if warmup.done() and (warmup.cancelled() or warmup.exception() is not None):
+        warmup = start_warmup()
+    return warmup
+
+def warmed_up()->bool:
+    """ The last warm-up finished without error, `done` alone is also set by a failed one """
+    return startup_report.done and startup_report.error is None
+
+async def get_chain():
+    """ ChainManager of this worker, requests that arrive during the warm-up wait for it """
+    return await asyncio.shield(warmup_task())
 
 def json_response_parser(response):
     """ Parsing the string / message state function to JSON """
@@ -26,20 +79,175 @@ def json_response_parser(response):
         print(e)
         return {"error":e}
 
-async def call_main_graph(query:str)->str:
-    """ Calls the complete graph """
-    response = await chain.call_main_graph(query)
+def is_cacheable(data,session_id:str|None,status:str,content:str)->bool:
+    """
+    Only complete parsed layouts of session-less requests are cached: session answers depend on the history, and a
+    run cut by the deadline or with an unreachable agent (timed out / unavailable sections) would be served to every
+    similar query for the whole TTL
+    """
+    if session_id is not None or (isinstance(data,dict) and "error" in data):
+        return False
+    return status not in ('timeout','unavailable') and TIMED_OUT not in content and UNAVAILABLE not in content
+
+def flight_key(query:str,session_id:str|None,timeout:float|None=None)->str:
+    """ Requests share a run only with the same time budget, a long one joining a short run would get its cut layout """
+    return f"{session_id or ''}:{timeout or ''}:{normalize_query(query)}"
+
+async def call_main_graph(query:str,bypass_cache:bool=False,session_id:str|None=None,timeout:float|None=None)->str:
+    """ Calls the complete graph, similar queries are served from cache and concurrent identical queries share one run """
+    if not bypass_cache and session_id is None:
+        cached = response_cache.lookup(query)
+        if cached is not None:
+            return json_response_parser(cached)
+    deadline = new_deadline(timeout)
+    chain = await get_chain()
+    response, status = await single_flight.do(flight_key(query,session_id,timeout),lambda: chain.run_main_graph(query,session_id,deadline))
     data = json_response_parser(response)
+    if is_cacheable(data,session_id,status,response):
+        response_cache.store(query,response)
     return data
 
+job_manager = JobManager(
+    call_main_graph,
+    workers=settings.portal.jobs.workers,
+    max_queue=settings.portal.jobs.max_queue,
+    retention_seconds=settings.portal.jobs.retention_seconds
+)
+
+def sse_event(event:str,data)->str:
+    """ Formats one Server-Sent Event frame """
+    return f"event: {event}\ndata: {json.dumps(data,default=str)}\n\n"
+
+async def stream_main_graph(query:str,bypass_cache:bool=False,session_id:str|None=None,timeout:float|None=None):
+    """ Forwards each finished graph node and each remote agent update as progress events, then the parsed layout """
+    if not bypass_cache and session_id is None:
+        cached = response_cache.lookup(query)
+        if cached is not None:
+            yield sse_event("node",{"node": "cache","preview": ""})
+            yield sse_event("result",{"result": json_response_parser(cached)})
+            return
+    deadline = new_deadline(timeout)
+    chain = await get_chain()
+    async for event in chain.stream_main_graph(query,session_id,deadline):
+        if event['event'] == 'final':
+            data = json_response_parser(event['content'])
+            if is_cacheable(data,session_id,event['status'],event['content']):
+                response_cache.store(query,event['content'])
+            yield sse_event("result",{"result": data})
+        else:
+            yield sse_event(event['event'],{key: value for key, value in event.items() if key != 'event'})
+
 @app.get("/get-response")
-async def get_response(query:str = Query(...,description="User query to agent")):
-    result = await call_main_graph(query)
+async def get_response(query:str = Query(...,description="User query to agent"),
+                       bypass_cache:bool = Query(False,description="Skip the response cache lookup"),
+                       session_id:str|None = Query(None,description="Client session to keep the agents history across requests"),
+                       timeout:float|None = Query(None,gt=0,description="Seconds for the whole request (deadline.seconds in the yaml by default), unfinished agents are cut and shown as timed out")):
+    result = await call_main_graph(query,bypass_cache,session_id,timeout)
     return {"result": result}
 
-if __name__ == "__main__":
+@app.get("/stream-response")
+async def stream_response(query:str = Query(...,description="User query to agent"),
+                          bypass_cache:bool = Query(False,description="Skip the response cache lookup"),
+                          session_id:str|None = Query(None,description="Client session to keep the agents history across requests"),
+                          timeout:float|None = Query(None,gt=0,description="Seconds for the whole request (deadline.seconds in the yaml by default), unfinished agents are cut and shown as timed out")):
+    return StreamingResponse(
+        stream_main_graph(query,bypass_cache,session_id,timeout),
+        media_type="text/event-stream",
+        headers={"Cache-Control":"no-cache","X-Accel-Buffering":"no"}
+    )
+
+@app.post("/jobs",status_code=202)
+async def create_job(query:str = Query(...,description="User query to agent"),
+                     bypass_cache:bool = Query(False,description="Skip the response cache lookup"),
+                     session_id:str|None = Query(None,description="Client session to keep the agents history across requests"),
+                     timeout:float|None = Query(None,gt=0,description="Seconds for the run once a job worker starts it (deadline.seconds in the yaml by default), unfinished agents are cut and shown as timed out")):
+    try:
+        job = job_manager.submit(query,bypass_cache=bypass_cache,session_id=session_id,timeout=timeout)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429,detail=str(e),headers={"Retry-After": str(e.retry_after)})
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id:str,
+                  wait:float = Query(0,ge=0,description="Seconds to long-poll for the job to finish")):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404,detail=f"Job {job_id} not found")
+    job = await job_manager.wait(job,min(wait,settings.portal.jobs.max_wait_seconds))
+    return job.to_dict()
+
+@app.get("/stats")
+async def get_stats():
+    # Imported here, the a2a types would slow down the port bind
+    from modules.cluster.skill_router import SkillRouter
+    from modules.cluster.capability_manifest import ManifestPlanner
+    from modules.util.a2a_calls import A2AConnectionPool
+    from modules.util.a2a_results import ResultDumps
+    from modules.util.agent_registry import AgentRegistry
+    from modules.util.ociopen_ai import LLM_Open_Client
+    from modules.util.circuit_breaker import AgentGuards
+    # Built by the warm-up, after a failed one they would be built here on the event loop (agent cards, OCI config)
+    ready = warmed_up()
+    return {
+        "single_flight": single_flight.stats(),
+        "response_cache": response_cache.stats(),
+        "jobs": job_manager.stats(),
+        "checkpointers": CheckpointerRegistry().stats(),
+        "router": SkillRouter().stats() if ready else None,
+        "plans": ManifestPlanner().stats() if ready else None,
+        "a2a": A2AConnectionPool().stats() if ready else None,
+        "replicas": AgentRegistry().stats() if ready else None,
+        "agents": AgentGuards().stats() if ready else None,
+        "a2a_results": ResultDumps().stats() if ready else None,
+        "llm": LLM_Open_Client().stats() if ready else None,
+        "startup": startup_report.to_dict()
+    }
+
+@app.get("/a2a/results")
+async def get_a2a_results(agent:str|None = Query(None,description="Remote agent name, all the agents by default"),
+                          limit:int = Query(20,ge=1,le=100)):
+    """ Full responses of the last A2A calls, the worker models only get the compact result """
+    from modules.util.a2a_results import ResultDumps
+    return {"results": ResultDumps().recent(agent,limit)}
+
+@app.get("/a2a/results/{dump_id}")
+async def get_a2a_result(dump_id:str):
+    from modules.util.a2a_results import ResultDumps
+    entry = ResultDumps().get(dump_id)
+    if entry is None:
+        raise HTTPException(status_code=404,detail=f"A2A result {dump_id} not kept")
+    return entry
+
+@app.get("/ready")
+async def get_ready():
+    """ Readiness probe: 200 once this worker has its agents built, 503 while warming up or when the warm-up failed (the probe starts it again) """
+    warmup_task()
+    ready = warmed_up()
+    return JSONResponse({"ready": ready,"pid": os.getpid(),"error": startup_report.error},status_code=200 if ready else 503)
+
+@app.get("/metrics")
+async def get_metrics():
+    return PlainTextResponse(registry.render(),media_type="text/plain; version=0.0.4")
+
+def server_options()->dict:
+    """ uvloop and httptools when they are installed (pip install uvloop httptools, not on Windows) """
+    return {
+        "loop": "uvloop" if find_spec("uvloop") else "asyncio",
+        "http": "httptools" if find_spec("httptools") else "h11",
+    }
+
+@click.command()
+@click.option("--host","host",default="0.0.0.0")
+@click.option("--port","port",default=8000)
+@click.option("--workers","workers",default=1,help="Worker processes, each one warms its own agents")
+def main(host,port,workers):
     uvicorn.run(
         "portal:app",
-        host="0.0.0.0",
-        port=8000
-    )
\ No newline at end of file
+        host=host,
+        port=port,
+        workers=workers,
+        **server_options()
+    )
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -2,12 +2,14 @@ from collections.abc import AsyncIterable
 from typing import Any
 from langchain_core.messages import AIMessage, ToolMessage
 from langchain_core.tools import tool
-from langgraph.checkpoint.memory import MemorySaver
+from modules.util.checkpointer import build_checkpointer
+from modules.util.metrics import MetricsCallbackHandler
 from langgraph.prebuilt import create_react_agent
 from remote.util.oci_client import LLM_Client
 
 oci_client = LLM_Client()
-memory = MemorySaver()
+metrics_handler = MetricsCallbackHandler()
+memory = build_checkpointer("remote_decoration_agent",oci_client.settings.checkpointer)
 
 @tool
 def list_decorations()->list[str]:
@@ -44,7 +46,7 @@ class DecorationAgent:
 
     async def stream(self,query,context_id)-> AsyncIterable[dict[str,Any]]:
         inputs = {'messages': [('user', query)]}
-        config = {'configurable': {'thread_id': context_id}}
+        config = {'configurable': {'thread_id': context_id},'callbacks':[metrics_handler]}
         final_response = []
         try:
             for chunk in self.art_agent.stream(inputs,config,stream_mode="values"):
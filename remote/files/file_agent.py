@@ -3,7 +3,8 @@ load_dotenv()
 from collections.abc import AsyncIterable
 from typing import Any
 from langchain_core.messages import AIMessage, ToolMessage
-from langgraph.checkpoint.memory import MemorySaver
+from modules.util.checkpointer import build_checkpointer
+from modules.util.metrics import MetricsCallbackHandler
 from langgraph.prebuilt import create_react_agent
 from remote.util.oci_client import LLM_Client
 import logging
@@ -27,7 +28,8 @@ client = MultiServerMCPClient(metadata)
 # MCP connection section END -----------------------------------------
 
 oci_client = LLM_Client()
-memory = MemorySaver()
+metrics_handler = MetricsCallbackHandler()
+memory = build_checkpointer("remote_file_agent",oci_client.settings.checkpointer)
 
 class FileAgent:
     """ Agent expert managing user files, open, delete, write, rename files, etc. """
@@ -55,7 +57,7 @@ class FileAgent:
 
     async def stream(self,query,context_id)-> AsyncIterable[dict[str,Any]]:
         inputs = {'messages': [('user', query)]}
-        config = {'configurable': {'thread_id': context_id}}
+        config = {'configurable': {'thread_id': context_id},'callbacks':[metrics_handler]}
         final_response = []
         try:
             async for chunk in self.file_agent.astream(inputs,config,stream_mode="values"):
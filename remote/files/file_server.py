@@ -11,6 +11,7 @@ from a2a.server.tasks import (
 )
 from a2a.server.apps import A2AStarletteApplication
 from a2a.server.request_handlers import DefaultRequestHandler
+from remote.util.routes import add_monitoring_routes
 from remote.files.file_agent import FileAgent
 from remote.files.file_executor import FileAgentExecutor
 
@@ -63,7 +64,7 @@ def main(host,port):
             agent_card=agent_card, http_handler=request_handler
         )
 
-        uvicorn.run(server.build(), host=host, port=port)
+        uvicorn.run(add_monitoring_routes(server.build()), host=host, port=port)
 
     except Exception as e:
         logger.error(f'An error occurred during server startup: {e}')
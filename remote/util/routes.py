@@ -0,0 +1,61 @@
+import hashlib
+from a2a.utils.constants import AGENT_CARD_WELL_KNOWN_PATH, EXTENDED_AGENT_CARD_PATH
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
+from modules.util.checkpointer import CheckpointerRegistry
+from modules.util.metrics import registry, MetricsMiddleware
+
+async def stats(request:Request)->JSONResponse:
+    """ Checkpointer threads, evictions and stored bytes of this server agent """
+    return JSONResponse({"checkpointers": CheckpointerRegistry().stats()})
+
+async def metrics(request:Request)->PlainTextResponse:
+    """ Prometheus scrape endpoint """
+    return PlainTextResponse(registry.render(),media_type="text/plain; version=0.0.4")
+
+class AgentCardETagMiddleware:
+    """ ETag on the agent card responses, a GET with a matching If-None-Match gets a 304 without the card """
+
+    def __init__(self, app, paths:tuple[str,...]=(AGENT_CARD_WELL_KNOWN_PATH,EXTENDED_AGENT_CARD_PATH)):
+        self.app = app
+        self.paths = paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or scope["path"] not in self.paths:
+            await self.app(scope,receive,send)
+            return
+        start, body = {}, []
+
+        async def buffer(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                body.append(message.get("body",b""))
+                if not message.get("more_body",False):
+                    await self._send(scope,send,start,b"".join(body))
+
+        await self.app(scope,receive,buffer)
+
+    async def _send(self, scope, send, start, body:bytes):
+        if start["status"] != 200:
+            await send(start)
+            await send({"type": "http.response.body","body": body})
+            return
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'.encode()
+        requested = dict(scope["headers"]).get(b"if-none-match",b"")
+        if etag in [value.strip() for value in requested.split(b",")]:
+            await send({"type": "http.response.start","status": 304,"headers": [(b"etag",etag)]})
+            await send({"type": "http.response.body","body": b""})
+            return
+        headers = [(key,value) for key, value in start.get("headers",[]) if key.lower() != b"etag"] + [(b"etag",etag)]
+        await send({**start,"headers": headers})
+        await send({"type": "http.response.body","body": body})
+
+def add_monitoring_routes(app:Starlette)->Starlette:
+    """ Adds the operational routes, the request metrics and the agent card ETags next to the A2A ones """
+    app.add_route("/stats",stats,methods=["GET"])
+    app.add_route("/metrics",metrics,methods=["GET"])
+    app.add_middleware(AgentCardETagMiddleware)
+    app.add_middleware(MetricsMiddleware)
+    return app
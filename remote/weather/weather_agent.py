@@ -3,7 +3,8 @@ load_dotenv()
 from collections.abc import AsyncIterable
 from typing import Any
 from langchain_core.messages import AIMessage, ToolMessage
-from langgraph.checkpoint.memory import MemorySaver
+from modules.util.checkpointer import build_checkpointer
+from modules.util.metrics import MetricsCallbackHandler
 from langgraph.prebuilt import create_react_agent
 from remote.util.oci_client import LLM_Client
 import logging
@@ -28,7 +29,8 @@ client = MultiServerMCPClient(metadata)
 # MCP connection section END -----------------------------------------
 
 oci_client = LLM_Client()
-memory = MemorySaver()
+metrics_handler = MetricsCallbackHandler()
+memory = build_checkpointer("remote_weather_agent",oci_client.settings.checkpointer)
 
 fuse_tracer = FuseConfig()
 id = fuse_tracer.generate_id()
@@ -60,7 +62,7 @@ class WeatherAgent:
 
     async def stream(self,query,context_id)-> AsyncIterable[dict[str,Any]]:
         inputs = {'messages': [('user', query)]}
-        config = {'configurable': {'thread_id': context_id},'callbacks':[trace_handler],'metadata':{'langfuse_session_id':id}}
+        config = {'configurable': {'thread_id': context_id},'callbacks':[trace_handler,metrics_handler],'metadata':{'langfuse_session_id':id}}
         final_response = []
         try:
             async for chunk in self.weather_agent.astream(inputs,config,stream_mode="values"):
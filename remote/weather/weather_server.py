@@ -11,6 +11,7 @@ from a2a.server.tasks import (
 )
 from a2a.server.apps import A2AStarletteApplication
 from a2a.server.request_handlers import DefaultRequestHandler
+from remote.util.routes import add_monitoring_routes
 from remote.weather.weather_agent import WeatherAgent
 from remote.weather.weather_executor import WeatherAgentExecutor
 
@@ -41,7 +42,7 @@ def main(host,port):
         
         agent_card = AgentCard(
             name="Weather agent",
-            description="Helps user look for movies, plan cinema visit and buy tickets for cinema",
+            description="Helps user check the weather forecast and weather alerts for US states",
             url=f"http://{host}:{port}/",
             version="1.0.0",
             default_input_modes=WeatherAgent.SUPPORTED_CONTENT_TYPES,
@@ -63,7 +64,7 @@ def main(host,port):
             agent_card=agent_card, http_handler=request_handler
         )
 
-        uvicorn.run(server.build(), host=host, port=port)
+        uvicorn.run(add_monitoring_routes(server.build()), host=host, port=port)
 
     except Exception as e:
         logger.error(f'An error occurred during server startup: {e}')